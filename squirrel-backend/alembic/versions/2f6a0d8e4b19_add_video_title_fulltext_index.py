@@ -0,0 +1,24 @@
+"""add video title fulltext index
+
+Revision ID: 2f6a0d8e4b19
+Revises: e7b3c9d15a60
+Create Date: 2025-01-23 09:47:15.260381
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '2f6a0d8e4b19'
+down_revision = 'e7b3c9d15a60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 标题以中日韩文字为主，使用 ngram 分词
+    op.create_index('ft_video_title', 'video', ['title'], unique=False,
+                    mysql_prefix='FULLTEXT', mysql_with_parser='ngram')
+
+
+def downgrade():
+    op.drop_index('ft_video_title', table_name='video')
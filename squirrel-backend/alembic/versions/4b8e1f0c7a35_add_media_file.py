@@ -0,0 +1,36 @@
+"""add media file
+
+Revision ID: 4b8e1f0c7a35
+Revises: 9a7c2e5f1d84
+Create Date: 2025-01-26 11:42:17.503861
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '4b8e1f0c7a35'
+down_revision = '9a7c2e5f1d84'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('media_file',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('video_id', sa.Integer(), nullable=False),
+    sa.Column('path', sa.VARCHAR(length=1024), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('container', sa.VARCHAR(length=16), nullable=True),
+    sa.Column('codecs', sa.VARCHAR(length=128), nullable=True),
+    sa.Column('mtime', sa.Double(), nullable=False),
+    sa.Column('checksum', sa.VARCHAR(length=32), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('video_id')
+    )
+
+
+def downgrade():
+    op.drop_table('media_file')
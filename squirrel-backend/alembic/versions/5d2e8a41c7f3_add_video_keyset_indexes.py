@@ -0,0 +1,24 @@
+"""add video keyset pagination indexes
+
+Revision ID: 5d2e8a41c7f3
+Revises: bfc975377fe7
+Create Date: 2025-01-18 10:12:31.418205
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '5d2e8a41c7f3'
+down_revision = 'bfc975377fe7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_video_publish_date_id', 'video', ['publish_date', 'id'], unique=False)
+    op.create_index('ix_video_created_at_id', 'video', ['created_at', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_video_created_at_id', table_name='video')
+    op.drop_index('ix_video_publish_date_id', table_name='video')
@@ -0,0 +1,42 @@
+"""add video counter
+
+Revision ID: 8c41f6b3a9d2
+Revises: 5d2e8a41c7f3
+Create Date: 2025-01-19 21:03:52.671044
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '8c41f6b3a9d2'
+down_revision = '5d2e8a41c7f3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('video_counter',
+    sa.Column('subscription_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('video_count', sa.Integer(), nullable=False),
+    sa.Column('preview_count', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('subscription_id')
+    )
+    # 根据现有数据初始化计数器
+    op.execute("""
+        INSERT INTO video_counter (subscription_id, video_count, preview_count, updated_at)
+        SELECT sv.subscription_id, COUNT(*), SUM(v.publish_date > NOW()), NOW()
+        FROM subscription_video sv JOIN video v ON v.id = sv.video_id
+        GROUP BY sv.subscription_id
+    """)
+    op.execute("""
+        INSERT INTO video_counter (subscription_id, video_count, preview_count, updated_at)
+        SELECT 0, COALESCE(SUM(vc.video_count), 0), COALESCE(SUM(vc.preview_count), 0), NOW()
+        FROM video_counter vc JOIN subscription s ON s.id = vc.subscription_id
+        WHERE s.is_deleted = 0
+    """)
+
+
+def downgrade():
+    op.drop_table('video_counter')
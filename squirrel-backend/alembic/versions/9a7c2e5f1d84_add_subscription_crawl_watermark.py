@@ -0,0 +1,25 @@
+"""add subscription crawl watermark
+
+Revision ID: 9a7c2e5f1d84
+Revises: 2f6a0d8e4b19
+Create Date: 2025-01-25 16:05:44.108736
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '9a7c2e5f1d84'
+down_revision = '2f6a0d8e4b19'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('subscription', sa.Column('latest_video_id', sa.VARCHAR(length=64), nullable=True))
+    op.add_column('subscription', sa.Column('latest_published_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('subscription', 'latest_published_at')
+    op.drop_column('subscription', 'latest_video_id')
@@ -0,0 +1,50 @@
+"""add hot lookup indexes
+
+Revision ID: e7b3c9d15a60
+Revises: 8c41f6b3a9d2
+Create Date: 2025-01-21 14:26:08.935217
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'e7b3c9d15a60'
+down_revision = '8c41f6b3a9d2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # VARCHAR(2048) 的 URL 列无法直接建索引，使用 MySQL 生成的 MD5 列代替
+    op.add_column('video', sa.Column('url_hash', sa.BINARY(length=16),
+                                     sa.Computed('unhex(md5(url))', persisted=True), nullable=True))
+    op.create_index(op.f('ix_video_url_hash'), 'video', ['url_hash'], unique=False)
+    op.add_column('creator', sa.Column('url_hash', sa.BINARY(length=16),
+                                       sa.Computed('unhex(md5(url))', persisted=True), nullable=True))
+    op.create_index(op.f('ix_creator_url_hash'), 'creator', ['url_hash'], unique=False)
+    op.add_column('subscription', sa.Column('content_url_hash', sa.BINARY(length=16),
+                                            sa.Computed('unhex(md5(content_url))', persisted=True), nullable=True))
+    op.create_index(op.f('ix_subscription_content_url_hash'), 'subscription', ['content_url_hash'], unique=False)
+
+    op.create_index(op.f('ix_subscription_video_video_id'), 'subscription_video', ['video_id'], unique=False)
+    op.create_index(op.f('ix_download_task_video_id'), 'download_task', ['video_id'], unique=False)
+    op.create_index('ix_download_task_status_updated_at', 'download_task', ['status', 'updated_at'], unique=False)
+    op.create_index(op.f('ix_video_history_video_id'), 'video_history', ['video_id'], unique=False)
+    op.create_index('ix_podcast_episodes_channel_id_published_at', 'podcast_episodes',
+                    ['channel_id', 'published_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_podcast_episodes_channel_id_published_at', table_name='podcast_episodes')
+    op.drop_index(op.f('ix_video_history_video_id'), table_name='video_history')
+    op.drop_index('ix_download_task_status_updated_at', table_name='download_task')
+    op.drop_index(op.f('ix_download_task_video_id'), table_name='download_task')
+    op.drop_index(op.f('ix_subscription_video_video_id'), table_name='subscription_video')
+
+    op.drop_index(op.f('ix_subscription_content_url_hash'), table_name='subscription')
+    op.drop_column('subscription', 'content_url_hash')
+    op.drop_index(op.f('ix_creator_url_hash'), table_name='creator')
+    op.drop_column('creator', 'url_hash')
+    op.drop_index(op.f('ix_video_url_hash'), table_name='video')
+    op.drop_column('video', 'url_hash')
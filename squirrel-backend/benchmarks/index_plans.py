@@ -0,0 +1,210 @@
+"""
+对比索引迁移前后热点查询的执行计划与耗时。
+
+会在当前配置的数据库中建表并写入大量测试数据，只能在专用的压测库上运行：
+
+    MYSQL_DATABASE=squirrel_bench python -m benchmarks.index_plans --rows 1000000
+"""
+import argparse
+import logging
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+from alembic import command
+from alembic.config import Config as AlembicConfig
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import text
+
+from core.config import settings
+from core.database import engine
+
+logger = logging.getLogger()
+
+BEFORE_REVISION = '8c41f6b3a9d2'
+AFTER_REVISION = 'e7b3c9d15a60'
+BATCH_SIZE = 10000
+REPEAT = 20
+
+# (名称, 迁移前的查询, 迁移后的查询)
+QUERIES = [
+    ('video by url',
+     "SELECT * FROM video WHERE url = :video_url LIMIT 1",
+     "SELECT * FROM video WHERE url_hash = unhex(md5(:video_url)) AND url = :video_url LIMIT 1"),
+    ('creator by url',
+     "SELECT * FROM creator WHERE url = :creator_url LIMIT 1",
+     "SELECT * FROM creator WHERE url_hash = unhex(md5(:creator_url)) AND url = :creator_url LIMIT 1"),
+    ('subscription by content_url',
+     "SELECT * FROM subscription WHERE content_url = :content_url LIMIT 1",
+     "SELECT * FROM subscription WHERE content_url_hash = unhex(md5(:content_url)) "
+     "AND content_url = :content_url LIMIT 1"),
+    ('subscription_video by video_id',
+     "SELECT * FROM subscription_video WHERE video_id = :video_id",
+     None),
+    ('download_task by status, updated_at',
+     "SELECT * FROM download_task WHERE status = 'DOWNLOADING' AND updated_at < :updated_at",
+     None),
+    ('download_task by video_id',
+     "SELECT * FROM download_task WHERE video_id = :video_id",
+     None),
+    ('video_history by video_id',
+     "SELECT * FROM video_history WHERE video_id = :video_id",
+     None),
+    ('podcast_episodes by channel',
+     "SELECT * FROM podcast_episodes WHERE channel_id = :channel_id ORDER BY published_at DESC LIMIT 20",
+     None),
+]
+
+
+def _alembic_config():
+    alembic_ini_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'alembic.ini')
+    return AlembicConfig(alembic_ini_path)
+
+
+def _migrate_to(revision: str):
+    alembic_cfg = _alembic_config()
+    revisions = [script.revision for script in ScriptDirectory.from_config(alembic_cfg).walk_revisions()]
+    with engine.connect() as conn:
+        current = MigrationContext.configure(conn).get_current_revision()
+    # walk_revisions 从最新版本开始遍历，下标越小版本越新
+    if current in revisions and revisions.index(current) < revisions.index(revision):
+        command.downgrade(alembic_cfg, revision)
+    else:
+        command.upgrade(alembic_cfg, revision)
+
+
+def _insert_batches(conn, sql: str, rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            conn.execute(text(sql), batch)
+            batch = []
+    if batch:
+        conn.execute(text(sql), batch)
+
+
+def seed(rows: int):
+    now = datetime.now()
+    subscriptions = max(rows // 1000, 1)
+    creators = max(rows // 10, 1)
+    channels = max(rows // 2000, 1)
+
+    with engine.begin() as conn:
+        existing = conn.execute(text("SELECT COUNT(*) FROM video")).scalar()
+        if existing >= rows:
+            logger.info(f"Database already seeded with {existing} videos")
+            return
+        for table in ['video', 'subscription', 'subscription_video', 'creator', 'download_task', 'video_history',
+                      'podcast_episodes']:
+            conn.execute(text(f"TRUNCATE TABLE {table}"))
+
+        logger.info(f"Seeding {subscriptions} subscriptions")
+        _insert_batches(conn, """
+            INSERT INTO subscription (id, content_type, content_name, content_url, total_videos, is_enable,
+                is_auto_download, is_download_all, is_extract_all, is_deleted, created_at, updated_at)
+            VALUES (:id, 'CHANNEL', :name, :url, 0, 1, 0, 0, 0, 0, :now, :now)
+        """, ({'id': i, 'name': f'channel {i}', 'url': f'https://space.bilibili.com/{i}', 'now': now}
+              for i in range(1, subscriptions + 1)))
+
+        logger.info(f"Seeding {rows} videos")
+        _insert_batches(conn, """
+            INSERT INTO video (id, title, url, publish_date, is_deleted, created_at, updated_at)
+            VALUES (:id, :title, :url, :publish_date, 0, :now, :now)
+        """, ({'id': i, 'title': f'video {i}', 'url': f'https://www.bilibili.com/video/BV{i:010d}',
+               'publish_date': now - timedelta(minutes=i), 'now': now}
+              for i in range(1, rows + 1)))
+        _insert_batches(conn, """
+            INSERT INTO subscription_video (subscription_id, video_id, created_at)
+            VALUES (:subscription_id, :video_id, :now)
+        """, ({'subscription_id': i % subscriptions + 1, 'video_id': i, 'now': now} for i in range(1, rows + 1)))
+
+        logger.info(f"Seeding {creators} creators")
+        _insert_batches(conn, """
+            INSERT INTO creator (id, name, url, is_deleted, created_at, updated_at)
+            VALUES (:id, :name, :url, 0, :now, :now)
+        """, ({'id': i, 'name': f'creator {i}', 'url': f'https://space.bilibili.com/creator/{i}', 'now': now}
+              for i in range(1, creators + 1)))
+
+        logger.info("Seeding download tasks, history and podcast episodes")
+        statuses = ['COMPLETED'] * 8 + ['FAILED', 'DOWNLOADING']
+        _insert_batches(conn, """
+            INSERT INTO download_task (video_id, status, retry, created_at, updated_at)
+            VALUES (:video_id, :status, 0, :now, :updated_at)
+        """, ({'video_id': i, 'status': random.choice(statuses), 'now': now,
+               'updated_at': now - timedelta(minutes=random.randint(0, 60 * 24 * 30))}
+              for i in range(1, rows + 1, 5)))
+        _insert_batches(conn, """
+            INSERT INTO video_history (video_id, watch_duration, last_position, total_duration, created_at, updated_at)
+            VALUES (:video_id, 0, 0, 0, :now, :now)
+        """, ({'video_id': i, 'now': now} for i in range(1, rows + 1, 10)))
+        _insert_batches(conn, """
+            INSERT INTO podcast_episodes (channel_id, title, audio_url, published_at, is_read, last_position,
+                created_at, updated_at)
+            VALUES (:channel_id, :title, :audio_url, :published_at, 0, 0, :now, :now)
+        """, ({'channel_id': i % channels + 1, 'title': f'episode {i}', 'audio_url': f'https://example.com/{i}.mp3',
+               'published_at': now - timedelta(hours=i), 'now': now}
+              for i in range(1, rows // 5 + 1)))
+
+
+def _query_params(rows: int):
+    video_id = rows // 2
+    return {
+        'video_url': f'https://www.bilibili.com/video/BV{video_id:010d}',
+        'creator_url': f'https://space.bilibili.com/creator/{max(rows // 20, 1)}',
+        'content_url': f'https://space.bilibili.com/{max(rows // 2000, 1)}',
+        'video_id': video_id,
+        'updated_at': datetime.now() - timedelta(minutes=10),
+        'channel_id': 1,
+    }
+
+
+def measure(phase: str, rows: int):
+    params = _query_params(rows)
+    results = []
+    with engine.connect() as conn:
+        for table in ['video', 'subscription', 'subscription_video', 'creator', 'download_task', 'video_history',
+                      'podcast_episodes']:
+            conn.execute(text(f"ANALYZE TABLE {table}"))
+
+        for name, before_sql, after_sql in QUERIES:
+            sql = after_sql if phase == 'after' and after_sql else before_sql
+            plan = conn.execute(text(f"EXPLAIN {sql}"), params).mappings().first()
+            start = time.perf_counter()
+            for _ in range(REPEAT):
+                conn.execute(text(sql), params).all()
+            elapsed_ms = (time.perf_counter() - start) * 1000 / REPEAT
+            results.append((name, plan['type'], plan['key'], plan['rows'], elapsed_ms))
+    return results
+
+
+def report(before, after):
+    print(f"{'query':<38}{'phase':<8}{'type':<8}{'key':<46}{'rows':>10}{'avg ms':>10}")
+    for before_row, after_row in zip(before, after):
+        for phase, (name, access_type, key, rows, elapsed_ms) in (('before', before_row), ('after', after_row)):
+            print(f"{name:<38}{phase:<8}{str(access_type):<8}{str(key):<46}{str(rows):>10}{elapsed_ms:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000, help='number of videos to seed')
+    parser.add_argument('--force', action='store_true', help='run even if the database name does not end with _bench')
+    args = parser.parse_args()
+
+    if not settings.MYSQL_DATABASE.endswith('_bench') and not args.force:
+        parser.error(f"refusing to seed database '{settings.MYSQL_DATABASE}', use a *_bench database or --force")
+
+    _migrate_to(BEFORE_REVISION)
+    seed(args.rows)
+    before = measure('before', args.rows)
+
+    _migrate_to(AFTER_REVISION)
+    after = measure('after', args.rows)
+
+    report(before, after)
+
+
+if __name__ == '__main__':
+    main()
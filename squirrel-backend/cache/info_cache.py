@@ -0,0 +1,91 @@
+import base64
+import json
+import time
+import zlib
+from typing import Optional
+
+from common import constants
+from core.cache import RedisClient
+from core.config import settings
+from downloader import id_extractor
+from utils import url_helper
+
+client = RedisClient.get_instance().client
+
+# 元数据只保留业务用到的字段，播放、生成 nfo 等场景不需要再请求站点
+META_FIELDS = ('id', 'title', 'description', 'thumbnail', 'upload_date', 'timestamp', 'duration', 'tags',
+               'webpage_url', 'extractor', '_type')
+# 完整 info_dict 中体积大且下载用不到的字段
+DROP_FIELDS = ('automatic_captions', 'thumbnails', 'heatmap')
+FORMAT_EXPIRE_MARGIN = 10 * 60
+
+
+def build_info_key(url: str):
+    origin_video_id = id_extractor.extract_id_from_url(url)
+    domain = url_helper.extract_top_level_domain(url)
+    return f'{constants.REDIS_KEY_VIDEO_INFO_CACHE}:{domain}:{origin_video_id}'
+
+
+def _dumps(value) -> str:
+    return base64.b64encode(zlib.compress(json.dumps(value).encode())).decode()
+
+
+def _loads(value: str):
+    return json.loads(zlib.decompress(base64.b64decode(value)))
+
+
+def _formats_expire_at(video_info: dict) -> float:
+    expire_at = time.time() + settings.VIDEO_INFO_FORMAT_TTL
+    for video_format in video_info.get('formats') or []:
+        format_expire_at = url_helper.extract_expire_timestamp(video_format.get('url'))
+        if format_expire_at:
+            expire_at = min(expire_at, format_expire_at - FORMAT_EXPIRE_MARGIN)
+    return expire_at
+
+
+def set_video_info(url: str, video_info: dict):
+    """
+    缓存 json 化后的 info_dict（调用方需先经过 YoutubeDL.sanitize_info）
+    超过 VIDEO_INFO_CACHE_MAX_ENTRIES 时按最近访问时间淘汰
+    """
+    key = build_info_key(url)
+    full_info = {k: v for k, v in video_info.items() if k not in DROP_FIELDS}
+    now = time.time()
+    pipeline = client.pipeline(transaction=False)
+    pipeline.hset(key, mapping={
+        'meta': _dumps({k: video_info[k] for k in META_FIELDS if k in video_info}),
+        'full': _dumps(full_info),
+        'formats_expire_at': _formats_expire_at(full_info),
+    })
+    pipeline.expire(key, settings.VIDEO_INFO_CACHE_TTL)
+    pipeline.zadd(constants.REDIS_KEY_VIDEO_INFO_LRU, {key: now})
+    pipeline.zcard(constants.REDIS_KEY_VIDEO_INFO_LRU)
+    size = pipeline.execute()[-1]
+
+    overflow = size - settings.VIDEO_INFO_CACHE_MAX_ENTRIES
+    if overflow > 0:
+        evicted = [member for member, _ in client.zpopmin(constants.REDIS_KEY_VIDEO_INFO_LRU, overflow)]
+        if evicted:
+            client.delete(*evicted)
+
+
+def _get_field(url: str, field_name: str):
+    key = build_info_key(url)
+    pipeline = client.pipeline(transaction=False)
+    pipeline.hmget(key, field_name, 'formats_expire_at')
+    pipeline.zadd(constants.REDIS_KEY_VIDEO_INFO_LRU, {key: time.time()}, xx=True)
+    return pipeline.execute()[0]
+
+
+def get_video_meta(url: str) -> Optional[dict]:
+    """获取缓存的视频元数据，不访问网络"""
+    value, _ = _get_field(url, 'meta')
+    return _loads(value) if value else None
+
+
+def get_downloadable_video_info(url: str) -> Optional[dict]:
+    """获取格式地址仍然有效的完整 info_dict，过期时返回 None，由调用方重新解析"""
+    value, formats_expire_at = _get_field(url, 'full')
+    if not value or not formats_expire_at or float(formats_expire_at) <= time.time():
+        return None
+    return _loads(value)
@@ -0,0 +1,192 @@
+import asyncio
+import hashlib
+import logging
+import os
+from collections import OrderedDict
+from typing import AsyncIterator, Awaitable, Callable, Optional, Tuple
+from urllib.parse import quote, unquote
+
+import anyio
+import httpx
+
+from core.config import settings
+
+logger = logging.getLogger()
+
+CHUNK_SIZE = 128 * 1024
+DEFAULT_CONTENT_TYPE = 'application/octet-stream'
+
+Fetcher = Callable[[str], Awaitable[httpx.Response]]
+
+
+class _Fill:
+    """正在从上游写入缓存的分片，多个请求共享同一次上游请求，边写入边读取"""
+
+    def __init__(self, tmp_path: str):
+        self.tmp_path = tmp_path
+        self.content_type = DEFAULT_CONTENT_TYPE
+        self.size = 0
+        self.done = False
+        self.error: Optional[Exception] = None
+        self.ready = asyncio.Event()
+        self.changed = asyncio.Condition()
+
+
+class SegmentCache:
+    """
+    HLS 分片磁盘缓存，按 URL 的 sha256 存储，超过容量时按最近访问淘汰
+    文件名为 <sha256>~<content-type>，重启后扫描目录即可恢复索引
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._index: OrderedDict[str, Tuple[int, str]] = OrderedDict()
+        self._total_bytes = 0
+        self._fills: dict[str, _Fill] = {}
+        self._loaded = False
+        self._load_lock = asyncio.Lock()
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha256(url.encode()).hexdigest()
+
+    def _path(self, key: str, content_type: str) -> str:
+        return os.path.join(self.directory, key[:2], f'{key}~{quote(content_type, safe="")}')
+
+    async def _load(self):
+        """首次使用时恢复索引，缓存目录可能有上万个文件，在线程中扫描，不阻塞事件循环"""
+        if self._loaded:
+            return
+        async with self._load_lock:
+            if self._loaded:
+                return
+            entries = await asyncio.to_thread(self._scan)
+            for _, key, size, content_type in sorted(entries):
+                self._index[key] = (size, content_type)
+                self._total_bytes += size
+            self._loaded = True
+
+    def _scan(self) -> list:
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                if '~' not in name or name.startswith('.'):
+                    os.remove(path)  # 未完成的临时文件
+                    continue
+                key, content_type = name.split('~', 1)
+                stat_result = os.stat(path)
+                entries.append((stat_result.st_atime, key, stat_result.st_size, unquote(content_type)))
+        return entries
+
+    def _add(self, key: str, size: int, content_type: str):
+        self._index[key] = (size, content_type)
+        self._total_bytes += size
+        while self._total_bytes > self.max_bytes and len(self._index) > 1:
+            evict_key, (evict_size, evict_content_type) = self._index.popitem(last=False)
+            self._total_bytes -= evict_size
+            try:
+                os.remove(self._path(evict_key, evict_content_type))
+            except FileNotFoundError:
+                pass
+
+    async def open(self, url: str, fetch: Fetcher) -> Tuple[str, AsyncIterator[bytes]]:
+        """
+        返回 (content_type, 数据流)，命中缓存时直接读磁盘，
+        未命中时同一分片只发起一次上游请求，数据边写入缓存边返回给所有等待的请求
+        """
+        await self._load()
+        key = self._key(url)
+
+        entry = self._index.get(key)
+        if entry is not None:
+            size, content_type = entry
+            try:
+                fd = os.open(self._path(key, content_type), os.O_RDONLY)
+            except FileNotFoundError:
+                del self._index[key]
+                self._total_bytes -= size
+            else:
+                self._index.move_to_end(key)
+                return content_type, self._read_file(fd, size)
+
+        fill = self._fills.get(key)
+        if fill is None:
+            os.makedirs(os.path.join(self.directory, key[:2]), exist_ok=True)
+            fill = _Fill(os.path.join(self.directory, key[:2], f'.{key}.tmp'))
+            open(fill.tmp_path, 'wb').close()
+            self._fills[key] = fill
+            asyncio.create_task(self._run_fill(key, url, fill, fetch))
+        # 在 await 之前打开文件，写入完成后临时文件被 rename 也不影响读取
+        fd = os.open(fill.tmp_path, os.O_RDONLY)
+        try:
+            await fill.ready.wait()
+            if fill.error and fill.size == 0:
+                raise fill.error
+        except BaseException:
+            os.close(fd)
+            raise
+        return fill.content_type, self._tail(fd, fill)
+
+    async def _run_fill(self, key: str, url: str, fill: _Fill, fetch: Fetcher):
+        response = None
+        try:
+            response = await fetch(url)
+            response.raise_for_status()
+            fill.content_type = response.headers.get('content-type') or DEFAULT_CONTENT_TYPE
+            fill.ready.set()
+            with open(fill.tmp_path, 'wb') as f:
+                async for chunk in response.aiter_raw(CHUNK_SIZE):
+                    await anyio.to_thread.run_sync(f.write, chunk)
+                    async with fill.changed:
+                        fill.size += len(chunk)
+                        fill.changed.notify_all()
+        except Exception as e:
+            logger.warning(f'分片缓存写入失败: {url}, {e}')
+            fill.error = e
+        finally:
+            if response is not None:
+                await response.aclose()
+            fill.ready.set()
+            if fill.error is None:
+                os.replace(fill.tmp_path, self._path(key, fill.content_type))
+                self._add(key, fill.size, fill.content_type)
+            else:
+                os.remove(fill.tmp_path)
+            self._fills.pop(key, None)
+            async with fill.changed:
+                fill.done = True
+                fill.changed.notify_all()
+
+    async def _read_file(self, fd: int, size: int) -> AsyncIterator[bytes]:
+        try:
+            offset = 0
+            while offset < size:
+                data = await anyio.to_thread.run_sync(os.pread, fd, min(CHUNK_SIZE, size - offset), offset)
+                if not data:
+                    break
+                offset += len(data)
+                yield data
+        finally:
+            os.close(fd)
+
+    async def _tail(self, fd: int, fill: _Fill) -> AsyncIterator[bytes]:
+        try:
+            offset = 0
+            while True:
+                async with fill.changed:
+                    await fill.changed.wait_for(lambda: fill.size > offset or fill.done)
+                if fill.size > offset:
+                    data = await anyio.to_thread.run_sync(os.pread, fd, min(CHUNK_SIZE, fill.size - offset), offset)
+                    offset += len(data)
+                    yield data
+                    continue
+                if fill.error:
+                    raise fill.error
+                return
+        finally:
+            os.close(fd)
+
+
+segment_cache = SegmentCache(settings.SEGMENT_CACHE_PATH, settings.SEGMENT_CACHE_MAX_BYTES)
@@ -1,4 +1,5 @@
 import datetime
+from typing import List, Optional
 
 from common import constants
 from core.cache import RedisClient
@@ -19,11 +20,26 @@ def get_extract_cache(url: str):
     return client.hget(key, constants.VIDEO_EXTRACT_FIELD_NAME)
 
 
+def get_extract_cache_many(urls: List[str]) -> List[Optional[str]]:
+    pipeline = client.pipeline(transaction=False)
+    for url in urls:
+        pipeline.hget(build_video_key(url), constants.VIDEO_EXTRACT_FIELD_NAME)
+    return pipeline.execute()
+
+
 def set_extract_cache(url: str, field_name: str):
     key = build_video_key(url)
     client.hset(key, field_name, datetime.datetime.now().timestamp())
 
 
+def set_extract_cache_many(urls: List[str], field_name: str):
+    timestamp = datetime.datetime.now().timestamp()
+    pipeline = client.pipeline(transaction=False)
+    for url in urls:
+        pipeline.hset(build_video_key(url), field_name, timestamp)
+    pipeline.execute()
+
+
 def delete_extract_cache(url: str, field_name: str):
     key = build_video_key(url)
     client.hdel(key, field_name)
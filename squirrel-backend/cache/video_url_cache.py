@@ -0,0 +1,41 @@
+import json
+import time
+from typing import Optional
+
+from common import constants
+from core.cache import RedisClient
+from core.config import settings
+from utils import url_helper
+
+client = RedisClient.get_instance().client
+
+# 在 CDN 地址过期前提前失效，避免返回给前端后马上过期
+EXPIRE_MARGIN = 5 * 60
+
+
+def build_url_key(video_id: int, quality: str):
+    return f'{constants.REDIS_KEY_VIDEO_URL_CACHE}:{video_id}:{quality}'
+
+
+def build_lock_key(video_id: int, quality: str):
+    return f'{constants.REDIS_KEY_VIDEO_URL_LOCK}:{video_id}:{quality}'
+
+
+def get_ttl(video_urls: dict) -> int:
+    """有效期取所有地址中最早的过期时间，没有过期参数时使用默认值"""
+    expire_ats = [url_helper.extract_expire_timestamp(url) for url in video_urls.values() if url]
+    expire_ats = [expire_at for expire_at in expire_ats if expire_at]
+    if not expire_ats:
+        return settings.VIDEO_URL_CACHE_TTL
+    return int(min(expire_ats) - time.time() - EXPIRE_MARGIN)
+
+
+def get_video_urls(video_id: int, quality: str) -> Optional[dict]:
+    value = client.get(build_url_key(video_id, quality))
+    return json.loads(value) if value else None
+
+
+def set_video_urls(video_id: int, quality: str, video_urls: dict):
+    ttl = get_ttl(video_urls)
+    if ttl > 0:
+        client.set(build_url_key(video_id, quality), json.dumps(video_urls), ex=ttl)
@@ -11,12 +11,29 @@ REDIS_KEY_VIDEO_DOWNLOAD_PROGRESS = 'video:download:progress'
 REDIS_KEY_VIDEO_DOWNLOAD_STATUS = 'video:download:status'
 REDIS_KEY_VIDEO_DOWNLOAD_CACHE = 'video:download:cache'
 REDIS_KEY_VIDEO_EXTRACT_CACHE = 'video:extract:cache'
+REDIS_KEY_VIDEO_INFO_CACHE = 'video:info:cache'
+REDIS_KEY_VIDEO_INFO_LRU = 'video:info:lru'
+REDIS_KEY_VIDEO_URL_CACHE = 'video:url:cache'
+REDIS_KEY_VIDEO_URL_LOCK = 'video:url:lock'
+REDIS_KEY_DOWNLOAD_QUEUE = 'download:queue'
+REDIS_KEY_DOWNLOAD_QUEUE_ENTRIES = 'download:queue:entries'
+REDIS_KEY_DOWNLOAD_RUNNING = 'download:running'
+REDIS_KEY_DOWNLOAD_PREEMPTED = 'download:preempted'
+
+# Redis channels
+REDIS_CHANNEL_TASK_EVENTS = 'channel:task:events'
+REDIS_CHANNEL_TASK_STOP = 'channel:task:stop'
 
 VIDEO_EXTRACT_FIELD_NAME = 'is_extract'
 VIDEO_DOWNLOAD_FIELD_NAME = 'is_download'
 
 VIDEO_EXTRACT_EXPIRE = 10 * 60
 
+# 下载优先级：手动下载 > 订阅自动下载 > 全量补档
+DOWNLOAD_PRIORITY_MANUAL = 'manual'
+DOWNLOAD_PRIORITY_AUTO = 'auto'
+DOWNLOAD_PRIORITY_BACKFILL = 'backfill'
+
 SUPPORTED_SITES = {
     'bilibili.com': 'bilibili',
     'youtube.com': 'youtube',
@@ -46,6 +63,24 @@ def get_all_queues():
     return base_queues + site_queues
 
 
+# worker 分组，同一组的队列使用相同的线程数配置，可以放到单独的进程中运行
+WORKER_GROUP_DOWNLOAD = 'download'
+WORKER_GROUP_EXTRACT = 'extract'
+WORKER_GROUP_SUBSCRIBE = 'subscribe'
+WORKER_GROUP_PROGRESS = 'progress'
+
+
+def get_queue_groups():
+    groups = {
+        WORKER_GROUP_DOWNLOAD: [QUEUE_VIDEO_DOWNLOAD, QUEUE_VIDEO_DOWNLOAD_SCHEDULED],
+        WORKER_GROUP_SUBSCRIBE: [QUEUE_SUBSCRIBE],
+        WORKER_GROUP_PROGRESS: [QUEUE_VIDEO_PROGRESS],
+    }
+    grouped = {queue for queues in groups.values() for queue in queues}
+    groups[WORKER_GROUP_EXTRACT] = [queue for queue in get_all_queues() if queue not in grouped]
+    return groups
+
+
 DOMAIN_QUEUE_MAPPING = {
     domain: {
         'manual': f'video_extract_{site_name}_queue',
@@ -0,0 +1,93 @@
+import asyncio
+import importlib.util
+import logging
+import re
+from typing import AsyncIterator, Optional
+
+import httpx
+
+logger = logging.getLogger()
+
+CHUNK_SIZE = 128 * 1024
+MAX_RESUME_ATTEMPTS = 3
+RESUMABLE_ERRORS = (httpx.NetworkError, httpx.TimeoutException, httpx.RemoteProtocolError, httpx.StreamClosed)
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _http2_available() -> bool:
+    # Pipfile 中依赖 httpx[http2]，这里只是为了在缺少 h2 的环境中退回 HTTP/1.1 而不是启动失败
+    return importlib.util.find_spec('h2') is not None
+
+
+def get_client() -> httpx.AsyncClient:
+    """进程内共享的代理客户端，复用连接池，安装了 h2 时启用 HTTP/2"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=_http2_available(),
+            follow_redirects=True,
+            timeout=httpx.Timeout(60.0, connect=10.0),
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=60),
+        )
+    return _client
+
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def open_stream(url: str, headers: dict) -> httpx.Response:
+    """发起上游请求并返回未读取 body 的响应，调用方负责关闭"""
+    client = get_client()
+    # 不接受压缩编码，保证已发送的字节数与上游偏移一致，断点续传时才能计算 Range
+    headers = {**headers, 'Accept-Encoding': 'identity'}
+    request = client.build_request('GET', url, headers=headers)
+    return await client.send(request, stream=True)
+
+
+def _parse_single_range(range_header: Optional[str]):
+    if not range_header:
+        return 0, None
+    match = re.fullmatch(r'\s*bytes=(\d+)-(\d*)\s*', range_header)
+    if not match:
+        return None
+    return int(match.group(1)), int(match.group(2)) if match.group(2) else None
+
+
+async def relay(response: httpx.Response, url: str, headers: dict,
+                chunk_size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """
+    转发上游响应，连接中断时从已发送的字节处用 Range 请求继续，客户端不会收到重复或缺失的数据
+    """
+    byte_range = _parse_single_range(headers.get('Range'))
+    sent = 0
+    attempt = 0
+    try:
+        while True:
+            try:
+                async for chunk in response.aiter_raw(chunk_size):
+                    sent += len(chunk)
+                    yield chunk
+                return
+            except RESUMABLE_ERRORS as e:
+                attempt += 1
+                # 多区间请求无法续传
+                if byte_range is None or attempt > MAX_RESUME_ATTEMPTS:
+                    logger.error(f"代理请求失败: {url}, 已发送 {sent} 字节, {e}")
+                    raise
+                logger.warning(f"代理请求中断，从 {sent} 字节处续传（第 {attempt} 次）: {e}")
+                await response.aclose()
+                await asyncio.sleep(attempt * 0.5)
+
+                start, end = byte_range
+                resume_headers = {**headers, 'Range': f'bytes={start + sent}-{end if end is not None else ""}'}
+                response = await open_stream(url, resume_headers)
+                if response.status_code != 206:
+                    logger.error(f"上游不支持续传: {url}, status: {response.status_code}")
+                    raise
+    finally:
+        await response.aclose()
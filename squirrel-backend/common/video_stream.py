@@ -1,10 +1,13 @@
 import os
-import re
-import stat
-from email.utils import formatdate
+from functools import partial
+from email.utils import formatdate, parsedate_to_datetime
 from mimetypes import guess_type
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+import anyio
 from starlette.requests import Request
-from starlette.responses import StreamingResponse
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
 
 
 class VideoStreamHandler:
@@ -20,43 +23,194 @@ class VideoStreamHandler:
         return None
 
     @staticmethod
-    def create_stream_response(request: Request, video_path: str) -> StreamingResponse:
-        stat_result = os.stat(video_path)
-        content_type, _ = guess_type(video_path)
-        content_type = content_type or 'application/octet-stream'
-
-        # Parse range header
-        range_str = request.headers.get('range', '')
-        range_match = re.search(r'bytes=(\d+)-(\d+)', range_str, re.S) or re.search(r'bytes=(\d+)-', range_str, re.S)
-
-        if range_match:
-            start_bytes = int(range_match.group(1))
-            end_bytes = int(range_match.group(2)) if range_match.lastindex == 2 else stat_result.st_size - 1
+    def create_stream_response(request: Request, video_path: str) -> Response:
+        return RangeFileResponse(request, video_path)
+
+
+def parse_ranges(range_header: str, file_size: int) -> Optional[List[Tuple[int, int]]]:
+    """
+    解析 Range 请求头，返回合并后的闭区间列表
+    格式错误时返回 None（按完整文件响应），没有可满足的区间时返回空列表（416）
+    """
+    unit, _, ranges_str = range_header.partition('=')
+    if unit.strip().lower() != 'bytes':
+        return None
+
+    ranges = []
+    for part in ranges_str.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        start_str, sep, end_str = part.partition('-')
+        if not sep:
+            return None
+        try:
+            if start_str.strip() == '':
+                suffix_length = int(end_str)
+                if suffix_length <= 0:
+                    continue
+                start, end = max(file_size - suffix_length, 0), file_size - 1
+            else:
+                start = int(start_str)
+                end = int(end_str) if end_str.strip() else None
+                if start < 0 or (end is not None and end < start):
+                    return None
+                end = file_size - 1 if end is None else min(end, file_size - 1)
+        except ValueError:
+            return None
+        if start < file_size:
+            ranges.append((start, end))
+
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
         else:
-            start_bytes = 0
-            end_bytes = stat_result.st_size - 1
-
-        content_length = stat_result.st_size - start_bytes if stat.S_ISREG(stat_result.st_mode) else stat_result.st_size
-
-        return StreamingResponse(
-            VideoStreamHandler._file_iterator(video_path, start_bytes),
-            media_type=content_type,
-            headers={
-                'accept-ranges': 'bytes',
-                'connection': 'keep-alive',
-                'content-length': str(content_length),
-                'content-range': f'bytes {start_bytes}-{end_bytes}/{stat_result.st_size}',
-                'last-modified': formatdate(stat_result.st_mtime, usegmt=True),
-            },
-            status_code=206 if start_bytes > 0 else 200
-        )
+            merged.append((start, end))
+    return merged
+
+
+class RangeFileResponse(Response):
+    """
+    支持 Range（单区间/多区间）、If-Range、ETag 和 304 的文件响应
+    在线程中按请求区间 pread，只读取客户端需要的字节
+    （uvicorn 不支持 ASGI zerocopysend/pathsend 扩展，应用拿不到 socket，无法使用 sendfile）
+    """
+    chunk_size = 1024 * 1024
+
+    def __init__(self, request: Request, path: str, media_type: Optional[str] = None):
+        self.path = path
+        self.stat_result = os.stat(path)
+        self.media_type = media_type or guess_type(path)[0] or 'application/octet-stream'
+        self.background = None
+        self.body = b''
+        self.ranges: List[Tuple[int, int]] = []
+        self.boundary = None
+        self.send_body = request.method != 'HEAD'
+
+        file_size = self.stat_result.st_size
+        self.etag = f'"{self.stat_result.st_mtime_ns:x}-{file_size:x}"'
+        self.last_modified = formatdate(self.stat_result.st_mtime, usegmt=True)
+        headers = {
+            'accept-ranges': 'bytes',
+            'etag': self.etag,
+            'last-modified': self.last_modified,
+        }
+
+        if self._is_not_modified(request):
+            self.status_code = 304
+            self.send_body = False
+            self.init_headers(headers)
+            return
+
+        ranges = None
+        range_header = request.headers.get('range')
+        if range_header and self._if_range_matches(request):
+            ranges = parse_ranges(range_header, file_size)
+
+        if ranges is None:
+            self.status_code = 200
+            self.ranges = [(0, file_size - 1)] if file_size else []
+            headers['content-length'] = str(file_size)
+        elif not ranges:
+            self.status_code = 416
+            self.send_body = False
+            headers['content-range'] = f'bytes */{file_size}'
+            headers['content-length'] = '0'
+        elif len(ranges) == 1:
+            start, end = ranges[0]
+            self.status_code = 206
+            self.ranges = ranges
+            headers['content-range'] = f'bytes {start}-{end}/{file_size}'
+            headers['content-length'] = str(end - start + 1)
+        else:
+            self.status_code = 206
+            self.ranges = ranges
+            self.boundary = os.urandom(12).hex()
+            content_length = sum(len(self._part_header(start, end)) + end - start + 1 + 2 for start, end in ranges)
+            content_length += len(self._multipart_end())
+            headers['content-length'] = str(content_length)
+
+        self.init_headers(headers)
+        if self.boundary:
+            self.raw_headers = [(k, v) for k, v in self.raw_headers if k != b'content-type']
+            self.raw_headers.append((b'content-type', f'multipart/byteranges; boundary={self.boundary}'.encode()))
+
+    def _is_not_modified(self, request: Request) -> bool:
+        if request.method not in ('GET', 'HEAD'):
+            return False
+        if_none_match = request.headers.get('if-none-match')
+        if if_none_match:
+            tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+            return '*' in tags or self.etag in tags
+        if_modified_since = request.headers.get('if-modified-since')
+        if if_modified_since:
+            try:
+                return int(self.stat_result.st_mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _if_range_matches(self, request: Request) -> bool:
+        if_range = request.headers.get('if-range')
+        if not if_range:
+            return True
+        if_range = if_range.strip()
+        if if_range.startswith('"') or if_range.startswith('W/'):
+            return if_range == self.etag
+        return if_range == self.last_modified
+
+    def _part_header(self, start: int, end: int) -> bytes:
+        return (f'--{self.boundary}\r\n'
+                f'content-type: {self.media_type}\r\n'
+                f'content-range: bytes {start}-{end}/{self.stat_result.st_size}\r\n\r\n').encode()
+
+    def _multipart_end(self) -> bytes:
+        return f'--{self.boundary}--\r\n'.encode()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({'type': 'http.response.start', 'status': self.status_code, 'headers': self.raw_headers})
+        if not self.send_body or not self.ranges:
+            await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+            return
+
+        # 客户端拖动进度时会中断旧的 Range 请求，收到 http.disconnect 后立即停止读取文件
+        async with anyio.create_task_group() as task_group:
+
+            async def wrap(func: Callable[[], Awaitable[None]]) -> None:
+                await func()
+                task_group.cancel_scope.cancel()
+
+            task_group.start_soon(wrap, partial(self._send_body, send))
+            await wrap(partial(self._listen_for_disconnect, receive))
 
     @staticmethod
-    def _file_iterator(file_path: str, offset: int):
-        with open(file_path, 'rb') as f:
-            f.seek(offset, os.SEEK_SET)
-            while True:
-                data = f.read(VideoStreamHandler.CHUNK_SIZE)
-                if not data:
-                    break
-                yield data
+    async def _listen_for_disconnect(receive: Receive) -> None:
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                break
+
+    async def _send_body(self, send: Send):
+        file = await anyio.to_thread.run_sync(open, self.path, 'rb')
+        try:
+            for start, end in self.ranges:
+                if self.boundary:
+                    await send({'type': 'http.response.body', 'body': self._part_header(start, end), 'more_body': True})
+                await self._send_file_range(send, file, start, end - start + 1)
+                if self.boundary:
+                    await send({'type': 'http.response.body', 'body': b'\r\n', 'more_body': True})
+            if self.boundary:
+                await send({'type': 'http.response.body', 'body': self._multipart_end(), 'more_body': True})
+        finally:
+            file.close()
+        await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+
+    async def _send_file_range(self, send: Send, file, offset: int, count: int):
+        while count > 0:
+            data = await anyio.to_thread.run_sync(os.pread, file.fileno(), min(self.chunk_size, count), offset)
+            if not data:
+                break
+            offset += len(data)
+            count -= len(data)
+            await send({'type': 'http.response.body', 'body': data, 'more_body': True})
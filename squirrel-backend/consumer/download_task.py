@@ -9,7 +9,7 @@ from models.task.download_task import DownloadTask
 from models.message import Message
 from models.task.task_state import TaskState
 from services import video_service, subscription_video_service, task_service
-from services import subscription_service
+from services import subscription_service, download_scheduler
 
 logger = logging.getLogger()
 
@@ -24,18 +24,48 @@ def process_download_scheduled_message(message):
     _process_download_message(message, constants.QUEUE_VIDEO_DOWNLOAD_SCHEDULED)
 
 
+def submit(task_id: int, message: dict, priority: str = constants.DOWNLOAD_PRIORITY_MANUAL,
+           enqueued_at: float = None):
+    """提交下载任务，按优先级调度，手动下载在没有空闲线程时可以暂停低优先级的下载"""
+    download_scheduler.push(task_id, message, priority, enqueued_at)
+    if download_scheduler.get_queue(priority) == constants.QUEUE_VIDEO_DOWNLOAD:
+        process_download_message.send(download_scheduler.TOKEN)
+    else:
+        process_download_scheduled_message.send(download_scheduler.TOKEN)
+    download_scheduler.preempt(priority)
+
+
 def _process_download_message(message, queue: str):
+    entry = None
+    priority = constants.DOWNLOAD_PRIORITY_MANUAL
+    if download_scheduler.is_token(message):
+        entry = download_scheduler.pop()
+        if entry is None:
+            logger.info("下载队列中没有待处理的任务")
+            return
+        message, priority = entry['message'], entry['priority']
+
+    download_task = None
+    task_state = None
     try:
         logger.info(f"开始处理下载任务: {message}")
         message_obj = Message.from_dict(message)
         video, download_task, subscription = _prepare_download_task(message_obj)
+        download_scheduler.start(download_task.id, priority)
         downloader = DownloaderFactory.create_downloader(video.url)
-        task_state = downloader.download(subscription, video, download_task, queue)
+        task_state = downloader.download(subscription, video, download_task, queue, priority)
         task_service.update_task_status(download_task.id, task_state)
 
         logger.info(f"download video finished, video title: {video.title}, video url: {video.url}")
     except Exception as e:
         logger.error(f"处理下载任务时发生错误: {e}", exc_info=True)
+    finally:
+        preempted = download_task is not None and download_scheduler.finish(download_task.id)
+        # 只有确实被暂停的下载才重新排队，已进入合并/后处理阶段的下载会正常完成或失败，不能再次下载
+        if preempted and task_state == TaskState.PAUSED:
+            # 让位给高优先级任务的下载按原来的入队时间重新排队
+            logger.info(f"下载任务 {download_task.id} 让位给高优先级任务，重新排队")
+            submit(download_task.id, message, priority, entry['enqueued_at'] if entry else None)
 
 
 def _prepare_download_task(message):
@@ -90,7 +90,7 @@ def process_extract_task(message, queue: str):
         video = _handle_video_extraction(params, video_meta, video_info)
         task_cache.delete_extract_cache(params.url, constants.VIDEO_EXTRACT_FIELD_NAME)
         if not params.only_extract:
-            _handle_download_task(video)
+            _handle_download_task(video, params.priority)
     except Exception as e:
         logger.error(f"处理消息时发生错误: message: {message}, {e}", exc_info=True)
     finally:
@@ -108,25 +108,19 @@ def _get_video_info(url, queue_name: str):
 
 
 def _create_video(params: VideoExtractDto, video_meta, video_info):
-    with get_session():
-        video = video_service.get_video_by_url(video_meta.url)
+    # 演员信息需要请求站点，放在事务外获取，避免长时间占用数据库连接
+    actors = video_meta.actors or []
+    with get_session() as session:
+        video = video_service.get_video_by_url(video_meta.url, session)
         if not video:
             video_info['publish_date'] = datetime.fromtimestamp(video_info['timestamp'])
             video = video_service.create_video(video_meta.url, video_info['title'], video_info['publish_date'],
-                                               video_info['thumbnail'], video_info['duration'])
-        subscription_video = subscription_video_service.get_subscription_video(params.subscription_id, video.id)
-        if not subscription_video:
-            subscription_video_service.create_subscription_video(params.subscription_id, video.id)
+                                               video_info['thumbnail'], video_info['duration'], session)
+        subscription_video_service.create_subscription_video(params.subscription_id, video.id, session)
 
-        actors = video_meta.actors
         if len(actors) > 0:
-            for actor_meta in actors:
-                creator = creator_service.get_creator_by_url(actor_meta.url)
-                if not creator:
-                    creator = creator_service.create_creator(actor_meta.url, actor_meta.name, actor_meta.avatar)
-                video_creator = video_creator_service.get_video_creator(video.id, creator.id)
-                if not video_creator:
-                    video_creator_service.create_video_creator(video.id, creator.id)
+            creators = creator_service.get_or_create_creators(actors, session)
+            video_creator_service.create_video_creators(video.id, [creator.id for creator in creators], session)
 
         return video
 
@@ -138,10 +132,10 @@ def _handle_video_extraction(params, video_meta, video_info):
     return video
 
 
-def _handle_download_task(video):
+def _handle_download_task(video, priority: str):
     task = task_service.create_task(video.id, video.url)
     message = message_service.create_message(task.to_dict())
-    download_task.process_download_message.send(message.to_dict())
+    download_task.submit(task.id, message.to_dict(), priority)
 
 
 def _check_subscription_enable(subscription_id: int):
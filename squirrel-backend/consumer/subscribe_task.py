@@ -6,8 +6,10 @@ from sqlalchemy import select
 
 from common import constants
 from core.database import get_session
+from models import url_hash
 from models.message import Message
 from models.subscription import Subscription, ContentType
+from services import video_counter_service
 from subscribe.factory import SubscriptionFactory
 
 logger = logging.getLogger()
@@ -21,10 +23,11 @@ def process_subscribe_message(message):
         url = json.loads(message_obj.body)['url']
         subscribe_channel = SubscriptionFactory.create_subscription(url)
         channel_info = subscribe_channel.get_subscribe_info()
-        videos = subscribe_channel.get_subscribe_videos(extract_all=True)
+        total_videos = subscribe_channel.get_total_videos()
 
         with get_session() as session:
             subscription = session.scalars(select(Subscription).where(
+                Subscription.content_url_hash == url_hash(channel_info.url),
                 Subscription.content_url == channel_info.url,
                 Subscription.content_name == channel_info.name
             )).first()
@@ -32,11 +35,12 @@ def process_subscribe_message(message):
                 logger.info(f"Already subscribed to this channel: {subscription.name}")
                 return
             if subscription and subscription.is_deleted:
-                subscription.total_videos = len(videos)
+                subscription.total_videos = total_videos
                 subscription.is_deleted = False
+                video_counter_service.on_subscription_restored(session, subscription.id)
             else:
                 subscription = _create_subscription(channel_info)
-                subscription.total_videos = len(videos)
+                subscription.total_videos = total_videos
                 session.add(subscription)
             session.commit()
             logger.info(f"Successfully subscribed: {subscription.content_name}")
@@ -1,9 +1,14 @@
+import logging
+
 import redis
+import redis.asyncio
 from redis import ConnectionPool
-from redis.exceptions import LockError
+from redis.exceptions import LockNotOwnedError
 
 from core.config import settings
 
+logger = logging.getLogger()
+
 
 class RedisClient:
     _instance = None
@@ -31,22 +36,48 @@ class RedisClient:
         return self.client
 
 
+class AsyncRedisClient:
+    """asyncio 版本的 Redis 客户端，用于在事件循环中订阅频道"""
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self):
+        self.client = redis.asyncio.Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            db=settings.REDIS_DB,
+            password=settings.REDIS_PASSWORD,
+            decode_responses=True
+        )
+
+    def get_client(self):
+        return self.client
+
+
 class DistributedLock:
     def __init__(self, lock_key):
         self.redis_client = RedisClient.get_instance().client
         self.lock_key = lock_key
         self.lock = None
 
-    def acquire(self, timeout=10):
-        """尝试获取锁，超时则放弃"""
-        self.lock = self.redis_client.lock(self.lock_key, timeout=timeout)
-        try:
-            self.lock.acquire(blocking=True, blocking_timeout=timeout)
-            return True
-        except LockError:
-            return False
+    def acquire(self, timeout=10, ttl=None):
+        """
+        尝试获取锁，等待 timeout 秒后放弃，返回是否获取成功
+        ttl 为锁的自动过期时间，默认与 timeout 相同，持锁的操作可能超过 timeout 时需要设置得更长
+        """
+        self.lock = self.redis_client.lock(self.lock_key, timeout=ttl or timeout)
+        return self.lock.acquire(blocking=True, blocking_timeout=timeout)
 
     def release(self):
-        """释放锁"""
-        if self.lock is not None and self.lock.locked():
+        """释放锁，锁已过期时忽略"""
+        if self.lock is None or not self.lock.owned():
+            return
+        try:
             self.lock.release()
+        except LockNotOwnedError:
+            logger.warning(f'锁已过期，无需释放: {self.lock_key}')
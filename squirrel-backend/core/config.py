@@ -1,6 +1,10 @@
 import os
+import shutil
+import tempfile
+import threading
 from functools import lru_cache
 from pathlib import Path
+from typing import Callable
 
 from dotenv import load_dotenv
 from pydantic_settings import BaseSettings
@@ -30,10 +34,47 @@ class Settings(BaseSettings):
     POOL_MAX_SIZE: int = 60
     POOL_RECYCLE: int = 300
     CHANNEL_UPDATE_DEFAULT_SIZE: int = 10
+    # 增量抓取最多翻几页，水位线视频被删除且平台没有发布时间时不会翻完整个频道
+    CHANNEL_CRAWL_MAX_PAGES: int = 20
     DOWNLOAD_RETRY_THRESHOLD: int = 5
+    # 每个队列的 worker 线程数，下载组两个队列各自使用 DOWNLOAD_CONSUMERS 个线程
     DOWNLOAD_CONSUMERS: int = 1
     EXTRACT_CONSUMERS: int = 2
     SUBSCRIBE_CONSUMERS: int = 1
+    # 在单独进程中运行的 worker 分组（download/extract/subscribe/progress），
+    # 解析等 CPU 密集的工作不再和 API 争抢同一个 GIL
+    WORKER_PROCESSES: list[str] = []
+    # yt-dlp info_dict 缓存
+    VIDEO_INFO_CACHE_TTL: int = 7 * 24 * 3600
+    VIDEO_INFO_CACHE_MAX_ENTRIES: int = 5000
+    VIDEO_INFO_FORMAT_TTL: int = 30 * 60
+    # HLS 代理分片磁盘缓存
+    SEGMENT_CACHE_PATH: str = str(Path(os.path.join(base_dir, '..', 'cache', 'segments')))
+    SEGMENT_CACHE_MAX_BYTES: int = 2 * 1024 * 1024 * 1024
+    # 播放地址缓存，地址中没有过期参数时使用默认有效期
+    VIDEO_URL_CACHE_TTL: int = 10 * 60
+    VIDEO_URL_PRERESOLVE: bool = False
+    # 每个下载任务每秒最多写入几次进度
+    DOWNLOAD_PROGRESS_RATE: float = 4.0
+    # 单个下载任务的连接数，0 使用各平台的默认值，1 关闭并行下载
+    DOWNLOAD_CONNECTIONS: int = 0
+    # 进程内所有下载任务的连接数上限
+    DOWNLOAD_MAX_CONNECTIONS: int = 16
+    # 整文件格式使用的外部多连接下载器（aria2c/axel），为空时使用 yt-dlp 内置下载器
+    # 外部下载器不回调下载进度，下载过程中无法显示进度和暂停
+    DOWNLOAD_EXTERNAL_DOWNLOADER: str = ''
+    # 带宽上限（字节/秒），0 表示不限，全部不配置时不做任何限速
+    BANDWIDTH_LIMIT: int = 0
+    # 各平台的上限，如 {"bilibili": 5242880}
+    BANDWIDTH_PLATFORM_LIMITS: dict[str, int] = {}
+    # 按时段覆盖全局上限，如 {"08:00-23:00": 2097152, "23:00-08:00": 0}
+    BANDWIDTH_SCHEDULE: dict[str, int] = {}
+    # 同时传输时按权重分配：代理播放 > 手动下载 > 自动下载 > 补档
+    BANDWIDTH_PRIORITY_WEIGHTS: dict[str, int] = {'playback': 8, 'manual': 4, 'auto': 2, 'backfill': 1}
+    # 下载调度：低优先级任务每等待这么多秒相当于提升一级
+    DOWNLOAD_PRIORITY_AGING: int = 3600
+    # 没有空闲下载线程时，是否暂停低优先级的下载让位给高优先级任务
+    DOWNLOAD_PREEMPT: bool = False
 
     class Config:
         env_file = f".env.{os.getenv('ENV')}" if os.getenv("ENV") else ".env"
@@ -52,15 +93,52 @@ def get_cookies_file_path():
     return os.path.normpath(cookie_path)
 
 
+class QueueCookieFiles:
+    """
+    每个队列使用独立的 cookies 副本，yt-dlp 退出时会回写 cookiefile，避免多个队列同时写同一个文件
+    副本只在源文件变化（inode/mtime/size）时重新生成，先写临时文件再 rename，读取方不会读到写了一半的文件
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._source_versions: dict[str, tuple] = {}
+
+    def get_path(self, queue_thread_name: str) -> str:
+        source_path = get_cookies_file_path()
+        queue_thread_name = queue_thread_name.replace(':', '-')
+        cookie_path = os.path.normpath(os.path.join(base_dir, '..', 'config', f'cookies-{queue_thread_name}.txt'))
+        stat = os.stat(source_path)
+        version = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if self._source_versions.get(cookie_path) == version and os.path.exists(cookie_path):
+                return cookie_path
+            with open(source_path, 'rb') as rf:
+                write_file_atomic(cookie_path, lambda wf: shutil.copyfileobj(rf, wf), 'wb')
+            self._source_versions[cookie_path] = version
+        return cookie_path
+
+
+def write_file_atomic(file_path: str, write: Callable, mode: str = 'w'):
+    """写入同目录下的临时文件后 rename 覆盖目标文件"""
+    directory = os.path.dirname(file_path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f'.{os.path.basename(file_path)}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, mode) as f:
+            write(f)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+queue_cookie_files = QueueCookieFiles()
+
+
 def get_cookies_file_path_thread(queue_thread_name: str):
     if not queue_thread_name:
         return get_cookies_file_path()
-    queue_thread_name = queue_thread_name.replace(':', '-')
-    cookie_path = Path(os.path.join(base_dir, '..', 'config', f'cookies-{queue_thread_name}.txt'))
-    with open(cookie_path, 'w') as wf:
-        with open(get_cookies_file_path(), 'r') as rf:
-            wf.write(rf.read())
-    return os.path.normpath(cookie_path)
+    return queue_cookie_files.get_path(queue_thread_name)
 
 
 def get_cookies_http_file_path():
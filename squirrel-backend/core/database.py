@@ -1,6 +1,6 @@
 import logging
 from contextlib import contextmanager
-from typing import Generator
+from typing import Generator, Optional
 
 from sqlalchemy import create_engine
 from sqlalchemy.orm import Session
@@ -42,6 +42,19 @@ def get_session() -> Generator[Session, None, None]:
         session.close()
 
 
+@contextmanager
+def session_scope(session: Optional[Session] = None) -> Generator[Session, None, None]:
+    """
+    Reuse the caller's session when given, so several service calls share one transaction.
+    Otherwise behave like get_session and own the transaction.
+    """
+    if session is not None:
+        yield session
+    else:
+        with get_session() as new_session:
+            yield new_session
+
+
 # FastAPI dependency
 def get_db() -> Generator[Session, None, None]:
     """FastAPI dependency for database sessions"""
@@ -0,0 +1,61 @@
+import shutil
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Optional
+
+from core.config import settings
+
+# 外部下载器的分段参数，参数追加在 yt-dlp 默认参数之后，会覆盖默认的连接数
+EXTERNAL_DOWNLOADER_ARGS = {
+    'aria2c': lambda connections: ['-x', str(connections), '-s', str(connections), '-j', str(connections)],
+    'axel': lambda connections: ['-n', str(connections)],
+}
+
+
+class ConnectionBudget:
+    """
+    进程内所有下载任务共享的连接数上限
+    每个下载至少分到一个连接（与不开并行时相同），额外的连接在上限内按先到先得分配
+    """
+
+    def __init__(self, max_connections: int):
+        self.max_connections = max_connections
+        self._in_use = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def reserve(self, requested: int):
+        with self._lock:
+            granted = max(1, min(requested, self.max_connections - self._in_use))
+            self._in_use += granted
+        try:
+            yield granted
+        finally:
+            with self._lock:
+                self._in_use -= granted
+
+    @property
+    def in_use(self) -> int:
+        return self._in_use
+
+
+@lru_cache
+def _find_executable(name: str) -> Optional[str]:
+    return shutil.which(name)
+
+
+def get_parallel_options(connections: int) -> dict:
+    """
+    根据分到的连接数生成 yt-dlp 参数：HLS/DASH 分片并发下载，
+    配置了外部下载器时，整文件格式（http/https）交给外部下载器多连接分段下载
+    """
+    options = {'concurrent_fragment_downloads': connections}
+    downloader = settings.DOWNLOAD_EXTERNAL_DOWNLOADER
+    if connections > 1 and downloader and downloader in EXTERNAL_DOWNLOADER_ARGS and _find_executable(downloader):
+        options['external_downloader'] = {'http': downloader}
+        options['external_downloader_args'] = {downloader: EXTERNAL_DOWNLOADER_ARGS[downloader](connections)}
+    return options
+
+
+connection_budget = ConnectionBudget(settings.DOWNLOAD_MAX_CONNECTIONS)
@@ -1,20 +1,29 @@
 import logging
 import os
+import time
+from typing import Optional
 
 import requests
-from yt_dlp import YoutubeDL
+from redis.exceptions import RedisError
+from yt_dlp.utils import DownloadError
 
 from common import constants
+from cache import info_cache
 from common.video_stream import VideoStreamHandler
 from core import download_config, config
 from core.cache import RedisClient
 from core.database import get_session
+from downloader.connections import connection_budget, get_parallel_options
+from downloader.stop_listener import stop_listener
+from downloader.ydl_pool import ydl_pool, PROFILE_INFO, PROFILE_DOWNLOAD
 from meta.factory import VideoFactory
 from models.subscription import Subscription
 from models.task.download_task import DownloadTask
 from models.task.task_state import TaskState
 from models.video import Video
 from nfo.nfo import NfoGenerator
+from services import media_file_service, task_event_service
+from utils.bandwidth import BandwidthLease, bandwidth_manager, get_platform
 
 logger = logging.getLogger()
 
@@ -25,20 +34,21 @@ class DownloadStoppedError(Exception):
 
 
 class Downloader:
+    # 单个下载任务默认使用的连接数，子类按平台 CDN 的限制调整
+    connections = 4
+
+    def get_connections(self) -> int:
+        return config.settings.DOWNLOAD_CONNECTIONS or self.connections
 
     def get_video_info(self, url, queue_name: str = None):
         cookie_file_path = config.get_cookies_file_path_thread(queue_name)
-        ydl_opts = {
-            'quiet': True,
-            'no_warnings': True,
-            'ignoreerrors': False,
-            'skip_download': True,
-        }
-        if cookie_file_path:
-            ydl_opts['cookiefile'] = cookie_file_path
-
-        with YoutubeDL(ydl_opts) as ydl:
+        with ydl_pool.borrow(PROFILE_INFO, cookie_file_path) as ydl:
             video_info = ydl.extract_info(url, download=False)
+            if video_info and video_info.get('_type', 'video') == 'video':
+                try:
+                    info_cache.set_video_info(url, ydl.sanitize_info(video_info))
+                except Exception:
+                    logger.warning(f'缓存视频信息失败: {url}', exc_info=True)
             return video_info
 
     def download_avatar(self, subscription_name: str, subscription_avatar: str):
@@ -49,28 +59,33 @@ class Downloader:
         with open(download_fullpath, 'wb') as file:
             file.write(response.content)
 
-    def download(self, subscription: Subscription, video: Video, task: DownloadTask, queue_thread_name: str) -> TaskState:
-        video_info = self.get_video_info(video.url, queue_thread_name)
+    def download(self, subscription: Subscription, video: Video, task: DownloadTask, queue_thread_name: str,
+                 priority: str = constants.DOWNLOAD_PRIORITY_MANUAL) -> TaskState:
+        # 解析阶段缓存的格式地址仍然有效时直接下载，不再重复解析
+        video_info = info_cache.get_downloadable_video_info(video.url)
+        if video_info is None:
+            video_info = self.get_video_info(video.url, queue_thread_name)
         video_meta = VideoFactory.create_video(video.url, video_info)
 
-        hook = create_progress_hook(task.id)
+        lease = bandwidth_manager.open(priority, get_platform(video.url))
+        hook = create_progress_hook(task.id, lease)
         output_dir = download_config.get_download_full_path(subscription.content_name, video_meta.season)
         filename = download_config.get_valid_filename(video.title)
         ydl_opts = {
             'writethumbnail': f'{output_dir}/{filename}.jpg',
             'outtmpl': f'{output_dir}/{filename}.%(ext)s',
             'progress_hooks': [hook],
-            'writesubtitles': True,
-            'subtitleslangs': ['zh-Hans', 'zh-Hant', 'en']
+            'ratelimit': lease.limit,
         }
 
         cookie_file_path = config.get_cookies_file_path_thread(queue_thread_name)
-        if cookie_file_path:
-            ydl_opts['cookiefile'] = cookie_file_path
 
         try:
-            with YoutubeDL(ydl_opts) as ydl:
-                ydl.download([video.url])
+            with connection_budget.reserve(self.get_connections()) as connections, \
+                    ydl_pool.borrow(PROFILE_DOWNLOAD, cookie_file_path, **ydl_opts,
+                                    **get_parallel_options(connections)) as ydl:
+                lease.bind(ydl.params)
+                self._download_with_info(ydl, video.url, video_info)
                 self.download_avatar(subscription.content_name, subscription.avatar_url)
                 NfoGenerator.generate_nfo(subscription.content_name, video_meta.title, video_meta.description,
                                           video_meta.thumbnail, video_meta.season)
@@ -88,6 +103,8 @@ class Downloader:
                         })
                         session.commit()
 
+                    media_file_service.save_media_file(video.id, filepath, _get_codecs(video_info))
+
             return TaskState.COMPLETED
         except DownloadStoppedError:
             logging.info(f"下载视频被停止: {video.url}")
@@ -95,19 +112,74 @@ class Downloader:
         except Exception:
             logging.error(f"下载视频失败: {video.url}", exc_info=True)
             return TaskState.FAILED
+        finally:
+            stop_listener.unwatch(task.id)
+            lease.release()
+
+    @staticmethod
+    def _download_with_info(ydl, url: str, video_info: dict):
+        # 子类自行抓取的信息（如 javdb）不是 yt-dlp 的 info_dict，只能按地址重新解析下载
+        if not _is_ie_result(video_info):
+            ydl.download([url])
+            return
+        try:
+            ydl.process_ie_result(ydl.sanitize_info(video_info), download=True)
+        except DownloadError as e:
+            if e.exc_info and isinstance(e.exc_info[1], DownloadStoppedError):
+                raise e.exc_info[1]
+            # 格式地址可能已经失效，重新解析后下载
+            logger.warning(f'使用已解析的视频信息下载失败，重新解析: {url}, {e}')
+            ydl.download([url])
+
+
+def _is_ie_result(video_info: Optional[dict]) -> bool:
+    return bool(video_info) and all(video_info.get(key) for key in ('id', 'extractor', 'formats'))
+
+
+def _get_codecs(video_info: dict):
+    codecs = [video_info.get(key) for key in ('vcodec', 'acodec')]
+    codecs = [codec for codec in codecs if codec and codec != 'none']
+    return ','.join(codecs) or None
+
+
+def create_progress_hook(task_id: int, lease: Optional[BandwidthLease] = None):
+    """
+    进度回调每秒可能触发上百次，这里按 DOWNLOAD_PROGRESS_RATE 合并更新，
+    每次写入用一个 pipeline 完成 HSET 和事件发布，停止请求从本地缓存判断
+    """
+    progress_key = f'{constants.REDIS_KEY_VIDEO_DOWNLOAD_PROGRESS}:{task_id}'
+    rate = config.settings.DOWNLOAD_PROGRESS_RATE
+    interval = 1 / rate if rate > 0 else 0
+    state = {'flushed_at': 0.0, 'pending': None}
+    stop_listener.watch(task_id)
+
+    def flush(progress: dict):
+        state['flushed_at'] = time.monotonic()
+        state['pending'] = None
+        try:
+            pipeline = RedisClient.get_instance().client.pipeline(transaction=False)
+            pipeline.hset(progress_key, mapping=progress)
+            task_event_service.publish_progress(task_id, progress, pipeline)
+            pipeline.execute()
+        except RedisError as e:
+            logger.warning(f'更新下载进度失败: {task_id}, {e}')
 
-
-def create_progress_hook(task_id: int):
     def on_progress_hook(video_info):
         """
         回调函数，用于处理下载进度信息并更新到Redis。
         """
         if video_info['status'] == 'downloading':
-            downloaded_bytes = video_info.get('downloaded_bytes', 0)
-            total_bytes = video_info.get('total_bytes', 0)
-            speed = video_info.get('_speed_str', '')
-            eta = video_info.get('_eta_str', '')
-            percent = video_info.get('_percent_str', '')
+            if 'id' not in video_info['info_dict']:
+                return
+            if stop_listener.is_stopped(task_id):
+                stop_listener.consume(task_id)
+                raise DownloadStoppedError('Download stopped')
+
+            downloaded_bytes = video_info.get('downloaded_bytes') or 0
+            total_bytes = video_info.get('total_bytes') or 0
+            speed = video_info.get('_speed_str') or ''
+            eta = video_info.get('_eta_str') or ''
+            percent = video_info.get('_percent_str') or ''
 
             # 区分视频和音频下载
             file_type = 'video' if video_info.get('info_dict', {}).get('vcodec') != 'none' else 'audio'
@@ -115,20 +187,23 @@ def create_progress_hook(task_id: int):
             # 处理可能的None值，避免错误
             eta = eta if eta != '00:00' else 'unknown'
 
-            if 'id' in video_info['info_dict']:
-                client = RedisClient.get_instance().client
-                status = client.get(f'{constants.REDIS_KEY_VIDEO_DOWNLOAD_STATUS}:{task_id}')
-                if status == 'stop':
-                    client.delete(f'{constants.REDIS_KEY_VIDEO_DOWNLOAD_STATUS}:{task_id}')
-                    raise DownloadStoppedError('Download stopped')
-
-                # 更新Redis，只存储当前下载类型的信息
-                client.hset(f'{constants.REDIS_KEY_VIDEO_DOWNLOAD_PROGRESS}:{task_id}', 'current_type', file_type)
-                client.hset(f'{constants.REDIS_KEY_VIDEO_DOWNLOAD_PROGRESS}:{task_id}', 'downloaded_size',
-                            downloaded_bytes)
-                client.hset(f'{constants.REDIS_KEY_VIDEO_DOWNLOAD_PROGRESS}:{task_id}', 'total_size', total_bytes)
-                client.hset(f'{constants.REDIS_KEY_VIDEO_DOWNLOAD_PROGRESS}:{task_id}', 'speed', speed)
-                client.hset(f'{constants.REDIS_KEY_VIDEO_DOWNLOAD_PROGRESS}:{task_id}', 'eta', eta)
-                client.hset(f'{constants.REDIS_KEY_VIDEO_DOWNLOAD_PROGRESS}:{task_id}', 'percent', percent)
+            # 只存储当前下载类型的信息
+            progress = {
+                'current_type': file_type,
+                'downloaded_size': downloaded_bytes,
+                'total_size': total_bytes,
+                'speed': speed,
+                'eta': eta,
+                'percent': percent,
+            }
+            if time.monotonic() - state['flushed_at'] >= interval:
+                flush(progress)
+            else:
+                state['pending'] = progress
+            if lease is not None:
+                lease.pace(downloaded_bytes)
+        elif video_info['status'] == 'finished' and state['pending']:
+            # 被合并掉的最后一次进度在文件下载完成时补写
+            flush(state['pending'])
 
     return on_progress_hook
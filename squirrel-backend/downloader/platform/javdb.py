@@ -2,6 +2,7 @@ import datetime
 import logging
 
 from bs4 import BeautifulSoup
+from common import constants
 from common.http_wrapper import session as http_session
 
 from downloader.platform.base import Downloader
@@ -13,6 +14,8 @@ logger = logging.getLogger()
 
 
 class JavdbDownloader(Downloader):
+    # 视频为 m3u8 分片
+    connections = 8
 
     def get_video_info(self, url: str, queue_name: str):
         headers = {
@@ -41,7 +44,8 @@ class JavdbDownloader(Downloader):
             '%Y-%m-%d').timestamp())
         return video_info
 
-    def download(self, subscription: Subscription, video: Video, task: DownloadTask, queue_thread_name: str):
+    def download(self, subscription: Subscription, video: Video, task: DownloadTask, queue_thread_name: str,
+                 priority: str = constants.DOWNLOAD_PRIORITY_MANUAL):
         # First get video info using our custom method
         video_info = self.get_video_info(video.url, queue_thread_name)
         if not video_info:
@@ -49,4 +53,4 @@ class JavdbDownloader(Downloader):
             return 1
 
         # Then use the base class download implementation
-        return super().download(subscription, video, task, queue_thread_name)
+        return super().download(subscription, video, task, queue_thread_name, priority)
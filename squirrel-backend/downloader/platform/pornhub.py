@@ -2,4 +2,5 @@ from downloader.platform.base import Downloader
 
 
 class PornhubDownloader(Downloader):
-    pass  # Using default implementation from base class
+    # HLS 分片较小，并发数高一些
+    connections = 8
@@ -0,0 +1,81 @@
+import logging
+import threading
+import time
+from typing import Optional, Set
+
+from common import constants
+from core.cache import RedisClient
+
+logger = logging.getLogger()
+
+
+class StopListener:
+    """
+    订阅停止下载的频道，把收到的任务 id 缓存在进程内，
+    进度回调只需要查本地集合，不再每次回调都读取 Redis 的停止标记
+    """
+
+    def __init__(self):
+        self._watched: Set[int] = set()
+        self._stopped: Set[int] = set()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, task_id: int):
+        """开始关注一个下载任务，先读取一次停止标记，覆盖下载开始前发出的停止请求"""
+        with self._lock:
+            self._watched.add(task_id)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='download-stop-listener', daemon=True)
+                self._thread.start()
+        self._sync([task_id])
+
+    def unwatch(self, task_id: int):
+        with self._lock:
+            self._watched.discard(task_id)
+            self._stopped.discard(task_id)
+
+    def is_stopped(self, task_id: int) -> bool:
+        return task_id in self._stopped
+
+    def consume(self, task_id: int):
+        """停止请求已处理，清除标记，之后重新开始的下载不受影响"""
+        with self._lock:
+            self._stopped.discard(task_id)
+        RedisClient.get_instance().client.delete(f'{constants.REDIS_KEY_VIDEO_DOWNLOAD_STATUS}:{task_id}')
+
+    def _sync(self, task_ids):
+        if not task_ids:
+            return
+        client = RedisClient.get_instance().client
+        statuses = client.mget([f'{constants.REDIS_KEY_VIDEO_DOWNLOAD_STATUS}:{task_id}' for task_id in task_ids])
+        with self._lock:
+            for task_id, status in zip(task_ids, statuses):
+                if status == 'stop' and task_id in self._watched:
+                    self._stopped.add(task_id)
+
+    def _on_stop(self, task_id: int):
+        with self._lock:
+            if task_id in self._watched:
+                self._stopped.add(task_id)
+
+    def _run(self):
+        while True:
+            pubsub = RedisClient.get_instance().client.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(constants.REDIS_CHANNEL_TASK_STOP)
+                # 订阅建立前或断线期间发出的停止请求只能从停止标记中读取
+                with self._lock:
+                    watched = list(self._watched)
+                self._sync(watched)
+                for message in pubsub.listen():
+                    if message['type'] == 'message':
+                        self._on_stop(int(message['data']))
+            except Exception as e:
+                logger.warning(f'停止下载订阅中断，1 秒后重连: {e}')
+                time.sleep(1)
+            finally:
+                pubsub.close()
+
+
+stop_listener = StopListener()
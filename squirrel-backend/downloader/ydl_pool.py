@@ -0,0 +1,198 @@
+import copy
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from typing import Optional
+
+from yt_dlp import YoutubeDL
+
+logger = logging.getLogger()
+
+PROFILE_INFO = 'info'
+PROFILE_DOWNLOAD = 'download'
+
+PROFILE_OPTIONS = {
+    PROFILE_INFO: {
+        'quiet': True,
+        'no_warnings': True,
+        'ignoreerrors': False,
+        'skip_download': True,
+        # 多P视频等 playlist 结果会被直接跳过，不需要解析每个分P
+        'extract_flat': 'in_playlist',
+    },
+    PROFILE_DOWNLOAD: {
+        'writesubtitles': True,
+        'subtitleslangs': ['zh-Hans', 'zh-Hant', 'en']
+    },
+}
+
+# 复用实例时只能覆盖 yt-dlp 在调用时才读取的参数，format、postprocessors、cookiefile 等参数
+# 在 YoutubeDL 初始化时就已生效（格式选择器、后处理器、opener），覆盖这些参数时改用一次性的实例
+CALL_TIME_OPTIONS = frozenset({
+    'outtmpl',
+    'writethumbnail',
+    'progress_hooks',
+    'ratelimit',
+    'concurrent_fragment_downloads',
+    'external_downloader',
+    'external_downloader_args',
+})
+
+
+class _PooledYoutubeDL:
+
+    def __init__(self, profile: str, cookie_file_path: Optional[str], overrides: Optional[dict] = None):
+        self.cookie_file_path = cookie_file_path
+        self.cookie_version = _file_version(cookie_file_path)
+        self.base_options = copy.deepcopy(PROFILE_OPTIONS[profile])
+        if cookie_file_path:
+            self.base_options['cookiefile'] = cookie_file_path
+        self.ydl = YoutubeDL({**copy.deepcopy(self.base_options), **(overrides or {})})
+        self.override_keys = set()
+        self.in_use = False
+        self.cookie_fingerprint = _cookie_fingerprint(self.ydl.cookiejar)
+
+    def is_stale(self) -> bool:
+        """cookie 副本被同步任务替换后过期，同一队列其他线程写回的 cookie 不算"""
+        version = _file_version(self.cookie_file_path)
+        return version != self.cookie_version and version != _saved_versions.get(self.cookie_file_path)
+
+    def reset(self, overrides: dict):
+        """恢复为 profile 的初始参数，再应用本次调用的参数（只能是 CALL_TIME_OPTIONS 中的参数）"""
+        ydl = self.ydl
+        for key in self.override_keys - self.base_options.keys():
+            ydl.params.pop(key, None)
+        ydl.params.update(copy.deepcopy(self.base_options))
+
+        overrides = dict(overrides)
+        ydl._progress_hooks = list(overrides.pop('progress_hooks', []))
+        ydl.params.update(overrides)
+        self.override_keys = set(overrides)
+        ydl._parse_outtmpl()
+
+        ydl._download_retcode = 0
+        ydl._num_downloads = 0
+
+    def save_cookies(self):
+        """
+        站点刷新了 cookie 时写回本队列的 cookie 副本，副本已被同步任务替换时不覆盖
+        cookie 没有变化时不写文件，避免同一队列其他线程的实例反复重新加载
+        """
+        if not self.cookie_file_path or self.is_stale():
+            return
+        fingerprint = _cookie_fingerprint(self.ydl.cookiejar)
+        if fingerprint == self.cookie_fingerprint:
+            return
+        with _cookie_file_lock(self.cookie_file_path):
+            try:
+                self.ydl.save_cookies()
+            except Exception:
+                logger.warning(f'保存 cookie 失败: {self.cookie_file_path}', exc_info=True)
+            # 自己写入的文件不算过期
+            self.cookie_version = _saved_versions[self.cookie_file_path] = _file_version(self.cookie_file_path)
+        self.cookie_fingerprint = fingerprint
+
+    def close(self):
+        self.save_cookies()
+        self.discard()
+
+    def discard(self):
+        # cookie 副本已被替换，不能把内存中的旧 cookie 写回去覆盖新文件
+        self.ydl.params.pop('cookiefile', None)
+        try:
+            self.ydl.close()
+        except Exception:
+            logger.warning('关闭 YoutubeDL 实例失败', exc_info=True)
+
+
+_cookie_file_locks: dict[str, threading.Lock] = {}
+_cookie_file_locks_lock = threading.Lock()
+# 本进程写回 cookie 后的文件版本
+_saved_versions: dict[str, tuple] = {}
+
+
+def _cookie_file_lock(file_path: str) -> threading.Lock:
+    """同一队列的多个线程共用一个 cookie 副本，写回时串行"""
+    with _cookie_file_locks_lock:
+        return _cookie_file_locks.setdefault(file_path, threading.Lock())
+
+
+def _cookie_fingerprint(cookiejar) -> frozenset:
+    return frozenset((cookie.domain, cookie.path, cookie.name, cookie.value, cookie.expires) for cookie in cookiejar)
+
+
+def _file_version(file_path: Optional[str]):
+    if not file_path or not os.path.exists(file_path):
+        return None
+    stat = os.stat(file_path)
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+class YoutubeDLPool:
+    """
+    每个工作线程按 (profile, cookie 文件) 复用预先配置好的 YoutubeDL 实例，
+    避免每次解析都重新初始化 extractor、cookie jar 和 HTTP opener
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        # 所有线程的实例，进程退出时统一关闭
+        self._all_instances: list[_PooledYoutubeDL] = []
+        self._lock = threading.Lock()
+
+    def _instances(self) -> dict:
+        if not hasattr(self._local, 'instances'):
+            self._local.instances = {}
+        return self._local.instances
+
+    def _create(self, profile: str, cookie_file_path: Optional[str]) -> _PooledYoutubeDL:
+        pooled = _PooledYoutubeDL(profile, cookie_file_path)
+        with self._lock:
+            self._all_instances.append(pooled)
+        return pooled
+
+    def _remove(self, pooled: _PooledYoutubeDL):
+        with self._lock:
+            if pooled in self._all_instances:
+                self._all_instances.remove(pooled)
+
+    @contextmanager
+    def borrow(self, profile: str, cookie_file_path: Optional[str] = None, **overrides):
+        instances = self._instances()
+        key = (profile, cookie_file_path)
+        pooled = instances.get(key)
+        if pooled is not None and pooled.is_stale():
+            pooled.discard()
+            self._remove(pooled)
+            pooled = None
+        if pooled is None:
+            pooled = instances[key] = self._create(profile, cookie_file_path)
+
+        # 同一线程嵌套借用同一个 key，或覆盖了初始化时生效的参数时不复用，使用一次性的实例
+        if pooled.in_use or not overrides.keys() <= CALL_TIME_OPTIONS:
+            throwaway = _PooledYoutubeDL(profile, cookie_file_path, overrides)
+            try:
+                yield throwaway.ydl
+            finally:
+                throwaway.close()
+            return
+
+        pooled.reset(overrides)
+        pooled.in_use = True
+        try:
+            yield pooled.ydl
+        finally:
+            pooled.save_cookies()
+            pooled.in_use = False
+
+    def close(self):
+        """worker 停止时调用，保存 cookie 并关闭所有实例"""
+        with self._lock:
+            instances, self._all_instances = self._all_instances, []
+            self._local = threading.local()
+        for pooled in instances:
+            pooled.close()
+
+
+ydl_pool = YoutubeDLPool()
@@ -1,8 +1,12 @@
 from pydantic import BaseModel
 
+from common import constants
+
 
 class VideoExtractDto(BaseModel):
     url: str
     subscribed: bool
     only_extract: bool
     subscription_id: int
+    # 需要下载时的优先级
+    priority: str = constants.DOWNLOAD_PRIORITY_MANUAL
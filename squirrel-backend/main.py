@@ -1,8 +1,10 @@
 import importlib
 import logging
+import multiprocessing
 import os
 import pkgutil
 import signal
+import threading
 
 import dramatiq
 import uvicorn
@@ -12,6 +14,8 @@ from dramatiq.worker import Worker
 from alembic import command
 from common import constants
 from common.log import init_logging
+from core.config import settings
+from downloader.ydl_pool import ydl_pool
 from consumer.base import redis_broker
 from routes.base import app
 from schedule.schedule import Scheduler
@@ -32,30 +36,42 @@ def auto_discover_actors(package_name='consumer'):
             importlib.import_module(module_name)
 
 
-def create_workers():
+def get_worker_threads():
+    return {
+        constants.WORKER_GROUP_DOWNLOAD: settings.DOWNLOAD_CONSUMERS,
+        constants.WORKER_GROUP_EXTRACT: settings.EXTRACT_CONSUMERS,
+        constants.WORKER_GROUP_SUBSCRIBE: settings.SUBSCRIBE_CONSUMERS,
+        constants.WORKER_GROUP_PROGRESS: 1,
+    }
+
+
+def create_workers(groups=None):
     for queue in constants.get_all_queues():
         redis_broker.declare_queue(queue)
 
     dramatiq.set_broker(redis_broker)
     auto_discover_actors()
 
+    queue_groups = constants.get_queue_groups()
+    worker_threads = get_worker_threads()
     workers = []
-    for queue in constants.get_all_queues():
-        worker = Worker(
-            redis_broker,
-            queues=[queue],
-            worker_threads=1,
-            worker_timeout=1000,
-        )
-        workers.append(worker)
-        logger.info(f"Created worker for queue: {queue}")
+    for group in groups if groups is not None else queue_groups:
+        for queue in queue_groups[group]:
+            worker = Worker(
+                redis_broker,
+                queues=[queue],
+                worker_threads=worker_threads[group],
+                worker_timeout=1000,
+            )
+            workers.append(worker)
+            logger.info(f"Created worker for queue: {queue}, threads: {worker_threads[group]}")
 
     logger.info(f"Registered actors: {redis_broker.actors}")
     return workers
 
 
-def run_workers():
-    workers = create_workers()
+def run_workers(groups=None):
+    workers = create_workers(groups)
 
     def signal_handler(signum, frame):
         logger.info("Stopping workers...")
@@ -72,10 +88,61 @@ def run_workers():
     return workers
 
 
+def run_worker_process(group: str):
+    """独立进程的入口，只运行一个分组的 worker，收到 SIGTERM/SIGINT 后停止"""
+    init_logging()
+    workers = create_workers([group])
+    stopped = threading.Event()
+
+    def signal_handler(signum, frame):
+        stopped.set()
+
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
+
+    logger.info(f"Starting worker process for group: {group}")
+    for worker in workers:
+        worker.start()
+    stopped.wait()
+    logger.info(f"Stopping worker process for group: {group}")
+    for worker in workers:
+        worker.stop()
+    ydl_pool.close()
+
+
 def start_workers():
+    queue_groups = constants.get_queue_groups()
+    process_groups = [group for group in settings.WORKER_PROCESSES if group in queue_groups]
+    unknown_groups = set(settings.WORKER_PROCESSES) - set(process_groups)
+    if unknown_groups:
+        logger.warning(f"Unknown worker groups in WORKER_PROCESSES: {unknown_groups}")
+
+    # spawn 启动的子进程重新初始化 Redis/数据库连接池，不继承父进程的连接和线程
+    context = multiprocessing.get_context('spawn')
+    processes = []
+    for group in process_groups:
+        process = context.Process(target=run_worker_process, args=(group,), name=f'worker-{group}')
+        process.start()
+        processes.append(process)
+        logger.info(f"Started worker process for group: {group}, pid: {process.pid}")
+
     logger.info('Starting workers in background thread...')
-    workers = run_workers()
-    return workers
+    workers = run_workers([group for group in queue_groups if group not in process_groups])
+    return workers, processes
+
+
+def stop_workers(workers, processes):
+    logger.info("Stopping workers...")
+    for worker in workers:
+        worker.stop()
+    ydl_pool.close()
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        process.join(timeout=30)
+        if process.is_alive():
+            logger.warning(f"Worker process {process.name} did not exit, killing it")
+            process.kill()
 
 
 def upgrade_database():
@@ -115,7 +182,7 @@ def main():
     init_logging()
 
     # 启动 workers
-    workers = start_workers()
+    workers, processes = start_workers()
 
     # 启动调度器
     start_scheduler()
@@ -126,9 +193,7 @@ def main():
         start_fastapi_server()
     finally:
         # 确保在程序退出时停止 workers
-        logger.info("Stopping workers...")
-        for worker in workers:
-            worker.stop()
+        stop_workers(workers, processes)
 
 
 if __name__ == "__main__":
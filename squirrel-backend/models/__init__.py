@@ -1,5 +1,14 @@
+from sqlalchemy import func
 from sqlalchemy.orm import DeclarativeBase
 
+# url_hash 列由 MySQL 生成：UNHEX(MD5(url))，用于代替 VARCHAR(2048) 的 URL 列建立索引
+URL_HASH_EXPRESSION = "unhex(md5({column}))"
+
 
 class Base(DeclarativeBase):
     pass
+
+
+def url_hash(url: str):
+    """生成与 url_hash 列比较的 SQL 表达式"""
+    return func.unhex(func.md5(url))
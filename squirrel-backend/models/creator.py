@@ -1,18 +1,22 @@
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import Boolean, JSON, VARCHAR, Text
+from sqlalchemy import Boolean, JSON, VARCHAR, Text, BINARY, Computed
 from sqlalchemy.orm import mapped_column, Mapped
-from models import Base
+from models import Base, URL_HASH_EXPRESSION
 from models.mixins.serializer import SerializerMixin
 
 
 class Creator(Base, SerializerMixin):
     __tablename__ = "creator"
+    serialize_exclude = {'url_hash'}
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[Optional[str]] = mapped_column(VARCHAR(128), nullable=True)
     url: Mapped[str] = mapped_column(VARCHAR(2048), nullable=False)
+    url_hash: Mapped[Optional[bytes]] = mapped_column(
+        BINARY(16), Computed(URL_HASH_EXPRESSION.format(column='url'), persisted=True), index=True
+    )
     avatar: Mapped[Optional[str]] = mapped_column(VARCHAR(2048), nullable=True)
     description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     is_deleted: Mapped[bool] = mapped_column(Boolean, default=False)
@@ -11,7 +11,7 @@ class SubscriptionVideo(Base, SerializerMixin):
     __tablename__ = "subscription_video"
 
     subscription_id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    video_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    video_id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     created_at: Mapped[datetime] = mapped_column(
         default=lambda: datetime.now()
     )
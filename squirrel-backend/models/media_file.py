@@ -0,0 +1,29 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Integer, VARCHAR, BigInteger, Double
+from sqlalchemy.orm import Mapped, mapped_column
+
+from models import Base
+from models.mixins.serializer import SerializerMixin
+
+
+class MediaFile(Base, SerializerMixin):
+    """已下载视频的本地文件索引，播放时直接按 video_id 查找文件"""
+    __tablename__ = "media_file"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    video_id: Mapped[int] = mapped_column(Integer, nullable=False, unique=True)
+    path: Mapped[str] = mapped_column(VARCHAR(1024), nullable=False)
+    size: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    container: Mapped[Optional[str]] = mapped_column(VARCHAR(16), nullable=True)
+    codecs: Mapped[Optional[str]] = mapped_column(VARCHAR(128), nullable=True)
+    mtime: Mapped[float] = mapped_column(Double, nullable=False)
+    checksum: Mapped[str] = mapped_column(VARCHAR(32), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        default=lambda: datetime.now()
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        default=lambda: datetime.now(),
+        onupdate=lambda: datetime.now()
+    )
@@ -1,6 +1,6 @@
 from datetime import datetime
 from decimal import Decimal
-from typing import Any, Set, Dict, Optional, Type, TypeVar
+from typing import Any, ClassVar, Set, Dict, Optional, Type, TypeVar
 from sqlalchemy.orm import class_mapper
 
 T = TypeVar('T', bound='SerializerMixin')
@@ -9,6 +9,9 @@ T = TypeVar('T', bound='SerializerMixin')
 class SerializerMixin:
     """Mixin for SQLAlchemy model serialization and deserialization"""
 
+    # Columns that are never serialized, e.g. binary index helper columns
+    serialize_exclude: ClassVar[Set[str]] = set()
+
     def to_dict(
             self,
             exclude: Set[str] = None,
@@ -26,7 +29,7 @@ class SerializerMixin:
             nested_depth: How deep to follow relationships
         """
         data = {}
-        exclude = exclude or set()
+        exclude = (exclude or set()) | self.serialize_exclude
 
         # Get all columns
         mapper = class_mapper(self.__class__)
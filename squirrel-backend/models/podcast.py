@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import Integer, Text, Boolean, VARCHAR, DateTime
+from sqlalchemy import Integer, Text, Boolean, VARCHAR, DateTime, Index
 from sqlalchemy.orm import Mapped, mapped_column
 
 from models import Base
@@ -32,6 +32,9 @@ class PodcastChannel(Base, SerializerMixin):
 
 class PodcastEpisode(Base):
     __tablename__ = "podcast_episodes"
+    __table_args__ = (
+        Index('ix_podcast_episodes_channel_id_published_at', 'channel_id', 'published_at'),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     channel_id: Mapped[int] = mapped_column(Integer, nullable=False)
@@ -2,10 +2,10 @@ from datetime import datetime
 from typing import Optional
 
 from sqlalchemy.types import JSON
-from sqlalchemy import Integer, VARCHAR, Text, Boolean
+from sqlalchemy import Integer, VARCHAR, Text, Boolean, BINARY, Computed, DateTime
 from sqlalchemy.orm import Mapped, mapped_column
 
-from models import Base
+from models import Base, URL_HASH_EXPRESSION
 from models.mixins.serializer import SerializerMixin
 
 
@@ -19,11 +19,15 @@ class ContentType:
 
 class Subscription(Base, SerializerMixin):
     __tablename__ = "subscription"
+    serialize_exclude = {'content_url_hash'}
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     content_type: Mapped[str] = mapped_column(VARCHAR(32), nullable=False)
     content_name: Mapped[str] = mapped_column(VARCHAR(128), nullable=False)
     content_url: Mapped[Optional[str]] = mapped_column(VARCHAR(2048), nullable=True)
+    content_url_hash: Mapped[Optional[bytes]] = mapped_column(
+        BINARY(16), Computed(URL_HASH_EXPRESSION.format(column='content_url'), persisted=True), index=True
+    )
     avatar_url: Mapped[Optional[str]] = mapped_column(VARCHAR(2048), nullable=True)
     description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     total_videos: Mapped[int] = mapped_column(Integer, default=0)
@@ -33,6 +37,9 @@ class Subscription(Base, SerializerMixin):
     is_extract_all: Mapped[bool] = mapped_column(Boolean, default=False)
     is_deleted: Mapped[bool] = mapped_column(Boolean, default=False)
     extra_data: Mapped[Optional[dict]] = mapped_column(JSON, default=None)
+    # 增量抓取水位线：上次抓取时频道中最新的视频
+    latest_video_id: Mapped[Optional[str]] = mapped_column(VARCHAR(64), nullable=True)
+    latest_published_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         default=lambda: datetime.now()
     )
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Optional, List
 
-from sqlalchemy import BigInteger, Integer, Text
+from sqlalchemy import BigInteger, Integer, Text, Index
 from sqlalchemy.dialects.mysql import VARCHAR
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -12,9 +12,12 @@ from models.task.task_state import TaskStateTransition
 
 class DownloadTask(Base, SerializerMixin):
     __tablename__ = 'download_task'
+    __table_args__ = (
+        Index('ix_download_task_status_updated_at', 'status', 'updated_at'),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    video_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    video_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
     status: Mapped[str] = mapped_column(VARCHAR(32), nullable=False, default='PENDING')
     downloaded_size: Mapped[int] = mapped_column(BigInteger, nullable=True, default=0)
     total_size: Mapped[int] = mapped_column(BigInteger, nullable=True, default=0)
@@ -1,17 +1,26 @@
 from datetime import datetime
 from typing import Optional
-from sqlalchemy import Integer, Boolean, JSON, VARCHAR, Text, DateTime
+from sqlalchemy import Integer, Boolean, JSON, VARCHAR, Text, DateTime, Index, BINARY, Computed
 from sqlalchemy.orm import Mapped, mapped_column
-from models import Base
+from models import Base, URL_HASH_EXPRESSION
 from models.mixins.serializer import SerializerMixin
 
 
 class Video(Base, SerializerMixin):
     __tablename__ = "video"
+    __table_args__ = (
+        Index('ix_video_publish_date_id', 'publish_date', 'id'),
+        Index('ix_video_created_at_id', 'created_at', 'id'),
+        Index('ft_video_title', 'title', mysql_prefix='FULLTEXT', mysql_with_parser='ngram'),
+    )
+    serialize_exclude = {'url_hash'}
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     title: Mapped[str] = mapped_column(VARCHAR(128), nullable=False)
     url: Mapped[str] = mapped_column(VARCHAR(2048), nullable=False)
+    url_hash: Mapped[Optional[bytes]] = mapped_column(
+        BINARY(16), Computed(URL_HASH_EXPRESSION.format(column='url'), persisted=True), index=True
+    )
     description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     duration: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     thumbnail: Mapped[Optional[str]] = mapped_column(VARCHAR(2048), nullable=True)
@@ -0,0 +1,21 @@
+from datetime import datetime
+
+from sqlalchemy import Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from models import Base
+
+GLOBAL_COUNTER_ID = 0
+
+
+class VideoCounter(Base):
+    """视频数量计数器，subscription_id 为 0 时表示全部未删除订阅的汇总"""
+    __tablename__ = "video_counter"
+
+    subscription_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    video_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    preview_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        default=lambda: datetime.now(),
+        onupdate=lambda: datetime.now()
+    )
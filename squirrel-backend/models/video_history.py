@@ -11,7 +11,7 @@ class VideoHistory(Base, SerializerMixin):
     __tablename__ = "video_history"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    video_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    video_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
     watch_duration: Mapped[int] = mapped_column(Integer, default=0)
     last_position: Mapped[int] = mapped_column(Integer, default=0)
     total_duration: Mapped[int] = mapped_column(Integer, default=0)
@@ -8,12 +8,16 @@ from starlette import status
 from starlette.requests import Request
 from starlette.responses import JSONResponse, FileResponse, RedirectResponse
 from starlette.staticfiles import StaticFiles
+from common import http_proxy
+from services.task_event_service import task_event_hub
 from routes.video import router as video_router
 from routes.subscription import router as subscription_router
 from routes.task import router as task_router
 
 logger = logging.getLogger()
 app = FastAPI()
+app.add_event_handler("shutdown", http_proxy.close_client)
+app.add_event_handler("shutdown", task_event_hub.close)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
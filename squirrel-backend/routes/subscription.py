@@ -6,6 +6,7 @@ from sqlalchemy import select
 import common.response as response
 from consumer import subscribe_task
 from core.database import get_session
+from models import url_hash
 from models.message import Message
 from models.subscription import Subscription
 from schemas.subscription import (
@@ -14,6 +15,7 @@ from schemas.subscription import (
     ToggleStatusRequest
 )
 from services import subscription_service
+from subscribe.platforms.bilibili.sign import get_wbi_stats
 
 router = APIRouter(tags=['订阅接口'])
 
@@ -33,19 +35,7 @@ def subscribe_content(req: SubscribeRequest):
 
 @router.post("/api/subscription/unsubscribe")
 def unsubscribe_content(req: UnsubscribeRequest):
-    if req.subscription_id:
-        with get_session() as session:
-            subscription = session.scalars(
-                select(Subscription).where(Subscription.id == req.subscription_id)).first()
-            if subscription:
-                subscription.is_deleted = True
-                session.commit()
-    elif req.url:
-        with get_session() as session:
-            subscription = session.scalars(select(Subscription).where(Subscription.content_url == req.url)).first()
-            if subscription:
-                subscription.is_deleted = True
-                session.commit()
+    subscription_service.unsubscribe(req.subscription_id, req.url)
     return response.success()
 
 
@@ -54,7 +44,9 @@ def subscribe_content(url: str = Query(None)):
     is_subscribed = False
     with get_session() as session:
         if url:
-            subscription = session.scalars(select(Subscription).where(Subscription.content_url == url)).first()
+            subscription = session.scalars(select(Subscription).where(
+                Subscription.content_url_hash == url_hash(url),
+                Subscription.content_url == url)).first()
             if subscription:
                 is_subscribed = True
     return response.success({
@@ -62,6 +54,12 @@ def subscribe_content(url: str = Query(None)):
     })
 
 
+@router.get("/api/subscription/bilibili/wbi-stats")
+def get_bilibili_wbi_stats():
+    """B站 wbi 签名 key 的缓存命中和刷新统计"""
+    return response.success(get_wbi_stats())
+
+
 @router.get("/api/subscription/list")
 def list_subscriptions(
         query: str = Query(None, description="搜索关键字"),
@@ -1,16 +1,16 @@
 import asyncio
 import json
-import time
+from typing import List
 
 from fastapi import APIRouter, Query
-from sqlalchemy import select
 from sse_starlette import EventSourceResponse
+from starlette.concurrency import run_in_threadpool
 
 import common.response as response
-from core.database import get_session
-from models.task.download_task import DownloadTask
 from schemas.task import DownloadRequest, DownloadChangeStateRequest
-from services import task_service
+from services import task_service, task_event_service
+from services.task_event_service import task_event_hub
+from utils.bandwidth import bandwidth_manager
 
 router = APIRouter(tags=['下载任务接口'])
 
@@ -39,6 +39,12 @@ def delete_download(req: DownloadChangeStateRequest):
     return response.success()
 
 
+@router.get("/api/task/bandwidth")
+def get_bandwidth_allocation():
+    """当前的带宽配置和每个正在传输的下载/代理请求分到的速度上限（字节/秒）"""
+    return response.success(bandwidth_manager.get_allocation())
+
+
 @router.get("/api/task/list")
 def get_tasks(
         status: str = Query(None, description="任务状态"),
@@ -61,19 +67,25 @@ async def get_tasks_progress(task_ids: str):
     for task_id in task_ids_split:
         if task_id != '':
             task_ids.append(int(task_id))
+    watched_ids = set(task_ids)
 
     async def event_generator():
-        while True:
-            with get_session() as session:
-                tasks = []
-                if len(task_ids) > 0:
-                    tasks = session.scalars(select(DownloadTask).where(DownloadTask.id.in_(task_ids))).all()
-                tasks_progress = task_service.generate_task_data(tasks)
-                yield {
-                    "event": "message",
-                    "data": json.dumps(tasks_progress)
-                }
-                await asyncio.sleep(1)
+        queue = task_event_hub.subscribe()
+        try:
+            tasks_progress = await run_in_threadpool(task_service.get_tasks_data, task_ids)
+            yield {
+                "event": "message",
+                "data": json.dumps(tasks_progress)
+            }
+            while True:
+                changes = _merge_events(await _drain(queue), lambda e: e['id'] in watched_ids)
+                if changes:
+                    yield {
+                        "event": "message",
+                        "data": json.dumps(changes)
+                    }
+        finally:
+            task_event_hub.unsubscribe(queue)
 
     return EventSourceResponse(event_generator())
 
@@ -81,26 +93,42 @@ async def get_tasks_progress(task_ids: str):
 @router.get("/api/task/new_task_notification")
 async def new_task_notification(latest_task_id: int = Query(default=0)):
     async def event_generator():
-        while True:
-            with get_session() as session:
-                tasks = session.scalars(select(DownloadTask).where(DownloadTask.id > latest_task_id).order_by(
-                    DownloadTask.id.desc()).limit(30)).all()
-                if len(tasks) > 0:
-                    task_data = task_service.generate_task_data(tasks)
+        queue = task_event_hub.subscribe()
+        try:
+            # 连接建立前新增的任务
+            task_data = await run_in_threadpool(task_service.get_new_tasks_data, latest_task_id)
+            if task_data:
+                yield {
+                    "event": "message",
+                    "data": json.dumps(task_data)
+                }
+            while True:
+                new_tasks = _merge_events(await _drain(queue), lambda e: e['type'] == task_event_service.EVENT_CREATED
+                                          and e['id'] > latest_task_id)
+                if new_tasks:
                     yield {
                         "event": "message",
-                        "data": json.dumps(task_data)
+                        "data": json.dumps(new_tasks)
                     }
-                    await asyncio.sleep(1)
-
-                else:
-                    yield {
-                        "event": "heartbeat",
-                        "data": json.dumps({"timestamp": time.time()})
-                    }
-                    await asyncio.sleep(1)
+        finally:
+            task_event_hub.unsubscribe(queue)
 
     return EventSourceResponse(event_generator())
 
 
+async def _drain(queue: asyncio.Queue) -> List[dict]:
+    """等待至少一个事件，并取出队列中已积压的全部事件"""
+    events = [await queue.get()]
+    while not queue.empty():
+        events.append(queue.get_nowait())
+    return events
+
 
+def _merge_events(events: List[dict], predicate) -> List[dict]:
+    """同一任务的多个事件合并为一条，只保留每个字段的最新值"""
+    merged = {}
+    for task_event in events:
+        if predicate(task_event):
+            merged.setdefault(task_event['id'], {}).update(
+                {k: v for k, v in task_event.items() if k != 'type'})
+    return list(merged.values())
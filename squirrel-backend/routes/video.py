@@ -1,19 +1,22 @@
-import asyncio
 import logging
+import os
 import re
 from urllib.parse import urljoin
 
 import httpx
-from fastapi import Query, APIRouter, Request, HTTPException
+from fastapi import Query, APIRouter, Request, HTTPException, BackgroundTasks
 from starlette.responses import StreamingResponse
 
 import common.response as response
+from cache import info_cache
+from cache.segment_cache import segment_cache
+from common import http_proxy
 from common.video_stream import VideoStreamHandler
 from core import download_config
-from downloader.factory import DownloaderFactory
-from meta.factory import VideoFactory
+from core.config import settings
 from schemas.video import DownloadVideoRequest, SortBy
-from services import video_service, subscription_video_service, subscription_service
+from services import video_service, subscription_video_service, subscription_service, media_file_service
+from utils.bandwidth import bandwidth_manager, get_platform, PRIORITY_PLAYBACK
 
 logger = logging.getLogger()
 
@@ -38,20 +41,30 @@ def get_video(
 
 @router.get("/api/video/list")
 def get_channel_videos(
+        background_tasks: BackgroundTasks,
         query: str = Query(None, description="搜索关键字"),
         subscription_id: int = Query(None, description="订阅ID"),
         category: str = Query(None, description="阅读状态: all, read, unread, preview, like"),
         sort_by: SortBy = Query(SortBy.UPLOADED_AT, description="排序字段"),
         page: int = Query(1, ge=1, description="页码"),
         page_size: int = Query(10, ge=1, le=100, alias="pageSize", description="每页数量"),
+        cursor: str = Query(None, description="游标，传入上一页返回的 next_cursor，优先于 page"),
 ):
-    videos, total_counts, counts = video_service.list_videos(query, subscription_id, category, sort_by, page, page_size)
+    try:
+        videos, total_counts, counts, next_cursor = video_service.list_videos(query, subscription_id, category,
+                                                                              sort_by, page, page_size, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # 第一页的视频最可能被点开播放，开启后在响应返回后预先解析播放地址
+    if settings.VIDEO_URL_PRERESOLVE and page == 1 and not cursor:
+        background_tasks.add_task(video_service.preresolve_video_urls, [video['id'] for video in videos])
     return response.success({
         "total": total_counts,
         "page": page,
         "pageSize": page_size,
         "data": videos,
-        "counts": counts
+        "counts": counts,
+        "next_cursor": next_cursor
     })
 
 
@@ -63,18 +76,39 @@ def download_video(req: DownloadVideoRequest):
 
 @router.get("/api/video/play/{video_id}")
 def play_video(request: Request, video_id: int):
+    video_path = media_file_service.get_media_file_path(video_id) or _find_video_file(video_id)
+    if not video_path:
+        raise HTTPException(status_code=404, detail="Video file not found")
+    return VideoStreamHandler.create_stream_response(request, video_path)
+
+
+def _find_video_file(video_id: int):
+    """索引中没有记录时（索引建立前下载的视频），按下载目录规则查找文件并补充索引"""
     video = video_service.get_video_by_id(video_id)
-    downloader = DownloaderFactory.create_downloader(video.url)
-    video_info = downloader.get_video_info(video.url)
-    video = VideoFactory.create_video(video.url, video_info)
+    if not video:
+        raise HTTPException(status_code=404, detail="Video not found")
     subscription_video = subscription_video_service.get_subscription_video_by_video_id(video.id)
+    if not subscription_video:
+        return None
     subscription = subscription_service.get_subscription_by_id(subscription_video.subscription_id)
-    output_dir = download_config.get_download_full_path(subscription.content_name, video.season)
+    output_dir = download_config.get_download_full_path(subscription.content_name, _get_video_season(video))
+    if not os.path.isdir(output_dir):
+        return None
     filename = download_config.get_valid_filename(video.title)
     video_path = VideoStreamHandler.find_video_file(output_dir, filename)
-    if not video_path:
-        raise HTTPException(status_code=404, detail="Video file not found")
-    return VideoStreamHandler.create_stream_response(request, video_path)
+    if video_path:
+        media_file_service.save_media_file(video.id, video_path)
+    return video_path
+
+
+def _get_video_season(video):
+    """
+    下载时按 upload_date 的年份归档，优先使用解析缓存中的元数据，缓存失效时使用发布时间，播放本地文件不访问网络
+    """
+    video_meta = info_cache.get_video_meta(video.url)
+    if video_meta and video_meta.get('upload_date'):
+        return video_meta['upload_date'][0:4]
+    return str(video.publish_date.year) if video.publish_date else None
 
 
 @router.get("/api/video/proxy")
@@ -83,9 +117,6 @@ async def proxy_video(domain: str, url: str, request: Request):
     代理视频文件，用于解决跨域问题
     """
     if domain == "bilibili.com":
-        max_retries = 3
-        chunk_size = 256
-
         headers = {
             "Referer": "https://www.bilibili.com",
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
@@ -94,102 +125,60 @@ async def proxy_video(domain: str, url: str, request: Request):
         if "range" in request.headers:
             headers["Range"] = request.headers["range"]
 
-        async def stream_with_retry():
-            for attempt in range(max_retries):
-                try:
-                    async with httpx.AsyncClient(timeout=httpx.Timeout(60.0)) as client:
-                        async with client.stream("GET", url, headers=headers) as resp:
-                            resp.raise_for_status()
-                            async for chunk in resp.aiter_bytes(chunk_size=chunk_size):
-                                yield chunk
-                    return  # 如果成功完成，就退出函数
-                except (httpx.NetworkError, httpx.TimeoutException, httpx.StreamClosed) as e:
-                    if attempt == max_retries - 1:
-                        logger.error(f"Failed after {max_retries} attempts: {str(e)}")
-                        raise
-                    logger.warning(f"Attempt {attempt + 1} failed, retrying: {str(e)}")
-                    await asyncio.sleep(1)  # 在重试之前等待一秒
-
         try:
-            async with httpx.AsyncClient(timeout=httpx.Timeout(60.0)) as client:
-                async with client.stream("GET", url, headers=headers) as resp:
-                    resp.raise_for_status()
-                    content_type = resp.headers.get('Content-Type', 'application/octet-stream')
-                    resp_headers = {
-                        "Accept-Ranges": "bytes",
-                        "Content-Type": content_type,
-                    }
-                    if 'Content-Range' in resp.headers:
-                        resp_headers['Content-Range'] = resp.headers['Content-Range']
-                    if 'Content-Length' in resp.headers:
-                        resp_headers['Content-Length'] = resp.headers['Content-Length']
-
-                    return StreamingResponse(
-                        stream_with_retry(),
-                        status_code=resp.status_code,
-                        headers=resp_headers
-                    )
-        except httpx.HTTPStatusError as exc:
-            logger.error(f"HTTP error occurred: {exc.response.status_code} {exc.response.reason_phrase}")
-            raise HTTPException(status_code=exc.response.status_code, detail=exc.response.reason_phrase)
-        except Exception as e:
-            logger.error(f"Unexpected error: {str(e)}")
-            raise HTTPException(status_code=500, detail="Internal server error")
+            resp = await http_proxy.open_stream(url, headers)
+        except httpx.HTTPError as e:
+            logger.error(f"HTTP error occurred while proxying {url}: {str(e)}")
+            raise HTTPException(status_code=502, detail=f"Error fetching content: {str(e)}")
+        if resp.is_error:
+            await resp.aclose()
+            logger.error(f"HTTP error occurred: {resp.status_code} {resp.reason_phrase}")
+            raise HTTPException(status_code=resp.status_code, detail=resp.reason_phrase)
+
+        resp_headers = {
+            "Accept-Ranges": "bytes",
+            "Content-Type": resp.headers.get('Content-Type', 'application/octet-stream'),
+        }
+        if 'Content-Range' in resp.headers:
+            resp_headers['Content-Range'] = resp.headers['Content-Range']
+        if 'Content-Length' in resp.headers:
+            resp_headers['Content-Length'] = resp.headers['Content-Length']
+
+        return StreamingResponse(
+            bandwidth_manager.throttle(http_proxy.relay(resp, url, headers), PRIORITY_PLAYBACK, get_platform(domain)),
+            status_code=resp.status_code,
+            headers=resp_headers
+        )
     if domain == "javdb.com":
+        # 设置请求头
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+            'Referer': 'https://missav.ai/',
+            'Origin': 'https://missav.ai'
+        }
         try:
-            async with httpx.AsyncClient() as client:
-                # 设置请求头
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                    'Referer': 'https://missav.ai/',
-                    'Origin': 'https://missav.ai'
+            if url.split('?', 1)[0].endswith('.m3u8'):
+                response = await http_proxy.open_stream(url, headers)
+                try:
+                    response.raise_for_status()
+                    content = await response.aread()
+                finally:
+                    await response.aclose()
+                return _playlist_response(content, url)
+
+            # 分片走磁盘缓存，重复观看和拖动进度时直接读本地文件
+            content_type, body = await segment_cache.open(url, lambda u: http_proxy.open_stream(u, headers))
+            if 'mpegurl' in content_type.lower():
+                return _playlist_response(b''.join([chunk async for chunk in body]), url)
+
+            return StreamingResponse(
+                bandwidth_manager.throttle(body, PRIORITY_PLAYBACK, get_platform(domain)),
+                media_type=content_type,
+                headers={
+                    'Access-Control-Allow-Origin': '*',
+                    'Cache-Control': 'public, max-age=31536000',
                 }
-
-                # 获取内容
-                response = await client.get(url, headers=headers, follow_redirects=True)
-                response.raise_for_status()
-                content = response.content
-                content_type = response.headers.get('content-type', '')
-
-                # 如果是 m3u8 文件
-                if url.endswith('.m3u8') or 'application/vnd.apple.mpegurl' in content_type.lower():
-                    content_text = content.decode()
-                    base_url = url.rsplit('/', 1)[0]
-
-                    # 处理 m3u8 内容中的 URL
-                    def replace_url(match):
-                        path = match.group(1)
-                        if path.startswith('http'):
-                            full_url = path
-                        else:
-                            full_url = urljoin(base_url + '/', path)
-                        return f"/api/video/proxy?domain=javdb.com&url={full_url}"
-
-                    # 替换所有视频分片文件路径（包括.ts和.jpeg）
-                    content_text = re.sub(
-                        r'([^"\n]+\.(ts|jpeg|jpg|m3u8)[^"\n]*)',
-                        replace_url,
-                        content_text
-                    )
-
-                    return StreamingResponse(
-                        iter([content_text.encode()]),
-                        media_type='application/vnd.apple.mpegurl',
-                        headers={
-                            'Access-Control-Allow-Origin': '*',
-                            'Cache-Control': 'no-cache',
-                        }
-                    )
-
-                # 修改处理视频分片的部分
-                return StreamingResponse(
-                    iter([content]),
-                    media_type=content_type or 'application/octet-stream',
-                    headers={
-                        'Access-Control-Allow-Origin': '*',
-                        'Cache-Control': 'public, max-age=31536000',
-                    }
-                )
+            )
 
         except httpx.HTTPError as e:
             logger.error(f"HTTP error occurred while proxying {url}: {str(e)}")
@@ -197,3 +186,33 @@ async def proxy_video(domain: str, url: str, request: Request):
         except Exception as e:
             logger.error(f"Error occurred while proxying {url}: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+def _playlist_response(content: bytes, url: str):
+    content_text = content.decode()
+    base_url = url.rsplit('/', 1)[0]
+
+    # 处理 m3u8 内容中的 URL
+    def replace_url(match):
+        path = match.group(1)
+        if path.startswith('http'):
+            full_url = path
+        else:
+            full_url = urljoin(base_url + '/', path)
+        return f"/api/video/proxy?domain=javdb.com&url={full_url}"
+
+    # 替换所有视频分片文件路径（包括.ts和.jpeg）
+    content_text = re.sub(
+        r'([^"\n]+\.(ts|jpeg|jpg|m3u8)[^"\n]*)',
+        replace_url,
+        content_text
+    )
+
+    return StreamingResponse(
+        iter([content_text.encode()]),
+        media_type='application/vnd.apple.mpegurl',
+        headers={
+            'Access-Control-Allow-Origin': '*',
+            'Cache-Control': 'no-cache',
+        }
+    )
@@ -6,19 +6,18 @@ from typing import List, Type
 
 from PyCookieCloud import PyCookieCloud
 from sqlalchemy import select, or_, and_
-from sqlalchemy.sql.functions import count, func
 
 from core import config
 from core.config import settings
 from core.database import get_session
-from dto.video_dto import VideoExtractDto
 from models.task.download_task import DownloadTask
 from models.links import SubscriptionVideo
 from models.subscription import Subscription
 from models.task.task_state import TaskState
-from services import download_service
+from services import download_service, video_counter_service, subscription_service, media_file_service, \
+    video_service
 from subscribe.factory import SubscriptionFactory
-from utils.cookie import json_cookie_to_netscape
+from utils.cookie import json_cookie_to_netscape, http_cookie_store
 
 logger = logging.getLogger()
 
@@ -75,6 +74,7 @@ class SyncCookies(BaseTask):
 
             json_cookie_to_netscape(decrypted_data, expect_domains, config.get_cookies_file_path())
             json_cookie_to_netscape(decrypted_data, expect_domains, config.get_cookies_http_file_path())
+            http_cookie_store.invalidate()
 
         except json.JSONDecodeError as e:
             logger.error(f"Error decoding JSON: {e}", exc_info=True)
@@ -82,6 +82,16 @@ class SyncCookies(BaseTask):
             logger.error(f"An unexpected error occurred: {e}", exc_info=True)
 
 
+@TaskRegistry.register(interval=30, unit='minutes')
+class SyncMediaFiles(BaseTask):
+    @classmethod
+    def run(cls):
+        try:
+            media_file_service.sync_media_files()
+        except Exception as e:
+            logger.error(f"同步媒体文件索引失败: {e}", exc_info=True)
+
+
 @TaskRegistry.register(interval=1, unit='minutes')
 class RetryFailedTask(BaseTask):
     @classmethod
@@ -124,9 +134,11 @@ class ChangeStatusTask(BaseTask):
     def run(cls):
         try:
             with get_session() as session:
-                session.query(DownloadTask).filter(DownloadTask.status == TaskState.PENDING.value, DownloadTask.retry >= 5).update({
-                    DownloadTask.status: TaskState.FAILED.value
-                })
+                # 逐行修改而不是批量 update，after_update 监听器才能向下载页面发布状态事件
+                tasks = session.scalars(select(DownloadTask).where(DownloadTask.status == TaskState.PENDING.value,
+                                                                   DownloadTask.retry >= 5)).all()
+                for task in tasks:
+                    task.status = TaskState.FAILED.value
                 session.commit()
 
         except json.JSONDecodeError as e:
@@ -191,17 +203,21 @@ class AutoUpdateChannelVideo(BaseTask):
             with get_session() as session:
                 subscription = session.merge(subscription)
                 subscribe_channel = SubscriptionFactory.create_subscription(subscription.content_url)
-                video_list = subscribe_channel.get_subscribe_videos(extract_all=subscription.is_extract_all)
-                extract_video_list = video_list if subscription.is_extract_all else video_list[
-                                                                                    :settings.CHANNEL_UPDATE_DEFAULT_SIZE]
-                for video in extract_video_list:
-                    params = VideoExtractDto(
-                        url=video,
-                        subscribed=True,
-                        only_extract=True,
-                        subscription_id=subscription.id
-                    )
-                    download_service.start(params)
+                # 全量抓取只在开启 is_extract_all 时进行，其余情况只抓取上次水位线之后的新视频
+                watermark = None if subscription.is_extract_all else subscription_service.get_crawl_watermark(
+                    subscription)
+                video_list = subscribe_channel.get_subscribe_videos(extract_all=subscription.is_extract_all,
+                                                                    watermark=watermark)
+                if subscription.is_extract_all or watermark:
+                    extract_video_list = video_list
+                else:
+                    extract_video_list = video_list[:settings.CHANNEL_UPDATE_DEFAULT_SIZE]
+                download_service.start_many(subscription.id, extract_video_list)
+                # 水位线只推进到已入库的视频，刚提交或解析失败的视频下次抓取时仍会被列出
+                persisted_urls = video_service.get_existing_urls([url for url, _ in subscribe_channel.crawled])
+                latest = subscribe_channel.get_persisted_watermark(persisted_urls)
+                if latest:
+                    subscription_service.update_crawl_watermark(subscription.id, latest)
         except Exception as e:
             logger.error(f"An unexpected error occurred: {e}", exc_info=True)
 
@@ -228,13 +244,11 @@ class RepairChanelInfoForTotalVideos(BaseTask):
                 with get_session() as session:
                     subscription = session.scalars(
                         select(Subscription).where(Subscription.id == subscription_id)).first()
-                    videos_count = session.scalars(select(count(SubscriptionVideo.video_id)).where(
-                        SubscriptionVideo.subscription_id == subscription_id)).one()
+                    videos_count = video_counter_service.get_counts(subscription_id)['video_count']
                     if subscription.total_videos is not None and subscription.total_videos >= videos_count and subscription.total_videos > 0:
                         continue
                     subscribe_channel = SubscriptionFactory.create_subscription(subscription.content_url)
-                    videos = subscribe_channel.get_subscribe_videos(extract_all=True)
-                    subscription.total_videos = len(videos)
+                    subscription.total_videos = subscribe_channel.get_total_videos()
                     session.commit()
             except json.JSONDecodeError as e:
                 logger.error(f"Error decoding JSON: {e}", exc_info=True)
@@ -249,9 +263,7 @@ class AutoUpdateSubscriptionExtractAll(BaseTask):
         with get_session() as session:
             subscriptions = session.scalars(select(Subscription)).all()
             for subscription in subscriptions:
-                extract_count = session.scalars(
-                    select(func.count(SubscriptionVideo.video_id)).where(
-                        SubscriptionVideo.subscription_id == subscription.id)).one()
+                extract_count = video_counter_service.get_counts(subscription.id)['video_count']
                 if subscription.total_videos is not None and subscription.total_videos > extract_count and subscription.total_videos - extract_count > 10:
                     subscription.is_extract_all = 1
                 else:
@@ -259,3 +271,13 @@ class AutoUpdateSubscriptionExtractAll(BaseTask):
                 session.add(subscription)
                 session.commit()
                 session.refresh(subscription)
+
+
+@TaskRegistry.register(interval=10, unit='minutes')
+class RebuildVideoCounters(BaseTask):
+    @classmethod
+    def run(cls):
+        try:
+            video_counter_service.rebuild()
+        except Exception as e:
+            logger.error(f"An unexpected error occurred: {e}", exc_info=True)
@@ -1,16 +1,32 @@
-from sqlalchemy import select
+from typing import List, Optional
 
-from core.database import get_session
+from sqlalchemy import select, insert
+from sqlalchemy.orm import Session
+
+from core.database import session_scope
+from meta.base import Actor
+from models import url_hash
 from models.creator import Creator
 
 
-def get_creator_by_url(actor_url: str):
-    with get_session() as session:
-        return session.scalars(select(Creator).where(Creator.url == actor_url)).first()
+def get_creator_by_url(actor_url: str, session: Optional[Session] = None):
+    with session_scope(session) as session:
+        return session.scalars(select(Creator).where(
+            Creator.url_hash == url_hash(actor_url),
+            Creator.url == actor_url)).first()
+
+
+def get_creators_by_urls(actor_urls: List[str], session: Optional[Session] = None) -> List[Creator]:
+    if not actor_urls:
+        return []
+    with session_scope(session) as session:
+        return list(session.scalars(select(Creator).where(
+            Creator.url_hash.in_([url_hash(actor_url) for actor_url in actor_urls]),
+            Creator.url.in_(actor_urls))).all())
 
 
-def create_creator(actor_url: str, actor_name: str, actor_avatar: str):
-    with get_session() as session:
+def create_creator(actor_url: str, actor_name: str, actor_avatar: str, session: Optional[Session] = None):
+    with session_scope(session) as session:
         creator = Creator(
             url=actor_url,
             name=actor_name,
@@ -19,5 +35,28 @@ def create_creator(actor_url: str, actor_name: str, actor_avatar: str):
             extra_data={}
         )
         session.add(creator)
-        session.commit()
+        session.flush()
         return creator
+
+
+def get_or_create_creators(actors: List[Actor], session: Optional[Session] = None) -> List[Creator]:
+    """批量获取创作者，不存在的一次性批量插入"""
+    actors = list({actor.url: actor for actor in actors if actor.url}.values())
+    with session_scope(session) as session:
+        creators = get_creators_by_urls([actor.url for actor in actors], session)
+        existing_urls = {creator.url for creator in creators}
+        missing = [actor for actor in actors if actor.url not in existing_urls]
+        if missing:
+            session.execute(insert(Creator), [
+                {
+                    'url': actor.url,
+                    'name': actor.name,
+                    'avatar': actor.avatar,
+                    'description': None,
+                    'extra_data': {},
+                    'is_deleted': False,
+                }
+                for actor in missing
+            ])
+            creators.extend(get_creators_by_urls([actor.url for actor in missing], session))
+        return creators
@@ -0,0 +1,139 @@
+import json
+import logging
+import time
+from typing import Optional
+
+from common import constants
+from core.cache import RedisClient
+from core.config import settings
+from services import download_service
+
+logger = logging.getLogger()
+client = RedisClient.get_instance().client
+
+# 下载请求先写入 Redis 的有序集合，dramatiq 队列中只放令牌，worker 拿到令牌后取出当前优先级最高的任务，
+# 两个下载队列的 worker 都会先处理手动下载，再处理自动下载和补档。
+# 排序分数为 入队时间 - 优先级 * DOWNLOAD_PRIORITY_AGING，低优先级任务每多等一个周期相当于提升一级，不会一直被插队
+TOKEN = {'type': 'download_token'}
+
+PRIORITY_RANKS = {
+    constants.DOWNLOAD_PRIORITY_MANUAL: 2,
+    constants.DOWNLOAD_PRIORITY_AUTO: 1,
+    constants.DOWNLOAD_PRIORITY_BACKFILL: 0,
+}
+
+DOWNLOAD_QUEUES = [constants.QUEUE_VIDEO_DOWNLOAD, constants.QUEUE_VIDEO_DOWNLOAD_SCHEDULED]
+
+POP_SCRIPT = client.register_script("""
+local popped = redis.call('ZPOPMIN', KEYS[1])
+if #popped == 0 then
+    return nil
+end
+local entry = redis.call('HGET', KEYS[2], popped[1])
+redis.call('HDEL', KEYS[2], popped[1])
+return entry
+""")
+
+# 选出被暂停的下载并标记，读取和标记在同一个脚本中完成，同时提交的多个任务不会选中同一个下载
+# ARGV: 各优先级的等级(JSON), 新任务的等级, 下载线程总数
+PREEMPT_SCRIPT = client.register_script("""
+local ranks = cjson.decode(ARGV[1])
+local rank = tonumber(ARGV[2])
+local slots = tonumber(ARGV[3])
+local running = redis.call('HGETALL', KEYS[1])
+local busy = 0
+local victim, victim_rank, victim_started
+for i = 1, #running, 2 do
+    local task_id = running[i]
+    if redis.call('SISMEMBER', KEYS[2], task_id) == 0 then
+        busy = busy + 1
+        local item = cjson.decode(running[i + 1])
+        local item_rank = ranks[item['priority']] or 0
+        if item_rank < rank and (victim == nil or item_rank < victim_rank
+                or (item_rank == victim_rank and item['started_at'] > victim_started)) then
+            victim, victim_rank, victim_started = task_id, item_rank, item['started_at']
+        end
+    end
+end
+if busy < slots or victim == nil then
+    return nil
+end
+redis.call('SADD', KEYS[2], victim)
+return victim
+""")
+
+
+def is_token(message) -> bool:
+    return message == TOKEN
+
+
+def get_queue(priority: str) -> str:
+    """手动下载的令牌放在手动队列，其余放在定时队列，两个队列的 worker 都按全局优先级取任务"""
+    if priority == constants.DOWNLOAD_PRIORITY_MANUAL:
+        return constants.QUEUE_VIDEO_DOWNLOAD
+    return constants.QUEUE_VIDEO_DOWNLOAD_SCHEDULED
+
+
+def get_slots() -> int:
+    return settings.DOWNLOAD_CONSUMERS * len(DOWNLOAD_QUEUES)
+
+
+def get_score(priority: str, enqueued_at: float) -> float:
+    """分数越小越先下载"""
+    return enqueued_at - PRIORITY_RANKS.get(priority, 0) * settings.DOWNLOAD_PRIORITY_AGING
+
+
+def push(task_id: int, message: dict, priority: str, enqueued_at: Optional[float] = None):
+    enqueued_at = enqueued_at or time.time()
+    entry = {'task_id': task_id, 'message': message, 'priority': priority, 'enqueued_at': enqueued_at}
+    pipeline = client.pipeline(transaction=False)
+    pipeline.hset(constants.REDIS_KEY_DOWNLOAD_QUEUE_ENTRIES, task_id, json.dumps(entry))
+    pipeline.zadd(constants.REDIS_KEY_DOWNLOAD_QUEUE, {task_id: get_score(priority, enqueued_at)})
+    pipeline.execute()
+
+
+def pop() -> Optional[dict]:
+    entry = POP_SCRIPT(keys=[constants.REDIS_KEY_DOWNLOAD_QUEUE, constants.REDIS_KEY_DOWNLOAD_QUEUE_ENTRIES])
+    return json.loads(entry) if entry else None
+
+
+def remove(task_id: int):
+    """任务被暂停或删除后不再调度，多出来的令牌取不到任务会直接结束"""
+    pipeline = client.pipeline(transaction=False)
+    pipeline.zrem(constants.REDIS_KEY_DOWNLOAD_QUEUE, task_id)
+    pipeline.hdel(constants.REDIS_KEY_DOWNLOAD_QUEUE_ENTRIES, task_id)
+    pipeline.execute()
+
+
+def start(task_id: int, priority: str):
+    client.hset(constants.REDIS_KEY_DOWNLOAD_RUNNING, task_id, json.dumps({
+        'priority': priority,
+        'started_at': time.time(),
+    }))
+
+
+def finish(task_id: int) -> bool:
+    """下载结束，清除运行和让位标记，返回是否曾被选中让位给高优先级任务"""
+    pipeline = client.pipeline(transaction=False)
+    pipeline.hdel(constants.REDIS_KEY_DOWNLOAD_RUNNING, task_id)
+    pipeline.srem(constants.REDIS_KEY_DOWNLOAD_PREEMPTED, task_id)
+    # 停止请求在下载结束后才发出时，标记不能留到下次下载
+    pipeline.delete(f'{constants.REDIS_KEY_VIDEO_DOWNLOAD_STATUS}:{task_id}')
+    return bool(pipeline.execute()[1])
+
+
+def preempt(priority: str) -> Optional[int]:
+    """
+    没有空闲的下载线程时，暂停一个优先级更低、最晚开始的下载，
+    被暂停的下载保留 .part 文件，按原来的入队时间重新排队，恢复后 yt-dlp 会续传
+    """
+    if not settings.DOWNLOAD_PREEMPT:
+        return None
+    victim = PREEMPT_SCRIPT(keys=[constants.REDIS_KEY_DOWNLOAD_RUNNING, constants.REDIS_KEY_DOWNLOAD_PREEMPTED],
+                            args=[json.dumps(PRIORITY_RANKS), PRIORITY_RANKS.get(priority, 0), get_slots()])
+    if victim is None:
+        return None
+    victim = int(victim)
+    download_service.stop(victim)
+    logger.info(f'暂停低优先级下载 {victim}，让位给 {priority} 任务')
+    return victim
@@ -1,4 +1,7 @@
 import logging
+from typing import List
+
+import dramatiq
 
 from cache import task_cache
 from common import constants
@@ -10,6 +13,8 @@ from services import video_service, message_service, subscription_service
 logger = logging.getLogger()
 client = RedisClient.get_instance().client
 
+STOP_FLAG_EXPIRE = 24 * 3600
+
 
 def __check_video_exists(url: str) -> bool:
     if video_service.get_video_by_url(url):
@@ -42,3 +47,44 @@ def start(params: VideoExtractDto):
     extract_task.process_extract_message.send(message.to_dict())
     task_cache.set_extract_cache(params.url, constants.VIDEO_EXTRACT_FIELD_NAME)
 
+
+def stop(task_id: int):
+    """
+    停止正在下载的任务
+    状态键用于下载尚未开始或订阅断开期间的请求，频道消息让下载进程立即得知
+    """
+    pipeline = client.pipeline(transaction=False)
+    pipeline.set(f'{constants.REDIS_KEY_VIDEO_DOWNLOAD_STATUS}:{task_id}', 'stop', ex=STOP_FLAG_EXPIRE)
+    pipeline.publish(constants.REDIS_CHANNEL_TASK_STOP, task_id)
+    pipeline.execute()
+
+
+def start_many(subscription_id: int, urls: List[str]):
+    """
+    批量提交订阅视频的解析任务，与逐个调用 start(only_extract=True) 等价，
+    但查库、查缓存、写消息和入队都按批处理。
+    """
+    urls = list(dict.fromkeys(urls))
+    if not urls:
+        return
+    if not __check_subscription_exist(subscription_id):
+        logger.info(f"subscription {subscription_id} is not exist")
+        return
+
+    existing_urls = video_service.get_existing_urls(urls)
+    urls = [url for url in urls if url not in existing_urls]
+    extracting = task_cache.get_extract_cache_many(urls)
+    urls = [url for url, extract_timestamp in zip(urls, extracting) if extract_timestamp is None]
+    if not urls:
+        return
+
+    contents = [
+        VideoExtractDto(url=url, subscribed=True, only_extract=True, subscription_id=subscription_id).model_dump()
+        for url in urls
+    ]
+    messages = message_service.create_messages(contents)
+    dramatiq.group([
+        extract_task.process_extract_message.message(message.to_dict()) for message in messages
+    ]).run()
+    task_cache.set_extract_cache_many(urls, constants.VIDEO_EXTRACT_FIELD_NAME)
+    logger.info(f"subscription {subscription_id}: submitted {len(urls)} videos for extraction")
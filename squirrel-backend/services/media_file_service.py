@@ -0,0 +1,104 @@
+import hashlib
+import logging
+import os
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import select, delete, update
+from sqlalchemy.dialects.mysql import insert
+
+from core.database import get_session
+from models.media_file import MediaFile
+
+logger = logging.getLogger()
+
+CHECKSUM_CHUNK_SIZE = 1024 * 1024
+SYNC_BATCH_SIZE = 500
+
+
+def quick_checksum(path: str, size: int) -> str:
+    """文件大小 + 首尾各 1MB 的 md5，用于识别文件被替换，避免读取整个视频文件"""
+    md5 = hashlib.md5(str(size).encode())
+    with open(path, 'rb') as f:
+        md5.update(f.read(CHECKSUM_CHUNK_SIZE))
+        if size > CHECKSUM_CHUNK_SIZE * 2:
+            f.seek(-CHECKSUM_CHUNK_SIZE, os.SEEK_END)
+            md5.update(f.read(CHECKSUM_CHUNK_SIZE))
+    return md5.hexdigest()
+
+
+def _file_values(path: str) -> dict:
+    stat_result = os.stat(path)
+    return {
+        'path': path,
+        'size': stat_result.st_size,
+        'container': os.path.splitext(path)[1].lstrip('.').lower() or None,
+        'mtime': stat_result.st_mtime,
+        'checksum': quick_checksum(path, stat_result.st_size),
+    }
+
+
+def save_media_file(video_id: int, path: str, codecs: Optional[str] = None):
+    """下载完成或找到本地文件时写入索引，已存在时覆盖"""
+    values = _file_values(path)
+    now = datetime.now()
+    stmt = insert(MediaFile).values(video_id=video_id, codecs=codecs, created_at=now, updated_at=now, **values)
+    update_values = {key: stmt.inserted[key] for key in values}
+    update_values['updated_at'] = stmt.inserted.updated_at
+    if codecs:
+        update_values['codecs'] = stmt.inserted.codecs
+    stmt = stmt.on_duplicate_key_update(**update_values)
+    with get_session() as session:
+        session.execute(stmt)
+        session.commit()
+
+
+def get_media_file(video_id: int) -> Optional[MediaFile]:
+    with get_session() as session:
+        return session.scalars(select(MediaFile).where(MediaFile.video_id == video_id)).first()
+
+
+def get_media_file_path(video_id: int) -> Optional[str]:
+    """返回索引中仍然存在的文件路径"""
+    media_file = get_media_file(video_id)
+    if media_file and os.path.isfile(media_file.path):
+        return media_file.path
+    return None
+
+
+def sync_media_files():
+    """
+    按 mtime/size 对比同步索引：文件已删除则删除索引，文件变化则更新大小和校验值
+    """
+    last_id = 0
+    removed = updated = 0
+    while True:
+        with get_session() as session:
+            media_files = session.scalars(
+                select(MediaFile).where(MediaFile.id > last_id).order_by(MediaFile.id).limit(SYNC_BATCH_SIZE)
+            ).all()
+            if not media_files:
+                break
+            last_id = media_files[-1].id
+
+            missing_ids = []
+            for media_file in media_files:
+                try:
+                    stat_result = os.stat(media_file.path)
+                except FileNotFoundError:
+                    missing_ids.append(media_file.id)
+                    continue
+                if stat_result.st_size == media_file.size and stat_result.st_mtime == media_file.mtime:
+                    continue
+                session.execute(
+                    update(MediaFile).where(MediaFile.id == media_file.id).values(**_file_values(media_file.path))
+                )
+                updated += 1
+
+            if missing_ids:
+                session.execute(delete(MediaFile).where(MediaFile.id.in_(missing_ids)))
+                removed += len(missing_ids)
+            session.commit()
+
+    if removed or updated:
+        logger.info(f'媒体文件索引同步完成，删除 {removed} 条，更新 {updated} 条')
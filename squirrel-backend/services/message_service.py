@@ -1,4 +1,8 @@
 import json
+from datetime import datetime
+from typing import List
+
+from sqlalchemy import insert
 
 from core.database import get_session
 from models.message import Message
@@ -11,3 +15,17 @@ def create_message(content: dict) -> Message:
         session.add(message)
         session.commit()
         return message
+
+
+def create_messages(contents: List[dict]) -> List[Message]:
+    """批量写入消息，只产生一次 INSERT；返回的消息不包含自增 id"""
+    if not contents:
+        return []
+    now = datetime.now()
+    rows = [
+        {'body': json.dumps(content), 'send_status': 'PENDING', 'retry_count': 0, 'created_at': now, 'updated_at': now}
+        for content in contents
+    ]
+    with get_session() as session:
+        session.execute(insert(Message), rows)
+    return [Message(**row) for row in rows]
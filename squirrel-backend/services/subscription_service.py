@@ -3,8 +3,11 @@ from typing import Optional, Tuple, List, Dict, Any
 from sqlalchemy import select, func, or_, and_
 
 from core.database import get_session
-from models.links import SubscriptionVideo
+from models import url_hash
 from models.subscription import Subscription
+from models.video_counter import VideoCounter
+from services import video_counter_service
+from subscribe.base import CrawlWatermark
 
 
 def get_subscription_by_id(subscription_id: int):
@@ -13,6 +16,21 @@ def get_subscription_by_id(subscription_id: int):
         return subscription
 
 
+def get_crawl_watermark(subscription: Subscription) -> Optional[CrawlWatermark]:
+    if not subscription.latest_video_id:
+        return None
+    return CrawlWatermark(subscription.latest_video_id, subscription.latest_published_at)
+
+
+def update_crawl_watermark(subscription_id: int, watermark: CrawlWatermark):
+    with get_session() as session:
+        subscription = session.get(Subscription, subscription_id)
+        if not subscription:
+            return
+        subscription.latest_video_id = watermark.video_id
+        subscription.latest_published_at = watermark.published_at
+
+
 def list_subscriptions(
         query: Optional[str],
         content_type: Optional[str],
@@ -21,24 +39,12 @@ def list_subscriptions(
 ) -> Tuple[List[Dict[str, Any]], int]:
     """获取订阅列表"""
     with get_session() as session:
-        video_count_subquery = (
-            select(
-                SubscriptionVideo.subscription_id,
-                func.count(SubscriptionVideo.video_id).label("video_count")
-            )
-            .group_by(SubscriptionVideo.subscription_id)
-            .subquery()
-        )
-
         statement = (
             select(
                 Subscription,
-                func.coalesce(video_count_subquery.c.video_count, 0).label("video_count")
-            )
-            .outerjoin(
-                video_count_subquery,
-                Subscription.id == video_count_subquery.c.subscription_id
+                func.coalesce(VideoCounter.video_count, 0).label("video_count")
             )
+            .outerjoin(VideoCounter, Subscription.id == VideoCounter.subscription_id)
             .where(Subscription.is_deleted == 0)
         )
 
@@ -58,12 +64,11 @@ def list_subscriptions(
 
         statement = statement.order_by(Subscription.created_at.desc())
 
-        total = session.execute(
-            select(Subscription.id)
+        total_count = session.scalar(
+            select(func.count(Subscription.id))
             .where(Subscription.is_deleted == 0)
             .where(*filters)
-        ).all()
-        total_count = len(total)
+        )
 
         statement = statement.offset((page - 1) * page_size).limit(page_size)
         results = session.execute(statement).all()
@@ -115,3 +120,22 @@ def toggle_status(subscription_id: int, status: bool, field: str) -> bool:
             return True
         except ValueError:
             return False
+
+
+def unsubscribe(subscription_id: Optional[int] = None, url: Optional[str] = None) -> bool:
+    with get_session() as session:
+        if subscription_id:
+            subscription = session.get(Subscription, subscription_id)
+        elif url:
+            subscription = session.scalars(select(Subscription).where(
+                Subscription.content_url_hash == url_hash(url),
+                Subscription.content_url == url)).first()
+        else:
+            return False
+        if not subscription or subscription.is_deleted:
+            return False
+
+        subscription.is_deleted = True
+        video_counter_service.on_subscription_deleted(session, subscription.id)
+        session.commit()
+        return True
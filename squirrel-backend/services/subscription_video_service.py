@@ -1,7 +1,13 @@
-from sqlalchemy import select
+from datetime import datetime
+from typing import Optional
 
-from core.database import get_session
+from sqlalchemy import select, insert
+from sqlalchemy.orm import Session
+
+from core.database import get_session, session_scope
 from models.links import SubscriptionVideo
+from models.video import Video
+from services import video_counter_service
 
 
 def get_subscription_video_by_video_id(video_id: int):
@@ -10,18 +16,23 @@ def get_subscription_video_by_video_id(video_id: int):
         return subscription_video
 
 
-def get_subscription_video(subscription_id, video_id):
-    with get_session() as session:
+def get_subscription_video(subscription_id, video_id, session: Optional[Session] = None):
+    with session_scope(session) as session:
         return session.scalars(select(SubscriptionVideo).where(
             SubscriptionVideo.subscription_id == subscription_id,
             SubscriptionVideo.video_id == video_id)).first()
 
 
-def create_subscription_video(subscription_id, video_id):
-    with get_session() as session:
-        subscription_video = SubscriptionVideo()
-        subscription_video.subscription_id = subscription_id
-        subscription_video.video_id = video_id
-        session.add(subscription_video)
-        session.commit()
-        return subscription_video
+def create_subscription_video(subscription_id, video_id, session: Optional[Session] = None) -> bool:
+    """关联订阅与视频，已关联时忽略；返回是否新建了关联"""
+    with session_scope(session) as session:
+        result = session.execute(insert(SubscriptionVideo).prefix_with('IGNORE').values(
+            subscription_id=subscription_id,
+            video_id=video_id,
+            created_at=datetime.now()
+        ))
+        if not result.rowcount:
+            return False
+        video = session.get(Video, video_id)
+        video_counter_service.increase(session, subscription_id, video.publish_date if video else None)
+        return True
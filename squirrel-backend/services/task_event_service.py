@@ -0,0 +1,132 @@
+import asyncio
+import json
+import logging
+from typing import Optional, Set
+
+from redis.client import Pipeline
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from common import constants
+from core.cache import RedisClient, AsyncRedisClient
+from models.task.download_task import DownloadTask
+
+logger = logging.getLogger()
+
+EVENT_CREATED = 'created'
+EVENT_STATUS = 'status'
+EVENT_PROGRESS = 'progress'
+
+SESSION_EVENTS_KEY = 'task_events'
+CLIENT_QUEUE_SIZE = 1000
+
+
+def publish(events: list, pipeline: Optional[Pipeline] = None):
+    """
+    发布任务事件，每个事件只包含变化的字段
+    传入 pipeline 时只加入命令，由调用方统一执行
+    """
+    if not events:
+        return
+    own_pipeline = pipeline is None
+    if own_pipeline:
+        pipeline = RedisClient.get_instance().client.pipeline(transaction=False)
+    for task_event in events:
+        pipeline.publish(constants.REDIS_CHANNEL_TASK_EVENTS, json.dumps(task_event))
+    if own_pipeline:
+        pipeline.execute()
+
+
+def publish_progress(task_id: int, progress: dict, pipeline: Optional[Pipeline] = None):
+    publish([{'type': EVENT_PROGRESS, 'id': task_id, **progress}], pipeline)
+
+
+def _status_event(event_type: str, task: DownloadTask) -> dict:
+    return {
+        'type': event_type,
+        'id': task.id,
+        'status': task.status,
+        'retry': task.retry,
+        'error_message': task.error_message,
+        'updated_at': task.updated_at.strftime('%Y-%m-%d %H:%M:%S') if task.updated_at else None,
+    }
+
+
+# 任务新增或状态变化时记录到 session，提交成功后再发布，回滚的修改不会通知前端
+@event.listens_for(DownloadTask, 'after_insert')
+def _on_task_inserted(mapper, connection, target: DownloadTask):
+    object_session(target).info.setdefault(SESSION_EVENTS_KEY, []).append(_status_event(EVENT_CREATED, target))
+
+
+@event.listens_for(DownloadTask, 'after_update')
+def _on_task_updated(mapper, connection, target: DownloadTask):
+    state = inspect(target)
+    if state.attrs.status.history.has_changes() or state.attrs.retry.history.has_changes():
+        object_session(target).info.setdefault(SESSION_EVENTS_KEY, []).append(_status_event(EVENT_STATUS, target))
+
+
+@event.listens_for(Session, 'after_commit')
+def _on_commit(session: Session):
+    events = session.info.pop(SESSION_EVENTS_KEY, None)
+    if events:
+        try:
+            publish(events)
+        except Exception as e:
+            logger.warning(f'发布任务事件失败: {e}')
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _on_rollback(session: Session, previous_transaction):
+    session.info.pop(SESSION_EVENTS_KEY, None)
+
+
+class TaskEventHub:
+    """
+    进程内唯一的任务事件订阅者，收到的事件分发给所有 SSE 连接
+    打开多少个页面都只有一个 Redis 订阅，事件循环中不再轮询数据库
+    """
+
+    def __init__(self):
+        self._queues: Set[asyncio.Queue] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self) -> asyncio.Queue:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        queue = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
+        self._queues.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._queues.discard(queue)
+
+    def _dispatch(self, task_event: dict):
+        for queue in list(self._queues):
+            # 客户端消费过慢时丢弃最旧的事件，进度事件只需要最新值
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(task_event)
+
+    async def _run(self):
+        while True:
+            pubsub = AsyncRedisClient.get_instance().client.pubsub()
+            try:
+                await pubsub.subscribe(constants.REDIS_CHANNEL_TASK_EVENTS)
+                async for message in pubsub.listen():
+                    if message['type'] == 'message':
+                        self._dispatch(json.loads(message['data']))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f'任务事件订阅中断，1 秒后重连: {e}')
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+task_event_hub = TaskEventHub()
@@ -10,7 +10,9 @@ from models.subscription import Subscription
 from models.task.download_task import DownloadTask
 from models.task.task_state import TaskState
 from models.video import Video
-from services import download_service
+from services import download_service, download_scheduler
+# 注册任务变更监听，提交后发布任务事件
+from services import task_event_service  # noqa: F401
 
 
 def create_task(video_id: int, url: str) -> DownloadTask:
@@ -57,13 +59,15 @@ def pause_download(task_id: int):
         if task:
             task.status = 'PAUSED'
             session.commit()
-            download_service.stop(task.task_id)
+            download_scheduler.remove(task.id)
+            download_service.stop(task.id)
 
 
 def delete_task(task_id: int):
     with get_session() as session:
         session.query(DownloadTask).filter(DownloadTask.id == task_id).delete()
         session.commit()
+    download_scheduler.remove(task_id)
 
 
 def list_tasks(status: str, page: int, page_size: int) -> Tuple[List[dict], int]:
@@ -141,3 +145,18 @@ def generate_task_data(tasks: List[DownloadTask]):
                 })
 
     return task_data
+
+
+def get_tasks_data(task_ids: List[int]):
+    if not task_ids:
+        return []
+    with get_session() as session:
+        tasks = session.scalars(select(DownloadTask).where(DownloadTask.id.in_(task_ids))).all()
+    return generate_task_data(tasks)
+
+
+def get_new_tasks_data(latest_task_id: int):
+    with get_session() as session:
+        tasks = session.scalars(select(DownloadTask).where(DownloadTask.id > latest_task_id).order_by(
+            DownloadTask.id.desc()).limit(30)).all()
+    return generate_task_data(tasks)
@@ -0,0 +1,102 @@
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import select, func, case, delete
+from sqlalchemy.dialects.mysql import insert
+from sqlalchemy.orm import Session
+
+from core.database import get_session
+from models.links import SubscriptionVideo
+from models.subscription import Subscription
+from models.video import Video
+from models.video_counter import VideoCounter, GLOBAL_COUNTER_ID
+
+
+def _upsert_delta(session: Session, subscription_id: int, video_delta: int, preview_delta: int):
+    stmt = insert(VideoCounter).values(
+        subscription_id=subscription_id,
+        video_count=max(video_delta, 0),
+        preview_count=max(preview_delta, 0),
+        updated_at=datetime.now()
+    )
+    stmt = stmt.on_duplicate_key_update(
+        video_count=VideoCounter.video_count + video_delta,
+        preview_count=VideoCounter.preview_count + preview_delta,
+        updated_at=stmt.inserted.updated_at
+    )
+    session.execute(stmt)
+
+
+def increase(session: Session, subscription_id: int, publish_date: Optional[datetime]):
+    """新增订阅视频关联时调用，需与关联写入处于同一事务"""
+    is_preview = 1 if publish_date and publish_date > datetime.now() else 0
+    _upsert_delta(session, subscription_id, 1, is_preview)
+    subscription = session.get(Subscription, subscription_id)
+    if subscription and not subscription.is_deleted:
+        _upsert_delta(session, GLOBAL_COUNTER_ID, 1, is_preview)
+
+
+def on_subscription_deleted(session: Session, subscription_id: int):
+    """订阅被删除时，从全局计数中扣除该订阅的视频数"""
+    counter = session.get(VideoCounter, subscription_id)
+    if counter:
+        _upsert_delta(session, GLOBAL_COUNTER_ID, -counter.video_count, -counter.preview_count)
+
+
+def on_subscription_restored(session: Session, subscription_id: int):
+    """已删除的订阅重新订阅时，将该订阅的视频数加回全局计数"""
+    counter = session.get(VideoCounter, subscription_id)
+    if counter:
+        _upsert_delta(session, GLOBAL_COUNTER_ID, counter.video_count, counter.preview_count)
+
+
+def get_counts(subscription_id: Optional[int] = None) -> Dict[str, int]:
+    with get_session() as session:
+        counter = session.get(VideoCounter, subscription_id or GLOBAL_COUNTER_ID)
+        if not counter:
+            return {'video_count': 0, 'preview_count': 0}
+        return {'video_count': counter.video_count, 'preview_count': counter.preview_count}
+
+
+def rebuild():
+    """
+    全量重算计数器。
+    预告视频会随时间变为已发布，因此需要定时重算来修正 preview_count。
+    """
+    with get_session() as session:
+        rows = session.execute(
+            select(
+                SubscriptionVideo.subscription_id,
+                func.count(SubscriptionVideo.video_id),
+                func.sum(case((Video.publish_date > datetime.now(), 1), else_=0))
+            )
+            .join(Video, Video.id == SubscriptionVideo.video_id)
+            .group_by(SubscriptionVideo.subscription_id)
+        ).all()
+        deleted_ids = set(session.scalars(select(Subscription.id).where(Subscription.is_deleted == 1)).all())
+
+        now = datetime.now()
+        counters = []
+        total_video_count = 0
+        total_preview_count = 0
+        for subscription_id, video_count, preview_count in rows:
+            preview_count = int(preview_count or 0)
+            counters.append({
+                'subscription_id': subscription_id,
+                'video_count': video_count,
+                'preview_count': preview_count,
+                'updated_at': now
+            })
+            if subscription_id not in deleted_ids:
+                total_video_count += video_count
+                total_preview_count += preview_count
+        counters.append({
+            'subscription_id': GLOBAL_COUNTER_ID,
+            'video_count': total_video_count,
+            'preview_count': total_preview_count,
+            'updated_at': now
+        })
+
+        session.execute(delete(VideoCounter))
+        session.execute(insert(VideoCounter), counters)
+        session.commit()
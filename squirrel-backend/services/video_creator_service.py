@@ -1,20 +1,36 @@
-from sqlalchemy import select
+from datetime import datetime
+from typing import List, Optional
 
-from core.database import get_session
+from sqlalchemy import select, insert
+from sqlalchemy.orm import Session
+
+from core.database import session_scope
 from models.links import VideoCreator
 
 
-def get_video_creator(video_id: int, creator_id: int):
-    with get_session() as session:
+def get_video_creator(video_id: int, creator_id: int, session: Optional[Session] = None):
+    with session_scope(session) as session:
         video_creator = session.scalars(select(VideoCreator).where(
             VideoCreator.video_id == video_id,
             VideoCreator.creator_id == creator_id)).first()
         return video_creator
 
 
-def create_video_creator(video_id: int, creator_id: int):
-    with get_session() as session:
+def create_video_creator(video_id: int, creator_id: int, session: Optional[Session] = None):
+    with session_scope(session) as session:
         video_creator = VideoCreator(video_id=video_id, creator_id=creator_id)
         session.add(video_creator)
-        session.commit()
+        session.flush()
         return video_creator
+
+
+def create_video_creators(video_id: int, creator_ids: List[int], session: Optional[Session] = None):
+    """批量关联视频与创作者，已存在的关联会被忽略"""
+    if not creator_ids:
+        return
+    with session_scope(session) as session:
+        now = datetime.now()
+        session.execute(insert(VideoCreator).prefix_with('IGNORE'), [
+            {'video_id': video_id, 'creator_id': creator_id, 'created_at': now}
+            for creator_id in set(creator_ids)
+        ])
@@ -1,6 +1,7 @@
+import logging
 import re
 from datetime import datetime
-from typing import List, Tuple
+from typing import List, Optional, Set, Tuple
 from urllib.parse import quote
 
 import cloudscraper
@@ -9,34 +10,67 @@ import requests
 from bs4 import BeautifulSoup
 from phub import Quality
 from pytubefix import YouTube
-from sqlalchemy import func, select, or_
+from sqlalchemy import func, select, or_, and_
+from sqlalchemy.dialects import mysql
+from sqlalchemy.orm import Session
 
-from core.database import get_session
+from cache import video_url_cache
+from core.cache import DistributedLock
+from core.database import get_session, session_scope
 from dto.video_dto import VideoExtractDto
+from models import url_hash
 from models.creator import Creator
 from models.links import VideoCreator, SubscriptionVideo
 from models.subscription import Subscription
 from models.video import Video
-from services import download_service, subscription_video_service
+from services import download_service, subscription_video_service, video_counter_service
 from utils import url_helper
 from utils.cookie import filter_cookies_to_query_string
+from utils.cursor import encode_cursor, decode_cursor
 from utils.url_helper import extract_top_level_domain
 
+logger = logging.getLogger()
 
-def get_video_by_url(url: str) -> Video:
-    with get_session() as session:
-        video = session.scalars(select(Video).where(Video.url == url)).first()
+# 按 URL 批量查询时每条 IN 语句的最大参数个数
+URL_LOOKUP_BATCH_SIZE = 1000
+
+# 目前各平台均只解析最高画质
+DEFAULT_VIDEO_QUALITY = 'best'
+VIDEO_URL_RESOLVE_TIMEOUT = 30
+# 解析可能超过等待时间，锁的有效期需要更长，避免解析过程中锁过期后其他请求重复解析
+VIDEO_URL_LOCK_TTL = VIDEO_URL_RESOLVE_TIMEOUT * 4
+
+# MySQL 全文检索 BOOLEAN MODE 中的运算符
+FULLTEXT_OPERATORS = r'[+\-<>()~*"@]'
+
+
+def get_video_by_url(url: str, session: Optional[Session] = None) -> Video:
+    with session_scope(session) as session:
+        video = session.scalars(select(Video).where(Video.url_hash == url_hash(url), Video.url == url)).first()
         return video
 
 
-def get_video_by_id(video_id: int) -> Video:
-    with get_session() as session:
+def get_existing_urls(urls: List[str], session: Optional[Session] = None) -> Set[str]:
+    """返回 urls 中已入库的视频地址"""
+    existing_urls = set()
+    with session_scope(session) as session:
+        for i in range(0, len(urls), URL_LOOKUP_BATCH_SIZE):
+            batch = urls[i:i + URL_LOOKUP_BATCH_SIZE]
+            existing_urls.update(session.scalars(select(Video.url).where(
+                Video.url_hash.in_([url_hash(url) for url in batch]),
+                Video.url.in_(batch))).all())
+    return existing_urls
+
+
+def get_video_by_id(video_id: int, session: Optional[Session] = None) -> Video:
+    with session_scope(session) as session:
         video = session.get(Video, video_id)
         return video
 
 
-def create_video(url: str, title: str, publish_date: datetime, thumbnail: str, duration: int) -> Video:
-    with get_session() as session:
+def create_video(url: str, title: str, publish_date: datetime, thumbnail: str, duration: int,
+                 session: Optional[Session] = None) -> Video:
+    with session_scope(session) as session:
         video = Video()
         video.url = url
         video.title = title
@@ -44,11 +78,47 @@ def create_video(url: str, title: str, publish_date: datetime, thumbnail: str, d
         video.thumbnail = thumbnail
         video.duration = duration
         session.add(video)
-        session.commit()
+        session.flush()
         return video
 
 
-def get_video_url(video_id: int) -> dict:
+def get_video_url(video_id: int, quality: str = DEFAULT_VIDEO_QUALITY) -> dict:
+    """
+    获取视频播放地址，解析结果按 CDN 地址的过期时间缓存
+    同一视频同时只有一个请求去解析，其余请求等待后直接读取缓存
+    """
+    video_urls = video_url_cache.get_video_urls(video_id, quality)
+    if video_urls is not None:
+        return video_urls
+
+    lock = DistributedLock(video_url_cache.build_lock_key(video_id, quality))
+    acquired = lock.acquire(timeout=VIDEO_URL_RESOLVE_TIMEOUT, ttl=VIDEO_URL_LOCK_TTL)
+    try:
+        if acquired:
+            video_urls = video_url_cache.get_video_urls(video_id, quality)
+            if video_urls is not None:
+                return video_urls
+        video_urls = _resolve_video_url(video_id)
+        if video_urls:
+            video_url_cache.set_video_urls(video_id, quality, video_urls)
+        return video_urls
+    finally:
+        if acquired:
+            lock.release()
+
+
+def preresolve_video_urls(video_ids: List[int], quality: str = DEFAULT_VIDEO_QUALITY):
+    """后台预先解析列表页视频的播放地址"""
+    for video_id in video_ids:
+        if video_url_cache.get_video_urls(video_id, quality) is not None:
+            continue
+        try:
+            get_video_url(video_id, quality)
+        except Exception as e:
+            logger.warning(f'预解析视频播放地址失败: video_id={video_id}, {e}')
+
+
+def _resolve_video_url(video_id: int) -> dict:
     with get_session() as session:
         video = session.get(Video, video_id)
         video_domain = extract_top_level_domain(video.url)
@@ -143,9 +213,28 @@ def extract_parts_from_html_content(html_content):
     return None
 
 
-def list_videos(query: str, subscription_id: int, category: str, sort_by: str, page: int, page_size: int) -> \
-        Tuple[
-            List[dict], int, dict]:
+def _title_match(query: str):
+    """
+    构造标题全文检索表达式（BOOLEAN MODE），每个关键字都必须命中，并支持前缀匹配。
+    video.title 上的全文索引使用 ngram 分词，适用于中日韩标题。
+    """
+    keywords = [re.sub(FULLTEXT_OPERATORS, ' ', keyword).strip() for keyword in query.split()]
+    keywords = [keyword for keyword in keywords if keyword]
+    if not keywords:
+        return None
+    against = ' '.join(f'+{keyword}*' for keyword in keywords)
+    return mysql.match(Video.title, against=against).in_boolean_mode()
+
+
+def list_videos(query: str, subscription_id: int, category: str, sort_by: str, page: int, page_size: int,
+                cursor: Optional[str] = None) -> Tuple[List[dict], int, dict, Optional[str]]:
+    """
+    获取视频列表，支持两种分页方式：
+    - page: 传统的 OFFSET 分页，保留用于兼容
+    - cursor: 基于 (排序字段, id) 的游标分页，翻页深度不影响查询耗时
+    有搜索关键字时走标题全文索引，结果按相关度排序并使用 page 分页
+    """
+    sort_column = Video.created_at if sort_by == 'created_at' else Video.publish_date
     base_query = (
         select(Video, SubscriptionVideo)
         .join(SubscriptionVideo, Video.id == SubscriptionVideo.video_id)
@@ -158,35 +247,46 @@ def list_videos(query: str, subscription_id: int, category: str, sort_by: str, p
         base_query = base_query.where(Video.publish_date <= datetime.now())
     if subscription_id:
         base_query = base_query.where(SubscriptionVideo.subscription_id == subscription_id)
-    if query:
-        base_query = base_query.where(or_(Video.title.like(f'%{query}%')))
-    # Sort by appropriate fields from Video table
-    if sort_by == 'created_at':
-        base_query = base_query.order_by(Video.created_at.desc())
+    title_match = _title_match(query) if query else None
+    if title_match is None and query and query.strip():
+        # 关键字只包含全文检索运算符，去掉运算符后没有可匹配的内容
+        video_counts = video_counter_service.get_counts(subscription_id)
+        counts = {"all": 0, "read": 0, "unread": 0, "preview": video_counts['preview_count'], "liked": 0}
+        return [], 0, counts, None
+    if title_match is not None:
+        base_query = base_query.where(title_match > 0).order_by(title_match.desc(), Video.id.desc())
     else:
-        base_query = base_query.order_by(Video.publish_date.desc())
-
-    offset = (page - 1) * page_size
+        # Sort by appropriate fields from Video table, id keeps the order stable for keyset pagination
+        base_query = base_query.order_by(sort_column.desc(), Video.id.desc())
+
+    cursor_position = decode_cursor(cursor) if title_match is None else None
+    if cursor_position:
+        cursor_value, cursor_id = cursor_position
+        base_query = base_query.where(or_(
+            sort_column < cursor_value,
+            and_(sort_column == cursor_value, Video.id < cursor_id)
+        ))
+    else:
+        base_query = base_query.offset((page - 1) * page_size)
 
     with (get_session() as session):
-        base_query = base_query.offset(offset).limit(page_size)
+        base_query = base_query.limit(page_size)
         results = session.execute(base_query).all()
-        # Count query modifications
-        total_count_query = (
-            select(func.count(Video.id))
-            .join(SubscriptionVideo, Video.id == SubscriptionVideo.video_id)
-            .join(Subscription, Subscription.id == SubscriptionVideo.subscription_id)
-            .where(Subscription.is_deleted == 0)
-        )
-        preview_query = total_count_query.where(Video.publish_date > datetime.now())
-        if subscription_id:
-            total_count_query = total_count_query.where(SubscriptionVideo.subscription_id == subscription_id)
-            preview_query = preview_query.where(SubscriptionVideo.subscription_id == subscription_id)
-        if query:
-            total_count_query = total_count_query.where(Video.title.like(f'%{query}%'))
-
-        total_count = session.scalar(total_count_query)
-        total_preview_count = session.scalar(preview_query)
+        # Counts are read from the materialized counters, only keyword search still needs a live count
+        video_counts = video_counter_service.get_counts(subscription_id)
+        total_count = video_counts['video_count']
+        total_preview_count = video_counts['preview_count']
+        if title_match is not None:
+            total_count_query = (
+                select(func.count(Video.id))
+                .join(SubscriptionVideo, Video.id == SubscriptionVideo.video_id)
+                .join(Subscription, Subscription.id == SubscriptionVideo.subscription_id)
+                .where(Subscription.is_deleted == 0)
+                .where(title_match > 0)
+            )
+            if subscription_id:
+                total_count_query = total_count_query.where(SubscriptionVideo.subscription_id == subscription_id)
+            total_count = session.scalar(total_count_query)
         # Note: Since we're using Video table now, we'll need to adjust these counts
         # or implement different logic for read/unread/liked status
 
@@ -239,7 +339,13 @@ def list_videos(query: str, subscription_id: int, category: str, sort_by: str, p
             "liked": 0
         }
 
-        return video_list, total_count, counts
+        next_cursor = None
+        if title_match is None and len(results) == page_size:
+            last_video, _ = results[-1]
+            last_value = last_video.created_at if sort_by == 'created_at' else last_video.publish_date
+            next_cursor = encode_cursor(last_value, last_video.id)
+
+        return video_list, total_count, counts, next_cursor
 
 
 def download_video(video_id: int):
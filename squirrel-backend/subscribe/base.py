@@ -1,14 +1,67 @@
 import abc
-from typing import List
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional, Set, Tuple
 
+from core.config import settings
 from meta.channel import SubscriptionMeta
 
+logger = logging.getLogger()
+
+
+@dataclass
+class CrawlWatermark:
+    """Newest video seen by a channel crawl, used to stop the next crawl early"""
+    video_id: Optional[str] = None
+    published_at: Optional[datetime] = None
+
+    def reached(self, video_id: str, published_at: Optional[datetime] = None) -> bool:
+        """Whether the crawl has walked back to a video the previous crawl already saw"""
+        if self.video_id and video_id == self.video_id:
+            return True
+        # The watermark video may have been removed from the channel, fall back to its publish time
+        return bool(self.published_at and published_at and published_at < self.published_at)
+
 
 class BaseSubscription(abc.ABC):
     """Abstract base class for channel subscription implementations"""
 
     def __init__(self, url: str):
         self.url = url
+        # Videos listed by get_subscribe_videos, newest first
+        self.crawled: List[Tuple[str, CrawlWatermark]] = []
+        self._watermark_reached = False
+
+    def _observe(self, video_url: str, video_id: str, published_at: Optional[datetime] = None):
+        """Record a listed video"""
+        self.crawled.append((video_url, CrawlWatermark(video_id, published_at)))
+
+    def _reached(self, watermark: Optional[CrawlWatermark], listed: int, video_id: str,
+                 published_at: Optional[datetime] = None) -> bool:
+        """
+        Whether an incremental crawl can stop here. The newest CHANNEL_UPDATE_DEFAULT_SIZE videos are always
+        listed, like a crawl without a watermark, so videos whose extraction failed are submitted again.
+        """
+        if not watermark:
+            return False
+        if watermark.reached(video_id, published_at):
+            self._watermark_reached = True
+        return self._watermark_reached and listed >= settings.CHANNEL_UPDATE_DEFAULT_SIZE
+
+    def _page_limit_reached(self, watermark: Optional[CrawlWatermark], pages: int) -> bool:
+        """Incremental crawls stop after CHANNEL_CRAWL_MAX_PAGES pages even if the watermark was not found"""
+        if not watermark or pages < settings.CHANNEL_CRAWL_MAX_PAGES:
+            return False
+        logger.warning(f'Watermark {watermark.video_id} not found in the first {pages} pages of {self.url}')
+        return True
+
+    def get_persisted_watermark(self, persisted_urls: Set[str]) -> Optional[CrawlWatermark]:
+        """
+        The newest listed video that has been saved. Videos that are still queued or failed to extract stay
+        above the watermark, so the next crawl lists them again.
+        """
+        return next((watermark for video_url, watermark in self.crawled if video_url in persisted_urls), None)
 
     @abc.abstractmethod
     def get_subscribe_info(self) -> SubscriptionMeta:
@@ -16,6 +69,15 @@ class BaseSubscription(abc.ABC):
         pass
 
     @abc.abstractmethod
-    def get_subscribe_videos(self, extract_all: bool) -> List[str]:
-        """Get list of video URLs from the channel"""
+    def get_subscribe_videos(self, extract_all: bool, watermark: Optional[CrawlWatermark] = None) -> List[str]:
+        """
+        Get list of video URLs from the channel, newest first.
+
+        With a watermark, pages are walked until a video seen by the previous crawl shows up and only
+        newer videos are returned; extract_all is ignored in that case.
+        """
         pass
+
+    def get_total_videos(self) -> int:
+        """Get the number of videos on the channel"""
+        return len(self.get_subscribe_videos(extract_all=True))
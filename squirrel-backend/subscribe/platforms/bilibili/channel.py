@@ -1,17 +1,21 @@
 import logging
 import re
+from datetime import datetime
+from typing import Optional
 
-import requests
 from bs4 import BeautifulSoup
 
 from common.http_wrapper import session
 from meta.channel import SubscriptionMeta
 from utils.cookie import filter_cookies_to_query_string
-from .sign import sign
-from ...base import BaseSubscription
+from .sign import sign, invalidate_wbi_keys
+from ...base import BaseSubscription, CrawlWatermark
 
 logger = logging.getLogger()
 
+# -403 访问权限不足 / -352 风控校验失败，通常是 wbi 签名失效
+WBI_REJECTED_CODES = (-403, -352)
+
 
 class BilibiliSubscription(BaseSubscription):
     DOMAIN = 'bilibili.com'
@@ -45,62 +49,73 @@ class BilibiliSubscription(BaseSubscription):
 
         return SubscriptionMeta(mid, channel_name, avatar_url, self.url)
 
-    def get_subscribe_videos(self, extract_all: bool):
+    def _get_headers(self):
         cookies = filter_cookies_to_query_string(self.url)
-        headers = {
+        return {
             'Referer': self.url,
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3',
             'Cookie': cookies
         }
 
+    def _search_page(self, headers: dict, page_number: int, page_size: int = 25):
         params = {
             'mid': self.get_mid(),
-            'ps': 25,
-            'pn': 1,
+            'ps': page_size,
+            'pn': page_number,
             'index': 1,
             'order': 'pubdate',
             'platform': 'web',
             'web_location': 1550101
         }
-        video_list = []
-
-        should_continue = True
-        while should_continue:
-            query = sign(params)
+        for attempt in range(2):
+            query = sign(dict(params))
             req_url = f'https://api.bilibili.com/x/space/wbi/arc/search?{query}'
             resp = session.get(req_url, headers=headers)
             if resp.status_code != 200:
                 raise Exception('Request failed')
+            resp_json = resp.json()
+            # 签名被拒绝时 key 可能已经轮换，刷新后重试一次
+            if resp_json.get('code') in WBI_REJECTED_CODES and attempt == 0:
+                invalidate_wbi_keys()
+                continue
+            if 'data' not in resp_json:
+                raise Exception(f'Request failed: {resp_json.get("message")}')
+            return resp_json['data']
+
+    def get_total_videos(self):
+        data = self._search_page(self._get_headers(), 1, page_size=1)
+        return data['page']['count']
+
+    def get_subscribe_videos(self, extract_all: bool, watermark: Optional[CrawlWatermark] = None):
+        headers = self._get_headers()
+        page_number = 1
+        video_list = []
 
-            info = resp.json()
-            page = info['data']['page']
+        should_continue = True
+        while should_continue:
+            data = self._search_page(headers, page_number)
+            page = data['page']
             total_page = page['count'] / page['ps']
 
-            for v in info['data']['list']['vlist']:
+            for v in data['list']['vlist']:
+                published_at = datetime.fromtimestamp(v['created']) if v.get('created') else None
+                if self._reached(watermark, len(video_list), v['bvid'], published_at):
+                    return video_list
                 if v['is_union_video'] == 1:
                     continue
+                # 多P视频在解析阶段由 yt-dlp 识别为 playlist 后跳过，这里不再逐个请求 view 接口
+                video_url = f'https://www.bilibili.com/video/{v["bvid"]}'
+                self._observe(video_url, v['bvid'], published_at)
+                video_list.append(video_url)
 
-                req_url = f'https://api.bilibili.com/x/web-interface/wbi/view?bvid={v["bvid"]}'
-                resp = requests.get(req_url, headers=headers)
-                if resp.status_code != 200:
-                    raise Exception('Request failed')
-
-                resp_json = resp.json()
-                if 'data' not in resp_json:
-                    logger.error(resp.json())
-                    continue
-                video_info = resp.json()['data']
-                if 'pages' in video_info and len(video_info['pages']) > 1:
-                    continue
-
-                video_list.append(f'https://www.bilibili.com/video/{v["bvid"]}')
-
-            if params['pn'] < int(total_page) + 1:
-                params['pn'] += 1
+            if page_number < int(total_page) + 1:
+                page_number += 1
             else:
                 should_continue = False
 
-            if not extract_all:
+            if not extract_all and not watermark:
+                should_continue = False
+            if should_continue and self._page_limit_reached(watermark, page_number - 1):
                 should_continue = False
 
         return video_list
@@ -1,10 +1,21 @@
+import datetime
+import logging
+import threading
 import time
 import urllib.parse
-from functools import reduce
+from functools import lru_cache
 from hashlib import md5
 
 import requests
 
+from core.cache import RedisClient
+
+logger = logging.getLogger()
+client = RedisClient.get_instance().client
+
+REDIS_KEY_WBI_KEYS = 'bilibili:wbi:keys'
+REDIS_KEY_WBI_STATS = 'bilibili:wbi:stats'
+
 mixinKeyEncTab = [
     46, 47, 18, 2, 53, 8, 23, 32, 15, 50, 10, 31, 58, 3, 45, 35, 27, 43, 5, 49,
     33, 9, 42, 19, 29, 28, 14, 39, 12, 38, 41, 13, 37, 48, 7, 16, 24, 55, 40,
@@ -13,9 +24,10 @@ mixinKeyEncTab = [
 ]
 
 
+@lru_cache(maxsize=8)
 def get_mixin_key(orig: str):
-    """对 imgKey 和 subKey 进行字符顺序打乱编码"""
-    return reduce(lambda s, i: s + orig[i], mixinKeyEncTab, '')[:32]
+    """对 imgKey 和 subKey 进行字符顺序打乱编码，同一对 key 只计算一次"""
+    return ''.join(orig[i] for i in mixinKeyEncTab)[:32]
 
 
 def enc_wbi(params: dict, img_key: str, sub_key: str):
@@ -53,8 +65,74 @@ def get_wbi_keys() -> tuple[str, str]:
     return img_key, sub_key
 
 
+_keys_lock = threading.Lock()
+_cached_keys: dict = {}
+# 本进程的命中统计，每次签名都写 Redis 的话缓存就没有意义了
+_local_stats = {'memory_hit': 0, 'redis_hit': 0, 'miss': 0}
+
+
+def _seconds_until_tomorrow() -> int:
+    now = datetime.datetime.now()
+    tomorrow = datetime.datetime.combine(now.date() + datetime.timedelta(days=1), datetime.time.min)
+    return max(int((tomorrow - now).total_seconds()), 1)
+
+
+def get_cached_wbi_keys() -> tuple[str, str]:
+    """
+    获取缓存的 img_key 和 sub_key
+    key 每天更新一次，先查进程内缓存，再查 Redis，都没有时才请求 nav 接口
+    """
+    today = datetime.date.today().isoformat()
+    with _keys_lock:
+        if _cached_keys.get('date') == today:
+            _local_stats['memory_hit'] += 1
+            return _cached_keys['img_key'], _cached_keys['sub_key']
+
+        cached = client.hgetall(REDIS_KEY_WBI_KEYS)
+        if cached.get('date') == today:
+            _local_stats['redis_hit'] += 1
+        else:
+            _local_stats['miss'] += 1
+            img_key, sub_key = get_wbi_keys()
+            cached = {'img_key': img_key, 'sub_key': sub_key, 'date': today}
+            pipeline = client.pipeline(transaction=False)
+            pipeline.hset(REDIS_KEY_WBI_KEYS, mapping=cached)
+            pipeline.expire(REDIS_KEY_WBI_KEYS, _seconds_until_tomorrow())
+            pipeline.hincrby(REDIS_KEY_WBI_STATS, 'refresh', 1)
+            pipeline.hset(REDIS_KEY_WBI_STATS, 'last_refresh_at', round(time.time()))
+            pipeline.execute()
+            logger.info(f'wbi keys refreshed: img_key={img_key}, sub_key={sub_key}')
+
+        _cached_keys.clear()
+        _cached_keys.update(cached)
+        return cached['img_key'], cached['sub_key']
+
+
+def invalidate_wbi_keys():
+    """签名被拒绝时调用，下次签名会重新获取 key"""
+    with _keys_lock:
+        _cached_keys.clear()
+        pipeline = client.pipeline(transaction=False)
+        pipeline.delete(REDIS_KEY_WBI_KEYS)
+        pipeline.hincrby(REDIS_KEY_WBI_STATS, 'invalidate', 1)
+        pipeline.execute()
+    logger.warning('wbi keys invalidated')
+
+
+def get_wbi_stats() -> dict:
+    """
+    key 缓存统计
+    所有进程共享：refresh 请求 nav 接口刷新的次数，invalidate 因签名被拒绝而失效的次数，last_refresh_at 最近刷新时间
+    本进程：memory_hit/redis_hit 命中进程内缓存/Redis 的次数，miss 未命中的次数
+    """
+    stats = {key: int(value) for key, value in client.hgetall(REDIS_KEY_WBI_STATS).items()}
+    with _keys_lock:
+        stats.update(_local_stats)
+    return stats
+
+
 def sign(params: dict):
     """为请求参数进行 wbi 签名"""
-    img_key, sub_key = get_wbi_keys()
+    img_key, sub_key = get_cached_wbi_keys()
     signed_params = enc_wbi(params, img_key, sub_key)
     return urllib.parse.urlencode(signed_params)
@@ -1,12 +1,14 @@
 import re
+from typing import Optional
 from urllib.parse import urlparse
 
 from bs4 import BeautifulSoup
 
 from common.http_wrapper import session
+from downloader.id_extractor import extract_pornhub_id
 from meta.channel import SubscriptionMeta
 from utils.cookie import filter_cookies_to_query_string
-from ..base import BaseSubscription
+from ..base import BaseSubscription, CrawlWatermark
 
 
 class PornhubSubscription(BaseSubscription):
@@ -55,7 +57,7 @@ class PornhubSubscription(BaseSubscription):
 
         return SubscriptionMeta(channel_id, name, avatar, url)
 
-    def get_subscribe_videos(self, extract_all: bool):
+    def get_subscribe_videos(self, extract_all: bool, watermark: Optional[CrawlWatermark] = None):
         cookies = filter_cookies_to_query_string(self.url)
         headers = {
             'user-agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36',
@@ -89,7 +91,16 @@ class PornhubSubscription(BaseSubscription):
             video_els.extend(bs4.select('#profileContent .videos:not(#privateVideosSection) a.videoPreviewBg'))
             video_els.extend(bs4.select('#pornstarsVideoSection .videoPreviewBg'))
             for el in video_els:
-                video_list.append(f'{base_url}{el["href"]}')
+                video_url = f'{base_url}{el["href"]}'
+                try:
+                    video_id = extract_pornhub_id(video_url)
+                except ValueError:
+                    # 列表中混有不是视频页的链接
+                    continue
+                if self._reached(watermark, len(video_list), video_id):
+                    return video_list
+                self._observe(video_url, video_id)
+                video_list.append(video_url)
 
             new_page = int(bs4.select('.page_next')[0].find_previous().text) if len(page_next_list) > 0 else 1
 
@@ -97,7 +108,9 @@ class PornhubSubscription(BaseSubscription):
                 page = new_page
             if current_page == page:
                 break
-            if not extract_all:
+            if not extract_all and not watermark:
+                break
+            if self._page_limit_reached(watermark, current_page):
                 break
             current_page += 1
 
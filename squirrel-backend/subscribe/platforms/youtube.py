@@ -1,11 +1,16 @@
+from typing import Optional
+
 from pytubefix import Channel as YouTubeChannel
 
+from core.config import settings
 from meta.channel import SubscriptionMeta
-from ..base import BaseSubscription
+from ..base import BaseSubscription, CrawlWatermark
 
 
 class YouTubeSubscription(BaseSubscription):
     DOMAIN = 'youtube.com'
+    # channel.videos 每次续载的视频数
+    PAGE_SIZE = 30
 
     def __init__(self, url):
         super().__init__(url)
@@ -19,14 +24,25 @@ class YouTubeSubscription(BaseSubscription):
             self.url
         )
 
-    def get_subscribe_videos(self, extract_all: bool):
+    def get_subscribe_videos(self, extract_all: bool, watermark: Optional[CrawlWatermark] = None):
+        # channel.videos loads further pages lazily while iterating, stopping early saves the requests
         videos_ = []
-        if self.channel.videos:
-            for video in self.channel.videos:
-                if video and video.watch_url:
-                    videos_.append(video.watch_url)
+        for video in self.channel.videos:
+            if not video or not video.watch_url:
+                continue
+            if self._reached(watermark, len(videos_), video.video_id):
+                return videos_
+            self._observe(video.watch_url, video.video_id)
+            videos_.append(video.watch_url)
+            if not extract_all and not watermark and len(videos_) >= settings.CHANNEL_UPDATE_DEFAULT_SIZE:
+                break
+            pages = len(videos_) // self.PAGE_SIZE
+            if len(videos_) % self.PAGE_SIZE == 0 and self._page_limit_reached(watermark, pages):
+                break
+
+        # Shorts are not ordered together with videos, they are only collected by full crawls
         shorts_ = []
-        if self.channel.shorts:
+        if extract_all and not watermark:
             for short in self.channel.shorts:
                 if short and short.watch_url:
                     shorts_.append(short.watch_url)
@@ -0,0 +1,81 @@
+from datetime import datetime
+
+import pytest
+
+from core.config import settings
+from utils.bandwidth import BandwidthManager, Pacer, water_fill
+
+MB = 1024 * 1024
+
+
+def test_water_fill_by_weight():
+    assert water_fill({'a': (1, None), 'b': (3, None)}, 8 * MB) == {'a': 2 * MB, 'b': 6 * MB}
+
+
+def test_water_fill_redistributes_unused_cap():
+    allocation = water_fill({'a': (1, MB), 'b': (1, None), 'c': (2, None)}, 10 * MB)
+    assert allocation['a'] == MB
+    assert allocation['b'] == 3 * MB and allocation['c'] == 6 * MB
+
+
+def test_water_fill_all_capped():
+    assert water_fill({'a': (1, MB), 'b': (1, 2 * MB)}, 10 * MB) == {'a': MB, 'b': 2 * MB}
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setattr(settings, 'BANDWIDTH_LIMIT', 12 * MB)
+    monkeypatch.setattr(settings, 'BANDWIDTH_PLATFORM_LIMITS', {})
+    monkeypatch.setattr(settings, 'BANDWIDTH_SCHEDULE', {})
+    monkeypatch.setattr(settings, 'BANDWIDTH_PRIORITY_WEIGHTS', {'playback': 8, 'manual': 4, 'auto': 2, 'backfill': 1})
+    return BandwidthManager()
+
+
+def test_allocate_by_priority(manager):
+    allocation = manager.allocate({'play': ('playback', 'youtube'), 'manual': ('manual', 'youtube')})
+    assert allocation == {'play': 8 * MB, 'manual': 4 * MB}
+
+
+def test_allocate_platform_limit(manager, monkeypatch):
+    monkeypatch.setattr(settings, 'BANDWIDTH_PLATFORM_LIMITS', {'bilibili': 2 * MB})
+    allocation = manager.allocate({
+        'b1': ('auto', 'bilibili'),
+        'b2': ('auto', 'bilibili'),
+        'y1': ('backfill', 'youtube'),
+    })
+    # bilibili 受平台上限限制，剩余带宽全部分给 youtube
+    assert allocation == {'b1': MB, 'b2': MB, 'y1': 10 * MB}
+
+
+def test_allocate_platform_limit_without_global_limit(manager, monkeypatch):
+    monkeypatch.setattr(settings, 'BANDWIDTH_LIMIT', 0)
+    monkeypatch.setattr(settings, 'BANDWIDTH_PLATFORM_LIMITS', {'bilibili': 3 * MB})
+    allocation = manager.allocate({'b1': ('manual', 'bilibili'), 'b2': ('backfill', 'bilibili'),
+                                   'y1': ('auto', 'youtube')})
+    assert allocation['y1'] is None
+    assert allocation['b1'] + allocation['b2'] <= 3 * MB
+    assert allocation['b1'] == pytest.approx(4 * allocation['b2'], abs=4)
+
+
+@pytest.mark.parametrize('now, expected', [
+    (datetime(2024, 5, 1, 12, 0), 2 * MB),
+    (datetime(2024, 5, 1, 23, 30), 0),
+    (datetime(2024, 5, 1, 7, 59), 0),
+])
+def test_schedule(manager, monkeypatch, now, expected):
+    monkeypatch.setattr(settings, 'BANDWIDTH_SCHEDULE', {'08:00-23:00': 2 * MB, '23:00-08:00': 0})
+    assert manager.get_global_limit(now) == expected
+
+
+def test_pacer_paces_to_limit():
+    pacer = Pacer()
+    assert pacer.delay(MB // 4, MB) == pytest.approx(0.25, abs=0.05)
+    assert pacer.delay(MB // 4, MB) == pytest.approx(0.5, abs=0.05)
+    assert pacer.delay(MB, None) == 0
+
+
+def test_pacer_allows_burst_after_idle():
+    pacer = Pacer()
+    pacer.next_at -= 10
+    assert pacer.delay(MB // 4, MB) == 0
+    assert pacer.delay(MB // 2, MB) == pytest.approx(0.25, abs=0.05)
@@ -0,0 +1,94 @@
+from datetime import datetime
+
+import pytest
+
+from core.config import settings
+from subscribe.base import CrawlWatermark
+from subscribe.platforms import pornhub
+from subscribe.platforms.pornhub import PornhubSubscription
+
+PAGE_SIZE = 4
+
+
+def test_reached_by_video_id():
+    watermark = CrawlWatermark('abc')
+    assert watermark.reached('abc')
+    assert not watermark.reached('def')
+
+
+def test_reached_by_publish_time():
+    watermark = CrawlWatermark('abc', datetime(2024, 5, 1))
+    assert watermark.reached('def', datetime(2024, 4, 30))
+    assert not watermark.reached('def', datetime(2024, 5, 2))
+    assert not watermark.reached('def')
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, text):
+        self.text = text
+
+    def raise_for_status(self):
+        pass
+
+
+def render_page(video_ids, total_pages):
+    links = ''.join(f'<a class="videoPreviewBg" href="/view_video.php?viewkey={video_id}"></a>'
+                    for video_id in video_ids)
+    # 列表中混有不是视频页的链接
+    links += '<a class="videoPreviewBg" href="/playlist/123"></a>'
+    return (f'<div id="channelsProfile"><div class="videos">{links}</div></div>'
+            f'<ul><li>{total_pages}</li><li class="page_next"></li></ul>')
+
+
+@pytest.fixture
+def channel(monkeypatch):
+    """一个每页 PAGE_SIZE 个视频的频道，ph0 最新"""
+    total_pages = 50
+    requested_pages = []
+
+    def get(url, **kwargs):
+        page = int(url.split('page=')[1]) if 'page=' in url else 1
+        requested_pages.append(page)
+        video_ids = [f'ph{i}' for i in range((page - 1) * PAGE_SIZE, page * PAGE_SIZE)]
+        return FakeResponse(render_page(video_ids, total_pages))
+
+    monkeypatch.setattr(pornhub.session, 'get', get)
+    monkeypatch.setattr(pornhub, 'filter_cookies_to_query_string', lambda url: '')
+    monkeypatch.setattr(settings, 'CHANNEL_UPDATE_DEFAULT_SIZE', 6)
+    monkeypatch.setattr(settings, 'CHANNEL_CRAWL_MAX_PAGES', 5)
+    return requested_pages
+
+
+def video_ids(video_urls):
+    return [url.split('viewkey=')[1] for url in video_urls]
+
+
+def test_incremental_crawl_stops_at_watermark(channel):
+    subscription = PornhubSubscription('https://www.pornhub.com/channels/test')
+    videos = subscription.get_subscribe_videos(extract_all=False, watermark=CrawlWatermark('ph9'))
+    assert video_ids(videos) == [f'ph{i}' for i in range(9)]
+
+
+def test_incremental_crawl_keeps_newest_videos(channel):
+    # 水位线就是最新的视频时仍列出最新的 CHANNEL_UPDATE_DEFAULT_SIZE 个视频，解析失败的视频会被重新提交
+    subscription = PornhubSubscription('https://www.pornhub.com/channels/test')
+    videos = subscription.get_subscribe_videos(extract_all=False, watermark=CrawlWatermark('ph1'))
+    assert video_ids(videos) == [f'ph{i}' for i in range(6)]
+
+
+def test_missing_watermark_stops_at_page_limit(channel):
+    subscription = PornhubSubscription('https://www.pornhub.com/channels/test')
+    videos = subscription.get_subscribe_videos(extract_all=False, watermark=CrawlWatermark('deleted'))
+    assert len(videos) == 5 * PAGE_SIZE
+    assert max(channel) == 5
+
+
+def test_persisted_watermark(channel):
+    subscription = PornhubSubscription('https://www.pornhub.com/channels/test')
+    videos = subscription.get_subscribe_videos(extract_all=False, watermark=CrawlWatermark('ph9'))
+    # 只有 ph3 之后的视频已入库，ph0-ph2 还在解析或解析失败
+    persisted_urls = set(videos[3:])
+    assert subscription.get_persisted_watermark(persisted_urls).video_id == 'ph3'
+    assert subscription.get_persisted_watermark(set()) is None
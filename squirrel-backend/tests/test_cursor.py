@@ -0,0 +1,23 @@
+from datetime import datetime
+
+import pytest
+
+from utils.cursor import decode_cursor, encode_cursor
+
+
+def test_round_trip():
+    sort_value = datetime(2024, 5, 1, 12, 30, 15)
+    cursor = encode_cursor(sort_value, 42)
+    assert '=' not in cursor
+    assert decode_cursor(cursor) == (sort_value, 42)
+
+
+@pytest.mark.parametrize('cursor', [None, ''])
+def test_empty_cursor(cursor):
+    assert decode_cursor(cursor) is None
+
+
+@pytest.mark.parametrize('cursor', ['not-a-cursor', 'W10', encode_cursor(datetime(2024, 1, 1), 1)[:-3]])
+def test_invalid_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
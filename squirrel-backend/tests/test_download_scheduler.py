@@ -0,0 +1,47 @@
+import pytest
+
+from common import constants
+from core.config import settings
+from services import download_scheduler
+from services.download_scheduler import get_queue, get_score
+
+MANUAL = constants.DOWNLOAD_PRIORITY_MANUAL
+AUTO = constants.DOWNLOAD_PRIORITY_AUTO
+BACKFILL = constants.DOWNLOAD_PRIORITY_BACKFILL
+
+
+@pytest.fixture(autouse=True)
+def aging(monkeypatch):
+    monkeypatch.setattr(settings, 'DOWNLOAD_PRIORITY_AGING', 3600)
+
+
+def test_higher_priority_first():
+    now = 1_700_000_000
+    assert get_score(MANUAL, now) < get_score(AUTO, now - 60) < get_score(BACKFILL, now - 120)
+
+
+def test_same_priority_in_enqueue_order():
+    assert get_score(AUTO, 100) < get_score(AUTO, 200)
+
+
+def test_waiting_lower_priority_ages_up():
+    now = 1_700_000_000
+    # 自动下载多等一个周期后排到新提交的手动下载前面，不会一直被插队
+    assert get_score(AUTO, now - 3601) < get_score(MANUAL, now)
+    assert get_score(BACKFILL, now - 2 * 3600 - 1) < get_score(MANUAL, now)
+
+
+def test_unknown_priority_ranks_lowest():
+    assert get_score('unknown', 100) == get_score(BACKFILL, 100)
+
+
+def test_queue_by_priority():
+    assert get_queue(MANUAL) == constants.QUEUE_VIDEO_DOWNLOAD
+    assert get_queue(AUTO) == constants.QUEUE_VIDEO_DOWNLOAD_SCHEDULED
+    assert get_queue(BACKFILL) == constants.QUEUE_VIDEO_DOWNLOAD_SCHEDULED
+
+
+def test_preempt_disabled(monkeypatch):
+    monkeypatch.setattr(settings, 'DOWNLOAD_PREEMPT', False)
+    monkeypatch.setattr(download_scheduler, 'PREEMPT_SCRIPT', lambda **kwargs: pytest.fail('should not run'))
+    assert download_scheduler.preempt(MANUAL) is None
@@ -0,0 +1,38 @@
+from yt_dlp import YoutubeDL
+
+from downloader.platform.base import Downloader
+
+
+class RecordingYoutubeDL(YoutubeDL):
+    def __init__(self):
+        super().__init__({'quiet': True})
+        self.calls = []
+
+    def process_ie_result(self, ie_result, download=True, extra_info=None):
+        self.calls.append(('process_ie_result', ie_result['id']))
+
+    def download(self, url_list):
+        self.calls.append(('download', url_list))
+
+
+def test_scraped_info_downloads_by_url():
+    # javdb 等平台自行抓取的信息没有 id/extractor/formats
+    video_info = {'title': 'ABC-123 title', 'thumbnail': 'https://example.com/cover.jpg', 'duration': 7200,
+                  'timestamp': 1700000000}
+    ydl = RecordingYoutubeDL()
+    Downloader._download_with_info(ydl, 'https://javdb.com/v/abc', video_info)
+    assert ydl.calls == [('download', ['https://javdb.com/v/abc'])]
+
+
+def test_missing_info_downloads_by_url():
+    ydl = RecordingYoutubeDL()
+    Downloader._download_with_info(ydl, 'https://javdb.com/v/abc', None)
+    assert ydl.calls == [('download', ['https://javdb.com/v/abc'])]
+
+
+def test_extracted_info_reuses_formats():
+    video_info = {'id': 'abc', 'extractor': 'generic', 'title': 'title',
+                  'formats': [{'format_id': '0', 'url': 'https://example.com/video.mp4', 'ext': 'mp4'}]}
+    ydl = RecordingYoutubeDL()
+    Downloader._download_with_info(ydl, 'https://example.com/abc', video_info)
+    assert ydl.calls == [('process_ie_result', 'abc')]
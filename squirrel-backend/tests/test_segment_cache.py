@@ -0,0 +1,67 @@
+import asyncio
+import os
+
+import httpx
+
+from cache.segment_cache import SegmentCache
+
+
+def fetcher(payloads, calls):
+    async def fetch(url):
+        calls.append(url)
+        return httpx.Response(200, headers={'content-type': 'video/mp2t'}, stream=httpx.ByteStream(payloads[url]),
+                              request=httpx.Request('GET', url))
+    return fetch
+
+
+async def read(cache, url, fetch):
+    content_type, body = await cache.open(url, fetch)
+    return content_type, b''.join([chunk async for chunk in body])
+
+
+def test_fill_then_hit(tmp_path):
+    calls = []
+    fetch = fetcher({'https://cdn/seg1.ts': b'a' * 10}, calls)
+    cache = SegmentCache(str(tmp_path), 1024)
+
+    async def run():
+        first = await read(cache, 'https://cdn/seg1.ts', fetch)
+        await asyncio.sleep(0)
+        second = await read(cache, 'https://cdn/seg1.ts', fetch)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == second == ('video/mp2t', b'a' * 10)
+    assert calls == ['https://cdn/seg1.ts']
+
+
+def test_restores_index_and_evicts(tmp_path):
+    payloads = {f'https://cdn/seg{i}.ts': bytes([i]) * 40 for i in range(4)}
+    calls = []
+    cache = SegmentCache(str(tmp_path), 1024)
+
+    async def fill():
+        for url in list(payloads)[:3]:
+            await read(cache, url, fetcher(payloads, calls))
+            await asyncio.sleep(0)
+
+    asyncio.run(fill())
+    # 上次运行留下的临时文件在重启后清理
+    leftover = tmp_path / 'ab' / '.abc.tmp'
+    leftover.parent.mkdir(exist_ok=True)
+    leftover.write_bytes(b'partial')
+
+    restarted = SegmentCache(str(tmp_path), 100)
+    calls.clear()
+
+    async def reopen():
+        await read(restarted, 'https://cdn/seg2.ts', fetcher(payloads, calls))
+        await asyncio.sleep(0)
+        await read(restarted, 'https://cdn/seg3.ts', fetcher(payloads, calls))
+        await asyncio.sleep(0)
+
+    asyncio.run(reopen())
+    assert not os.path.exists(leftover)
+    assert calls == ['https://cdn/seg3.ts']
+    assert restarted._total_bytes <= 100
+    assert sum(len(files) for _, _, files in os.walk(tmp_path)) == len(restarted._index)
@@ -0,0 +1,38 @@
+import asyncio
+
+from routes.task import _drain, _merge_events
+from services import task_event_service
+
+
+def test_merge_keeps_latest_fields():
+    events = [
+        {'type': task_event_service.EVENT_PROGRESS, 'id': 1, 'percent': '10%', 'speed': '1MiB/s'},
+        {'type': task_event_service.EVENT_STATUS, 'id': 1, 'status': 'DOWNLOADING'},
+        {'type': task_event_service.EVENT_PROGRESS, 'id': 2, 'percent': '50%'},
+        {'type': task_event_service.EVENT_PROGRESS, 'id': 1, 'percent': '20%'},
+    ]
+    merged = _merge_events(events, lambda e: True)
+    assert merged == [
+        {'id': 1, 'percent': '20%', 'speed': '1MiB/s', 'status': 'DOWNLOADING'},
+        {'id': 2, 'percent': '50%'},
+    ]
+
+
+def test_merge_filters_events():
+    events = [
+        {'type': task_event_service.EVENT_CREATED, 'id': 5},
+        {'type': task_event_service.EVENT_CREATED, 'id': 3},
+        {'type': task_event_service.EVENT_PROGRESS, 'id': 6, 'percent': '1%'},
+    ]
+    merged = _merge_events(events, lambda e: e['type'] == task_event_service.EVENT_CREATED and e['id'] > 4)
+    assert merged == [{'id': 5}]
+
+
+def test_drain_returns_backlog():
+    async def run():
+        queue = asyncio.Queue()
+        for i in range(3):
+            queue.put_nowait({'id': i})
+        return await _drain(queue)
+
+    assert asyncio.run(run()) == [{'id': 0}, {'id': 1}, {'id': 2}]
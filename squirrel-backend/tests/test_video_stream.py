@@ -0,0 +1,90 @@
+import pytest
+from starlette.applications import Starlette
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from common.video_stream import RangeFileResponse, parse_ranges
+
+SIZE = 1000
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('bytes=0-99', [(0, 99)]),
+    ('bytes=900-', [(900, 999)]),
+    ('bytes=-100', [(900, 999)]),
+    ('bytes=-2000', [(0, 999)]),
+    ('bytes=990-2000', [(990, 999)]),
+    ('bytes=0-9, 5-19, 100-109', [(0, 19), (100, 109)]),
+    ('bytes=20-29,10-19', [(10, 29)]),
+    ('bytes=1000-', []),
+    ('bytes=-0', []),
+    ('items=0-9', None),
+    ('bytes=9-0', None),
+    ('bytes=abc-', None),
+    ('bytes=5', None),
+])
+def test_parse_ranges(header, expected):
+    assert parse_ranges(header, SIZE) == expected
+
+
+@pytest.fixture
+def client(tmp_path):
+    content = bytes(range(256)) * 4
+    path = tmp_path / 'video.mp4'
+    path.write_bytes(content)
+
+    async def video(request):
+        return RangeFileResponse(request, str(path))
+
+    app = Starlette(routes=[Route('/video', video, methods=['GET', 'HEAD'])])
+    return TestClient(app), content
+
+
+def test_full_file(client):
+    client, content = client
+    response = client.get('/video')
+    assert response.status_code == 200
+    assert response.content == content
+    assert response.headers['accept-ranges'] == 'bytes'
+
+
+def test_single_range(client):
+    client, content = client
+    response = client.get('/video', headers={'range': 'bytes=10-19'})
+    assert response.status_code == 206
+    assert response.content == content[10:20]
+    assert response.headers['content-range'] == f'bytes 10-19/{len(content)}'
+    assert response.headers['content-length'] == '10'
+
+
+def test_multiple_ranges(client):
+    client, content = client
+    response = client.get('/video', headers={'range': 'bytes=0-1,10-11'})
+    assert response.status_code == 206
+    assert response.headers['content-type'].startswith('multipart/byteranges; boundary=')
+    assert int(response.headers['content-length']) == len(response.content)
+    assert content[0:2] in response.content and content[10:12] in response.content
+
+
+def test_unsatisfiable_range(client):
+    client, content = client
+    response = client.get('/video', headers={'range': f'bytes={len(content)}-'})
+    assert response.status_code == 416
+    assert response.headers['content-range'] == f'bytes */{len(content)}'
+
+
+def test_etag_and_if_range(client):
+    client, content = client
+    etag = client.get('/video').headers['etag']
+    assert client.get('/video', headers={'if-none-match': etag}).status_code == 304
+    # If-Range 不匹配时返回完整文件
+    response = client.get('/video', headers={'range': 'bytes=0-9', 'if-range': '"stale"'})
+    assert response.status_code == 200
+    assert response.content == content
+
+
+def test_head(client):
+    client, content = client
+    response = client.head('/video', headers={'range': 'bytes=0-9'})
+    assert response.status_code == 206
+    assert response.content == b''
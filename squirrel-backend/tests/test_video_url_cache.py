@@ -0,0 +1,34 @@
+import time
+from urllib.parse import quote
+
+from cache import video_url_cache
+from cache.video_url_cache import EXPIRE_MARGIN, get_ttl
+from core.config import settings
+
+
+def test_ttl_without_expire_param():
+    assert get_ttl({'video_url': 'https://example.com/video.mp4', 'audio_url': None}) == settings.VIDEO_URL_CACHE_TTL
+
+
+def test_ttl_uses_earliest_expire():
+    now = int(time.time())
+    video_urls = {
+        'video_url': f'https://upos.bilivideo.com/video.m4s?deadline={now + 7200}&gen=playurl',
+        'audio_url': f'https://upos.bilivideo.com/audio.m4s?deadline={now + 3600}',
+    }
+    assert abs(get_ttl(video_urls) - (3600 - EXPIRE_MARGIN)) <= 1
+
+
+def test_ttl_reads_proxied_url():
+    now = int(time.time())
+    origin = f'https://rr1---sn.googlevideo.com/videoplayback?expire={now + 3600}&id=abc'
+    video_urls = {'video_url': f'/api/video/proxy?url={quote(origin, safe="")}'}
+    assert abs(get_ttl(video_urls) - (3600 - EXPIRE_MARGIN)) <= 1
+
+
+def test_expired_url_is_not_cached(monkeypatch):
+    calls = []
+    monkeypatch.setattr(video_url_cache.client, 'set', lambda *args, **kwargs: calls.append(args))
+    video_urls = {'video_url': f'https://example.com/video.mp4?expire={int(time.time()) + 60}'}
+    video_url_cache.set_video_urls(1, 'best', video_urls)
+    assert calls == []
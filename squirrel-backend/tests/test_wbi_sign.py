@@ -0,0 +1,88 @@
+import datetime
+
+from subscribe.platforms.bilibili import sign
+
+IMG_KEY = '7cd084941338484aae1ad9425b84077c'
+SUB_KEY = '4932caff0ff746eab6f01bf08b70ac45'
+
+
+def test_enc_wbi(monkeypatch):
+    # bilibili-API-collect 文档中的示例
+    monkeypatch.setattr(sign.time, 'time', lambda: 1702204169)
+    params = sign.enc_wbi({'foo': '114', 'bar': '514', 'zab': 1919810}, IMG_KEY, SUB_KEY)
+    assert params == {'bar': '514', 'foo': '114', 'wts': '1702204169', 'zab': '1919810',
+                      'w_rid': '8f6f2b5b3d485fe1886cec6a0be8c5d4'}
+    assert sign.get_mixin_key(IMG_KEY + SUB_KEY) == 'ea1db124af3c7062474693fa704f4ff8'
+
+
+def test_enc_wbi_filters_reserved_characters():
+    params = sign.enc_wbi({'keyword': "it's (a) test!*"}, IMG_KEY, SUB_KEY)
+    assert params['keyword'] == 'its a test'
+
+
+class FakeRedis:
+    def __init__(self):
+        self.hashes = {}
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def pipeline(self, transaction=False):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+
+    def hset(self, key, field=None, value=None, mapping=None):
+        self.redis.hashes.setdefault(key, {}).update(mapping or {field: str(value)})
+
+    def hincrby(self, key, field, amount):
+        values = self.redis.hashes.setdefault(key, {})
+        values[field] = str(int(values.get(field, 0)) + amount)
+
+    def expire(self, key, seconds):
+        pass
+
+    def delete(self, key):
+        self.redis.hashes.pop(key, None)
+
+    def execute(self):
+        pass
+
+
+def test_keys_are_fetched_once_per_day(monkeypatch):
+    redis = FakeRedis()
+    fetches = []
+    monkeypatch.setattr(sign, 'client', redis)
+    monkeypatch.setattr(sign, 'get_wbi_keys', lambda: fetches.append(1) or (IMG_KEY, SUB_KEY))
+    monkeypatch.setattr(sign, '_cached_keys', {})
+    monkeypatch.setattr(sign, '_local_stats', {'memory_hit': 0, 'redis_hit': 0, 'miss': 0})
+
+    assert sign.get_cached_wbi_keys() == (IMG_KEY, SUB_KEY)
+    assert sign.get_cached_wbi_keys() == (IMG_KEY, SUB_KEY)
+    # 其他进程已经刷新过时从 Redis 读取
+    sign._cached_keys.clear()
+    assert sign.get_cached_wbi_keys() == (IMG_KEY, SUB_KEY)
+    assert len(fetches) == 1
+
+    sign.invalidate_wbi_keys()
+    sign.get_cached_wbi_keys()
+    assert len(fetches) == 2
+
+    stats = sign.get_wbi_stats()
+    assert stats['memory_hit'] == 1 and stats['redis_hit'] == 1 and stats['miss'] == 2
+    assert stats['refresh'] == 2 and stats['invalidate'] == 1
+
+
+def test_keys_expire_at_midnight(monkeypatch):
+    now = datetime.datetime(2024, 5, 1, 23, 59, 30)
+
+    class FixedDatetime(datetime.datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return now
+
+    monkeypatch.setattr(sign.datetime, 'datetime', FixedDatetime)
+    assert sign._seconds_until_tomorrow() == 30
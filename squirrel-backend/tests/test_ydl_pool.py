@@ -0,0 +1,103 @@
+import http.cookiejar
+import os
+import threading
+
+import pytest
+
+from downloader.ydl_pool import PROFILE_DOWNLOAD, PROFILE_INFO, YoutubeDLPool
+
+COOKIES = '# Netscape HTTP Cookie File\n.example.com\tTRUE\t/\tFALSE\t4102444800\tsession\told\n'
+
+
+@pytest.fixture
+def cookie_file(tmp_path):
+    path = tmp_path / 'cookies.txt'
+    path.write_text(COOKIES)
+    return str(path)
+
+
+@pytest.fixture
+def pool():
+    pool = YoutubeDLPool()
+    yield pool
+    pool.close()
+
+
+def borrow_in_thread(pool, *args, action=None, **kwargs):
+    result = {}
+
+    def run():
+        with pool.borrow(*args, **kwargs) as ydl:
+            result['ydl'] = ydl
+            if action:
+                action(ydl)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join()
+    return result['ydl']
+
+
+def set_cookie(ydl, value):
+    ydl.cookiejar.set_cookie(http.cookiejar.Cookie(
+        0, 'session', value, None, False, '.example.com', True, True, '/', True, False, 4102444800, False,
+        None, None, {}))
+
+
+def test_reuses_instance_per_thread(pool, cookie_file):
+    with pool.borrow(PROFILE_INFO, cookie_file) as first:
+        pass
+    with pool.borrow(PROFILE_INFO, cookie_file) as second:
+        pass
+    assert first is second
+    assert borrow_in_thread(pool, PROFILE_INFO, cookie_file) is not first
+
+
+def test_nested_borrow_uses_throwaway_instance(pool, cookie_file):
+    with pool.borrow(PROFILE_INFO, cookie_file) as outer:
+        with pool.borrow(PROFILE_INFO, cookie_file) as inner:
+            assert inner is not outer
+
+
+def test_init_time_option_uses_throwaway_instance(pool, cookie_file):
+    with pool.borrow(PROFILE_DOWNLOAD, cookie_file, outtmpl='a.%(ext)s') as pooled:
+        pass
+    with pool.borrow(PROFILE_DOWNLOAD, cookie_file, format='worst') as ydl:
+        assert ydl is not pooled
+        assert ydl.params['format'] == 'worst'
+    with pool.borrow(PROFILE_DOWNLOAD, cookie_file, outtmpl='b.%(ext)s') as ydl:
+        assert ydl is pooled
+        assert 'format' not in ydl.params
+
+
+def test_unchanged_cookies_are_not_written(pool, cookie_file):
+    mtime = os.stat(cookie_file).st_mtime_ns
+    with pool.borrow(PROFILE_INFO, cookie_file):
+        pass
+    assert os.stat(cookie_file).st_mtime_ns == mtime
+
+
+def test_refreshed_cookies_keep_other_threads_instances(pool, cookie_file):
+    with pool.borrow(PROFILE_INFO, cookie_file) as first:
+        pass
+    borrow_in_thread(pool, PROFILE_INFO, cookie_file, action=lambda ydl: set_cookie(ydl, 'new'))
+    assert 'new' in open(cookie_file).read()
+    # 同一队列其他线程写回的 cookie 不会让本线程的实例失效
+    with pool.borrow(PROFILE_INFO, cookie_file) as second:
+        pass
+    assert second is first
+
+
+def test_replaced_cookie_file_recreates_instance(pool, cookie_file):
+    with pool.borrow(PROFILE_INFO, cookie_file) as first:
+        set_cookie(first, 'stale')
+    # 模拟同步任务替换 cookie 副本
+    replacement = cookie_file + '.tmp'
+    with open(replacement, 'w') as file:
+        file.write(COOKIES.replace('old', 'synced'))
+    os.replace(replacement, cookie_file)
+
+    with pool.borrow(PROFILE_INFO, cookie_file) as second:
+        pass
+    assert second is not first
+    assert 'synced' in open(cookie_file).read()
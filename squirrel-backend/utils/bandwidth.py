@@ -0,0 +1,252 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+from redis.exceptions import RedisError
+
+from common import constants
+from core.cache import RedisClient
+from core.config import settings
+from utils.url_helper import extract_top_level_domain
+
+logger = logging.getLogger()
+
+REDIS_KEY_BANDWIDTH_LEASES = 'bandwidth:leases'
+
+# 下载使用 constants 中的下载优先级，代理播放使用单独的优先级
+PRIORITY_PLAYBACK = 'playback'
+
+# 租约的心跳间隔和过期时间，进程退出后租约最多保留 LEASE_TTL 秒
+REFRESH_INTERVAL = 2
+LEASE_TTL = 10
+# 限速时允许的突发时长，避免每个小数据块都要等待
+BURST_SECONDS = 0.5
+
+
+def get_platform(url: str) -> str:
+    domain = extract_top_level_domain(url) if '://' in url else url
+    return constants.SUPPORTED_SITES.get(domain, domain)
+
+
+def water_fill(demands: Dict[str, Tuple[int, Optional[int]]], total: int) -> Dict[str, int]:
+    """
+    按权重分配带宽，有上限的一方用不完的部分分给其他方（加权 max-min 公平）
+    demands: key -> (权重, 上限)，上限为 None 表示不限
+    """
+    allocation = {}
+    remaining = total
+    active = dict(demands)
+    while active:
+        weight_sum = sum(weight for weight, _ in active.values())
+        capped = {key: cap for key, (weight, cap) in active.items()
+                  if cap is not None and cap <= remaining * weight / weight_sum}
+        if not capped:
+            for key, (weight, _) in active.items():
+                allocation[key] = int(remaining * weight / weight_sum)
+            break
+        for key, cap in capped.items():
+            allocation[key] = cap
+            remaining -= cap
+            del active[key]
+    return allocation
+
+
+class Pacer:
+    """按当前限速计算每次传输后需要等待的时间，限速变化后立即生效"""
+
+    def __init__(self):
+        self.next_at = time.monotonic()
+
+    def delay(self, nbytes: int, limit: Optional[int]) -> float:
+        now = time.monotonic()
+        if not limit:
+            self.next_at = now
+            return 0
+        self.next_at = max(self.next_at, now - BURST_SECONDS) + nbytes / limit
+        return max(0.0, self.next_at - now)
+
+
+class BandwidthLease:
+    """一个正在传输的下载或代理请求，定期续约并取回分配给自己的速度上限"""
+
+    def __init__(self, manager: 'BandwidthManager', priority: str, platform: str):
+        self.manager = manager
+        self.lease_id = uuid.uuid4().hex
+        self.priority = priority
+        self.platform = platform
+        self.limit: Optional[int] = None
+        self.refreshed_at = 0.0
+        self.params: Optional[dict] = None
+        self.pacer = Pacer()
+        self._downloaded_bytes = 0
+        self._lock = threading.Lock()
+
+    def bind(self, params: dict):
+        """绑定 yt-dlp 的参数，限速变化时同步更新 ratelimit"""
+        self.params = params
+        params['ratelimit'] = self.limit
+
+    def refresh(self, force: bool = False) -> Optional[int]:
+        if force or time.monotonic() - self.refreshed_at >= REFRESH_INTERVAL:
+            self.refreshed_at = time.monotonic()
+            self.limit = self.manager.heartbeat(self)
+            if self.params is not None:
+                self.params['ratelimit'] = self.limit
+        return self.limit
+
+    def pace(self, downloaded_bytes: int):
+        """在 yt-dlp 进度回调中调用，按累计下载量限速，并发下载分片时限制的是总速度"""
+        with self._lock:
+            delta = downloaded_bytes - self._downloaded_bytes
+            # 视频和音频分开下载，切换文件时累计值从 0 重新开始
+            if delta < 0:
+                delta = downloaded_bytes
+            self._downloaded_bytes = downloaded_bytes
+            delay = self.pacer.delay(delta, self.refresh())
+        if delay > 0:
+            time.sleep(delay)
+
+    def release(self):
+        self.manager.release(self)
+
+
+class BandwidthManager:
+    """
+    全局带宽分配，配置保存在 settings，租约保存在 Redis 中，所有进程共享同一份分配结果
+    先按全局上限（可按时段配置）在各平台之间分配，再在平台内按优先级权重分配，
+    有人看视频时代理请求优先，手动下载优先于自动下载和补档
+    """
+
+    def __init__(self):
+        self._local_leases: Dict[str, BandwidthLease] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(settings.BANDWIDTH_LIMIT or settings.BANDWIDTH_PLATFORM_LIMITS or settings.BANDWIDTH_SCHEDULE)
+
+    def get_global_limit(self, now: Optional[datetime] = None) -> int:
+        """当前时段的全局上限，时段格式为 HH:MM-HH:MM，可以跨过零点，0 表示不限"""
+        current = (now or datetime.now()).strftime('%H:%M')
+        for period, limit in settings.BANDWIDTH_SCHEDULE.items():
+            start, _, end = period.partition('-')
+            if (start <= current < end) if start <= end else (current >= start or current < end):
+                return limit
+        return settings.BANDWIDTH_LIMIT
+
+    def allocate(self, leases: Dict[str, Tuple[str, str]]) -> Dict[str, Optional[int]]:
+        """leases: lease_id -> (优先级, 平台)，返回 lease_id -> 字节/秒，None 表示不限速"""
+        weights = settings.BANDWIDTH_PRIORITY_WEIGHTS
+        platforms: Dict[str, Dict[str, Tuple[int, None]]] = {}
+        for lease_id, (priority, platform) in leases.items():
+            platforms.setdefault(platform, {})[lease_id] = (weights.get(priority, 1), None)
+
+        platform_limits = {platform: settings.BANDWIDTH_PLATFORM_LIMITS.get(platform) or None
+                           for platform in platforms}
+        total = self.get_global_limit()
+        if total:
+            platform_demands = {platform: (sum(weight for weight, _ in members.values()), platform_limits[platform])
+                                for platform, members in platforms.items()}
+            platform_limits = water_fill(platform_demands, total)
+
+        allocation = {}
+        for platform, members in platforms.items():
+            platform_limit = platform_limits[platform]
+            if platform_limit is None:
+                allocation.update({lease_id: None for lease_id in members})
+            else:
+                allocation.update(water_fill(members, platform_limit))
+        return allocation
+
+    def open(self, priority: str, platform: str) -> BandwidthLease:
+        lease = BandwidthLease(self, priority, platform)
+        if self.enabled:
+            with self._lock:
+                self._local_leases[lease.lease_id] = lease
+            lease.refresh(force=True)
+        return lease
+
+    def heartbeat(self, lease: BandwidthLease) -> Optional[int]:
+        if not self.enabled:
+            return None
+        try:
+            leases = self._load_leases(lease)
+        except RedisError as e:
+            # Redis 不可用时只按本进程的租约分配
+            logger.warning(f'带宽租约续约失败，使用本进程的分配结果: {e}')
+            with self._lock:
+                leases = {lease_id: (item.priority, item.platform) for lease_id, item in self._local_leases.items()}
+        return self.allocate(leases).get(lease.lease_id)
+
+    def _load_leases(self, lease: Optional[BandwidthLease] = None) -> Dict[str, Tuple[str, str]]:
+        client = RedisClient.get_instance().client
+        now = time.time()
+        pipeline = client.pipeline(transaction=False)
+        if lease is not None:
+            pipeline.hset(REDIS_KEY_BANDWIDTH_LEASES, lease.lease_id, json.dumps({
+                'priority': lease.priority,
+                'platform': lease.platform,
+                'expires_at': now + LEASE_TTL,
+            }))
+        pipeline.hgetall(REDIS_KEY_BANDWIDTH_LEASES)
+        raw_leases = pipeline.execute()[-1]
+
+        leases, expired = {}, []
+        for lease_id, value in raw_leases.items():
+            item = json.loads(value)
+            if item['expires_at'] < now:
+                expired.append(lease_id)
+            else:
+                leases[lease_id] = (item['priority'], item['platform'])
+        if expired:
+            client.hdel(REDIS_KEY_BANDWIDTH_LEASES, *expired)
+        return leases
+
+    def release(self, lease: BandwidthLease):
+        with self._lock:
+            if self._local_leases.pop(lease.lease_id, None) is None:
+                return
+        try:
+            RedisClient.get_instance().client.hdel(REDIS_KEY_BANDWIDTH_LEASES, lease.lease_id)
+        except RedisError as e:
+            logger.warning(f'释放带宽租约失败: {e}')
+
+    async def throttle(self, stream: AsyncIterator[bytes], priority: str, platform: str) -> AsyncIterator[bytes]:
+        """按分配的带宽转发代理数据"""
+        if not self.enabled:
+            async for chunk in stream:
+                yield chunk
+            return
+        lease = await asyncio.to_thread(self.open, priority, platform)
+        try:
+            async for chunk in stream:
+                yield chunk
+                if time.monotonic() - lease.refreshed_at >= REFRESH_INTERVAL:
+                    await asyncio.to_thread(lease.refresh)
+                delay = lease.pacer.delay(len(chunk), lease.limit)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+        finally:
+            await asyncio.to_thread(self.release, lease)
+
+    def get_allocation(self) -> dict:
+        leases = self._load_leases() if self.enabled else {}
+        allocation = self.allocate(leases)
+        return {
+            'enabled': self.enabled,
+            'limit': self.get_global_limit(),
+            'platform_limits': settings.BANDWIDTH_PLATFORM_LIMITS,
+            'priority_weights': settings.BANDWIDTH_PRIORITY_WEIGHTS,
+            'leases': [
+                {'id': lease_id, 'priority': priority, 'platform': platform, 'limit': allocation.get(lease_id)}
+                for lease_id, (priority, platform) in leases.items()
+            ],
+        }
+
+
+bandwidth_manager = BandwidthManager()
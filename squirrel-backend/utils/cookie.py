@@ -1,10 +1,60 @@
 import http.cookiejar as cookielib
+import os
+import threading
 
 from core import config
 from core.config import settings
 from utils.url_helper import extract_top_level_domain
 
 
+class CookieStore:
+    """
+    解析后的 Cookie 缓存，文件的 mtime/inode/size 变化时才重新解析
+    按顶级域名缓存 k1=v1; k2=v2 格式的字符串，查询时只需一次字典访问
+    """
+
+    def __init__(self, file_path_getter):
+        self._file_path_getter = file_path_getter
+        self._lock = threading.Lock()
+        self._version = None
+        self._cookies = []
+        self._domain_index = {}
+
+    def _file_version(self, file_path):
+        stat = os.stat(file_path)
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _reload_if_changed(self):
+        file_path = self._file_path_getter()
+        version = self._file_version(file_path)
+        if version == self._version:
+            return
+        cj = cookielib.MozillaCookieJar()
+        cj.load(file_path, ignore_discard=True, ignore_expires=True)
+        self._cookies = [(cookie.domain, f"{cookie.name}={cookie.value}") for cookie in cj]
+        self._domain_index = {}
+        self._version = version
+
+    def get_cookie_string(self, domain):
+        with self._lock:
+            self._reload_if_changed()
+            cookie_string = self._domain_index.get(domain)
+            if cookie_string is None:
+                cookie_string = '; '.join(value for cookie_domain, value in self._cookies
+                                          if cookie_domain.endswith(domain))
+                self._domain_index[domain] = cookie_string
+            return cookie_string
+
+    def invalidate(self):
+        """Cookie 文件被改写后调用，强制下次查询重新解析"""
+        with self._lock:
+            self._version = None
+            self._domain_index = {}
+
+
+http_cookie_store = CookieStore(config.get_cookies_http_file_path)
+
+
 def filter_cookies_to_query_string(target_url):
     """
     筛选与目标URL匹配的所有相关Cookie，并转换为分号分隔的格式（k1=v1; k2=v2;）。
@@ -12,56 +62,47 @@ def filter_cookies_to_query_string(target_url):
     :param target_url: 目标URL，用于确定需匹配的顶级域名
     :return: 筛选后Cookie的分号分隔格式字符串
     """
-    file_path = config.get_cookies_http_file_path()
-    cj = cookielib.MozillaCookieJar()
-    cj.load(file_path, ignore_discard=True, ignore_expires=True)
-
     domain = extract_top_level_domain(target_url)
-    filtered_cj = cookielib.CookieJar()
+    return http_cookie_store.get_cookie_string(domain)
+
 
-    for cookie in cj:
-        if cookie.domain.endswith(domain):
-            filtered_cj.set_cookie(cookie)
+def json_cookie_to_netscape(cookies: dict, domain_list: list, output_file):
+    # 原子替换，正在读取 cookie 文件的 worker 不会读到写了一半的内容
+    config.write_file_atomic(output_file, lambda f: _write_netscape_cookies(f, cookies, domain_list))
 
-    # 手动构建分号分隔的Cookie字符串
-    cookie_strings = [f"{cookie.name}={cookie.value}" for cookie in filtered_cj]
-    cookie_semicolon_string = '; '.join(cookie_strings)
-    return cookie_semicolon_string
 
+def _write_netscape_cookies(f, cookies: dict, domain_list: list):
+    # 写入Netscape格式的文件头
+    f.write("# Netscape HTTP Cookie File\n")
+    f.write("# This file is generated by yt-dlp.  Do not edit.\n")
+    f.write("\n")
 
-def json_cookie_to_netscape(cookies: dict, domain_list: list, output_file):
-    with open(output_file, 'w') as f:
-        # 写入Netscape格式的文件头
-        f.write("# Netscape HTTP Cookie File\n")
-        f.write("# This file is generated by yt-dlp.  Do not edit.\n")
-        f.write("\n")
-
-        for site in cookies:
-            match_domain = False
-            if domain_list:
-                for domain in domain_list:
-                    if domain in site:
-                        match_domain = True
-                        break
-            if domain_list and not match_domain:
+    for site in cookies:
+        match_domain = False
+        if domain_list:
+            for domain in domain_list:
+                if domain in site:
+                    match_domain = True
+                    break
+        if domain_list and not match_domain:
+            continue
+
+        site_cookie = cookies[site]
+        for cookie in site_cookie:
+
+            if 'expirationDate' not in cookie or cookie['expirationDate'] == '' or cookie['expirationDate'] == 0:
                 continue
+            domain = cookie['domain']
+            if domain.startswith('.'):
+                domain = domain[1:]
 
-            site_cookie = cookies[site]
-            for cookie in site_cookie:
-
-                if 'expirationDate' not in cookie or cookie['expirationDate'] == '' or cookie['expirationDate'] == 0:
-                    continue
-                domain = cookie['domain']
-                if domain.startswith('.'):
-                    domain = domain[1:]
-
-                line = "\t".join([
-                    domain,
-                    str(cookie['httpOnly']),
-                    cookie['path'],
-                    str(cookie['secure']),
-                    str(cookie['expirationDate']).split('.')[0],
-                    cookie['name'],
-                    cookie['value'],
-                ])
-                f.write(line + "\n")
+            line = "\t".join([
+                domain,
+                str(cookie['httpOnly']),
+                cookie['path'],
+                str(cookie['secure']),
+                str(cookie['expirationDate']).split('.')[0],
+                cookie['name'],
+                cookie['value'],
+            ])
+            f.write(line + "\n")
@@ -0,0 +1,34 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+
+def encode_cursor(sort_value: datetime, video_id: int) -> str:
+    """
+    将排序字段值与视频ID编码为不透明的游标字符串。
+
+    :param sort_value: 排序字段的值（publish_date 或 created_at）
+    :param video_id: 视频ID，用于相同排序值时的稳定排序
+    :return: urlsafe base64 编码的游标
+    """
+    payload = json.dumps([sort_value.isoformat(), video_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, int]]:
+    """
+    解析游标字符串。
+
+    :param cursor: encode_cursor 生成的游标
+    :return: (排序字段值, 视频ID)，游标为空时返回 None
+    :raises ValueError: 游标格式不合法
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_value, video_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(sort_value), int(video_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
@@ -1,53 +1,167 @@
-import random
+import asyncio
+import logging
+import threading
 import time
 from dataclasses import dataclass
 from typing import Optional
 
+from redis.exceptions import RedisError
+
+from core.cache import RedisClient
+
+logger = logging.getLogger()
+
+REDIS_KEY_RATE_LIMIT = 'rate_limit'
+
+# 令牌桶脚本，使用 Redis 服务器时间，保证所有进程看到同一个时钟
+# ARGV: rate(令牌/秒), burst(桶容量), requested(请求令牌数), reserve(令牌不足时是否预占)
+# 返回需要等待的秒数，0 表示已获取到令牌；预占模式下令牌可以为负数，调用方等待返回的秒数后直接发送请求
+TOKEN_BUCKET_SCRIPT = """
+redis.replicate_commands()
+local key = KEYS[1]
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local reserve = tonumber(ARGV[4])
+
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+local tokens = tonumber(bucket[1])
+local ts = tonumber(bucket[2])
+if tokens == nil then
+    tokens = burst
+    ts = now
+end
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+
+local wait = 0
+if tokens >= requested then
+    tokens = tokens - requested
+else
+    wait = (requested - tokens) / rate
+    if reserve == 1 then
+        tokens = tokens - requested
+    end
+end
+
+redis.call('HSET', key, 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', key, math.ceil((burst - tokens) / rate * 1000) + 1000)
+return tostring(wait)
+"""
+
 
 @dataclass
 class RateLimit:
     """Rate limit configuration"""
-    min_interval: float  # Minimum interval between requests
-    max_interval: float  # Maximum interval between requests
+    rate: float  # Tokens refilled per second
+    burst: int  # Bucket capacity
     domain: str  # Domain this rate limit applies to
 
 
+class LocalTokenBucket:
+    """In-process token bucket, used when Redis is unavailable"""
+
+    def __init__(self, rate_limit: RateLimit):
+        self.rate_limit = rate_limit
+        self.tokens = float(rate_limit.burst)
+        self.ts = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self, reserve: bool) -> float:
+        with self._lock:
+            now = time.monotonic()
+            rate, burst = self.rate_limit.rate, self.rate_limit.burst
+            self.tokens = min(burst, self.tokens + (now - self.ts) * rate)
+            self.ts = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            wait = (1 - self.tokens) / rate
+            if reserve:
+                self.tokens -= 1
+            return wait
+
+
 class RateLimiter:
-    """Rate limiter to prevent too frequent requests"""
+    """
+    Rate limiter to prevent too frequent requests
+    令牌桶保存在 Redis 中，所有 worker 进程共享同一个桶，每个域名的吞吐量与配置一致
+    """
 
     # Default rate limits for different domains
     DEFAULT_LIMITS = {
-        'bilibili.com': RateLimit(3.0, 5.0, 'bilibili.com'),
-        'youtube.com': RateLimit(2.0, 4.0, 'youtube.com'),
-        'pornhub.com': RateLimit(3.0, 5.0, 'pornhub.com'),
-        'javdb.com': RateLimit(3.0, 5.0, 'javdb.com'),
+        'bilibili.com': RateLimit(0.25, 1, 'bilibili.com'),
+        'youtube.com': RateLimit(0.33, 2, 'youtube.com'),
+        'pornhub.com': RateLimit(0.25, 1, 'pornhub.com'),
+        'javdb.com': RateLimit(0.25, 1, 'javdb.com'),
     }
 
     # Global default rate limit
-    DEFAULT_RATE_LIMIT = RateLimit(2.0, 4.0, '*')
+    DEFAULT_RATE_LIMIT = RateLimit(0.33, 2, '*')
 
     def __init__(self):
-        self._last_request_time: dict[str, float] = {}
         self._rate_limits: dict[str, RateLimit] = self.DEFAULT_LIMITS.copy()
+        self._local_buckets: dict[str, LocalTokenBucket] = {}
+        # 本地快速路径：桶已知为空时，在这个时间点之前 try_acquire 直接返回 False，不访问 Redis
+        self._empty_until: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._client = RedisClient.get_instance().client
+        self._script = self._client.register_script(TOKEN_BUCKET_SCRIPT)
 
-    def add_rate_limit(self, domain: str, min_interval: float, max_interval: float):
+    def add_rate_limit(self, domain: str, rate: float, burst: int = 1):
         """Add or update rate limit for a domain"""
-        self._rate_limits[domain] = RateLimit(min_interval, max_interval, domain)
+        with self._lock:
+            self._rate_limits[domain] = RateLimit(rate, burst, domain)
+            self._local_buckets.pop(domain, None)
 
-    def wait(self, domain: Optional[str] = None):
-        """Wait according to rate limit"""
-        rate_limit = self._rate_limits.get(domain, self.DEFAULT_RATE_LIMIT)
-        last_time = self._last_request_time.get(rate_limit.domain, 0)
+    def get_rate_limit(self, domain: Optional[str] = None) -> RateLimit:
+        """按域名后缀匹配，api.bilibili.com 使用 bilibili.com 的配置"""
+        if domain:
+            domain = domain.split(':')[0]
+            while domain:
+                if domain in self._rate_limits:
+                    return self._rate_limits[domain]
+                if '.' not in domain:
+                    break
+                domain = domain.split('.', 1)[1]
+        return self.DEFAULT_RATE_LIMIT
+
+    def _take(self, rate_limit: RateLimit, reserve: bool) -> float:
+        """取一个令牌，返回需要等待的秒数"""
+        try:
+            key = f'{REDIS_KEY_RATE_LIMIT}:{rate_limit.domain}'
+            return float(self._script(keys=[key], args=[rate_limit.rate, rate_limit.burst, 1, 1 if reserve else 0]))
+        except RedisError as e:
+            logger.warning(f'rate limiter fallback to local bucket, domain: {rate_limit.domain}, error: {e}')
+            with self._lock:
+                bucket = self._local_buckets.get(rate_limit.domain)
+                if bucket is None:
+                    bucket = self._local_buckets[rate_limit.domain] = LocalTokenBucket(rate_limit)
+            return bucket.take(reserve)
 
-        # Calculate time to wait
-        now = time.time()
-        elapsed = now - last_time
-        interval = random.uniform(rate_limit.min_interval, rate_limit.max_interval)
+    def try_acquire(self, domain: Optional[str] = None) -> bool:
+        """Non-blocking acquire, returns False if no token is available"""
+        rate_limit = self.get_rate_limit(domain)
+        if time.monotonic() < self._empty_until.get(rate_limit.domain, 0):
+            return False
+        wait = self._take(rate_limit, reserve=False)
+        if wait > 0:
+            self._empty_until[rate_limit.domain] = time.monotonic() + wait
+            return False
+        return True
 
-        if elapsed < interval:
-            time.sleep(interval - elapsed)
+    def wait(self, domain: Optional[str] = None):
+        """Block the calling thread until a token is available"""
+        wait = self._take(self.get_rate_limit(domain), reserve=True)
+        if wait > 0:
+            time.sleep(wait)
 
-        self._last_request_time[rate_limit.domain] = time.time()
+    async def acquire(self, domain: Optional[str] = None):
+        """Asyncio variant of wait"""
+        wait = await asyncio.to_thread(self._take, self.get_rate_limit(domain), True)
+        if wait > 0:
+            await asyncio.sleep(wait)
 
 
 # Global rate limiter instance
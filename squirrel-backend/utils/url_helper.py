@@ -1,3 +1,11 @@
+import re
+from typing import Optional
+from urllib.parse import unquote
+
+# CDN 地址中的过期时间参数：youtube 为 expire，bilibili 为 deadline，pornhub 为 validto
+EXPIRE_PARAM_PATTERN = re.compile(r'[?&](?:expire|deadline|validto)=(\d+)')
+
+
 def extract_top_level_domain(url):
     """
     从URL中提取顶级域名（包括二级，如果存在的话，例如example.com）。
@@ -17,3 +25,14 @@ def extract_top_level_domain(url):
     else:
         # 否则，提取最后两个部分作为顶级域名
         return '.'.join(domain_parts[-2:])
+
+
+def extract_expire_timestamp(url: str) -> Optional[int]:
+    """
+    从 CDN 地址中提取过期时间戳，代理地址中编码过的原始地址同样可以识别
+
+    :param url: 完整的URL字符串
+    :return: 过期时间戳，没有过期参数时返回 None
+    """
+    match = EXPIRE_PARAM_PATTERN.search(unquote(url or ''))
+    return int(match.group(1)) if match else None
@@ -9,6 +9,7 @@ const error = ref(null);
 const activeTab = ref('all');
 const videoCounts = ref({ all: 0, unread: 0, read: 0, preview: 0, liked: 0});
 const currentPage = ref(1);
+const nextCursor = ref(null);
 const searchQuery = ref('');
 const isResetting = ref(false);
 const subscriptionId = ref(null);
@@ -39,6 +40,8 @@ export default function useLatestVideos() {
     const pageSize = 30;
     const { data, error: requestError } = await get('/api/video/list', {
       page: currentPage.value,
+      // 搜索结果按相关度排序，只支持按页码翻页
+      cursor: currentPage.value === 1 || searchQuery.value ? undefined : nextCursor.value,
       pageSize,
       query: searchQuery.value,
       subscription_id: subscriptionId.value,
@@ -66,7 +69,8 @@ export default function useLatestVideos() {
         )];
     
     currentPage.value++;
-    allLoaded.value = newVideos.length < pageSize;
+    nextCursor.value = data.next_cursor;
+    allLoaded.value = newVideos.length < pageSize || (!searchQuery.value && !data.next_cursor);
     loading.value = false;
     
     if (data.counts) {
@@ -86,6 +90,7 @@ export default function useLatestVideos() {
     isResetting.value = true;
     videos.value = [];
     currentPage.value = 1;
+    nextCursor.value = null;
     allLoaded.value = false;
     error.value = null;
     loadMore().finally(() => {